@@ -0,0 +1,240 @@
+import argparse
+import json
+
+import numpy as np
+
+from challenge_eval import (
+    SUBTASKS, SUBTASK_TITLES, index_ground_truth, iter_predictions, new_subtask_counts, score_article
+)
+
+METRICS = ["macro_precision", "macro_recall", "macro_f1", "micro_precision", "micro_recall", "micro_f1"]
+
+
+def count_matrices(predictions: dict, ground_truth_index: dict, subtask: str) -> dict:
+    """
+    Build per-document, per-label TP / FP / FN count matrices for one subtask.
+
+    `predictions` is a dict {pmid: article} or an iterable of (pmid, article)
+    pairs. Predictions are cleaned and matched exactly like `challenge_eval.py`, so
+    summing the matrices over all documents reproduces its scores. Rows cover
+    every PMID of the ground truth plus any predicted-only PMID.
+
+    Returns:
+        dict: {"pmids", "labels", "tp", "fp", "fn"} with (n_docs, n_labels) int arrays.
+    """
+    annotated_per_label = ground_truth_index[subtask]["annotated_per_label"]
+    labels = list(annotated_per_label.keys())
+    label_ids = {label: column for column, label in enumerate(labels)}
+    gold_entries = ground_truth_index[subtask]["entries"]
+
+    # Predictions may be streamed: score each article as it arrives, one row per PMID
+    rows = {pmid: row for row, pmid in enumerate(gold_entries.keys())}
+    tp_rows, predicted_rows = {}, {}
+    articles = predictions.items() if isinstance(predictions, dict) else predictions
+    for pmid, article in articles:
+        rows.setdefault(pmid, len(rows))
+        counts = new_subtask_counts(ground_truth_index, [subtask])
+        score_article(pmid, article, ground_truth_index, counts)
+        tp_rows[pmid] = counts[subtask]["true_positives"]
+        predicted_rows[pmid] = counts[subtask]["predicted"]
+
+    pmids = list(rows.keys())
+    tp = np.zeros((len(pmids), len(labels)), dtype=np.int64)
+    predicted = np.zeros_like(tp)
+    annotated = np.zeros_like(tp)
+
+    annotated_per_document = ground_truth_index[subtask]["annotated_per_document"]
+    for pmid, row in rows.items():
+        for label, count in annotated_per_document.get(pmid, {}).items():
+            annotated[row, label_ids[label]] = count
+        for label, count in predicted_rows.get(pmid, {}).items():
+            predicted[row, label_ids[label]] = count
+        for label, count in tp_rows.get(pmid, {}).items():
+            tp[row, label_ids[label]] = count
+
+    return {"pmids": pmids, "labels": labels, "tp": tp, "fp": predicted - tp, "fn": annotated - tp}
+
+
+def align_matrices(matrices_list):
+    """
+    Reindex the count matrices of several runs on one shared PMID order.
+
+    Each run has its own rows for the PMIDs it predicts but the ground truth
+    lacks. The shared order is the ground truth PMIDs followed by the extra
+    PMIDs of every run; a run gets zero counts for the rows it does not
+    predict, so row i is the same document in every run.
+
+    Args:
+        matrices_list (list): Count matrices (from `count_matrices`) built on the same ground truth.
+
+    Returns:
+        list: The matrices, with the same "pmids" and number of rows.
+    """
+    pmids = list(dict.fromkeys(pmid for matrices in matrices_list for pmid in matrices["pmids"]))
+    rows = {pmid: row for row, pmid in enumerate(pmids)}
+
+    aligned = []
+    for matrices in matrices_list:
+        indices = np.array([rows[pmid] for pmid in matrices["pmids"]], dtype=np.int64)
+        run = {"pmids": pmids, "labels": matrices["labels"]}
+        for name in ("tp", "fp", "fn"):
+            run[name] = np.zeros((len(pmids), matrices[name].shape[1]), dtype=matrices[name].dtype)
+            run[name][indices] = matrices[name]
+        aligned.append(run)
+    return aligned
+
+
+def scores_from_counts(tp, fp, fn):
+    """
+    Compute the six challenge scores from summed counts, vectorized over replicates.
+
+    Args:
+        tp, fp, fn (np.ndarray): Arrays of shape (..., n_labels).
+
+    Returns:
+        dict: Metric name -> array of shape (...).
+    """
+    predicted = tp + fp
+    annotated = tp + fn
+
+    micro_precision = tp.sum(-1) / (predicted.sum(-1) + 1e-10)
+    micro_recall = tp.sum(-1) / (annotated.sum(-1) + 1e-10)
+    micro_f1 = 2 * ((micro_precision * micro_recall) / (micro_precision + micro_recall + 1e-10))
+
+    precision = tp / (predicted + 1e-10)
+    recall = tp / (annotated + 1e-10)
+    f1 = 2 * ((precision * recall) / (precision + recall + 1e-10))
+
+    return {
+        "macro_precision": precision.mean(-1),
+        "macro_recall": recall.mean(-1),
+        "macro_f1": f1.mean(-1),
+        "micro_precision": micro_precision,
+        "micro_recall": micro_recall,
+        "micro_f1": micro_f1,
+    }
+
+
+def bootstrap_scores(matrices_list, n_resamples=10000, seed=0, batch_size=1000):
+    """
+    Resample documents with replacement and score every run on the same resamples.
+
+    Each replicate is a vector of document weights drawn from a multinomial,
+    so the resampled counts of all replicates in a batch are one matrix
+    product with the (n_docs, n_labels) count matrices.
+
+    Args:
+        matrices_list (list): Count matrices (from `count_matrices`) of one or more
+            runs, built on the same ground truth and aligned with `align_matrices`.
+        n_resamples (int): Number of bootstrap replicates.
+        seed (int): Random seed.
+        batch_size (int): Replicates drawn per batch, to bound memory.
+
+    Returns:
+        list: For each run, a dict metric name -> array of n_resamples scores.
+    """
+    if any(matrices["pmids"] != matrices_list[0]["pmids"] for matrices in matrices_list):
+        raise ValueError("Runs cover different PMIDs: align their matrices with align_matrices first.")
+
+    n_docs = matrices_list[0]["tp"].shape[0]
+    rng = np.random.default_rng(seed)
+    results = [{metric: [] for metric in METRICS} for _ in matrices_list]
+
+    for batch_start in range(0, n_resamples, batch_size):
+        size = min(batch_size, n_resamples - batch_start)
+        weights = rng.multinomial(n_docs, np.full(n_docs, 1 / n_docs), size=size)
+
+        for run, matrices in enumerate(matrices_list):
+            scores = scores_from_counts(weights @ matrices["tp"], weights @ matrices["fp"], weights @ matrices["fn"])
+            for metric in METRICS:
+                results[run][metric].append(scores[metric])
+
+    return [{metric: np.concatenate(values) for metric, values in run.items()} for run in results]
+
+
+def confidence_interval(samples, alpha=0.05):
+    """Percentile confidence interval of bootstrap samples."""
+    low, high = np.quantile(samples, [alpha / 2, 1 - alpha / 2])
+    return float(low), float(high)
+
+
+def paired_bootstrap_test(samples_a, samples_b):
+    """
+    Two-sided paired bootstrap test on the per-replicate difference A - B.
+
+    Returns:
+        tuple: (mean difference, p-value).
+    """
+    difference = samples_a - samples_b
+    p_value = 2 * min(np.mean(difference <= 0), np.mean(difference >= 0))
+    return float(difference.mean()), float(min(p_value, 1.0))
+
+
+def bootstrap_report(prediction_paths, ground_truth, subtask="NER", n_resamples=10000, seed=0, alpha=0.05):
+    """
+    Bootstrap CIs for one or two prediction files, plus a paired test when there are two.
+
+    Returns:
+        dict: Point estimates and CIs per run and metric, and the paired comparison.
+    """
+    ground_truth_index = index_ground_truth(ground_truth, [subtask])
+    matrices_list = align_matrices([
+        count_matrices(iter_predictions(path), ground_truth_index, subtask) for path in prediction_paths
+    ])
+    samples = bootstrap_scores(matrices_list, n_resamples, seed)
+
+    report = {"subtask": subtask, "n_resamples": n_resamples, "alpha": alpha, "runs": {}}
+    for path, matrices, run_samples in zip(prediction_paths, matrices_list, samples):
+        point = scores_from_counts(matrices["tp"].sum(0), matrices["fp"].sum(0), matrices["fn"].sum(0))
+        report["runs"][path] = {
+            metric: {"score": float(point[metric]), "ci": confidence_interval(run_samples[metric], alpha)}
+            for metric in METRICS
+        }
+
+    if len(prediction_paths) == 2:
+        report["paired_test"] = {}
+        for metric in METRICS:
+            mean_difference, p_value = paired_bootstrap_test(samples[0][metric], samples[1][metric])
+            report["paired_test"][metric] = {
+                "difference": mean_difference,
+                "ci": confidence_interval(samples[0][metric] - samples[1][metric], alpha),
+                "p_value": p_value,
+            }
+
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals for challenge scores.")
+    parser.add_argument("predictions", nargs="+", help="One prediction file, or two to compare.")
+    parser.add_argument("--ground-truth", default="dev.json")
+    parser.add_argument("--subtask", default="NER", choices=SUBTASKS)
+    parser.add_argument("--resamples", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--output", help="Optional path to save the report as JSON.")
+    args = parser.parse_args()
+
+    if len(args.predictions) > 2:
+        parser.error("Pass one prediction file, or two to compare.")
+
+    with open(args.ground_truth, 'r', encoding='utf-8') as file:
+        ground_truth = json.load(file)
+
+    report = bootstrap_report(args.predictions, ground_truth, args.subtask, args.resamples, args.seed, args.alpha)
+
+    print(f"\n=== {SUBTASK_TITLES[args.subtask]} bootstrap ({args.resamples} resamples, {100 * (1 - args.alpha):.0f}% CI) ===")
+    for path, run in report["runs"].items():
+        print(f"\n{path}")
+        for metric, values in run.items():
+            print(f"{metric}: {values['score']:.4f} [{values['ci'][0]:.4f}, {values['ci'][1]:.4f}]")
+
+    if "paired_test" in report:
+        print(f"\nPaired test ({args.predictions[0]} - {args.predictions[1]})")
+        for metric, values in report["paired_test"].items():
+            print(f"{metric}: {values['difference']:+.4f} [{values['ci'][0]:+.4f}, {values['ci'][1]:+.4f}] p={values['p_value']:.4f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4)
+        print(f"\n📁 Report saved to {args.output}")
@@ -1,5 +1,10 @@
 
+import argparse
+import csv
+import glob
+import itertools
 import json
+import os
 
 # DEFINE HERE THE PATH(S) TO YOUR PREDICTIONS
 PREDICTIONS_PATH_6_1 = 'org_T61_BaselineRun_NuNerZero.json'
@@ -14,11 +19,35 @@ eval_6_3_ternary_tag_RE = False
 eval_6_4_ternary_mention_RE = False
 
 GROUND_TRUTH_PATH = "dev.json"
-try:
-    with open(GROUND_TRUTH_PATH, 'r', encoding='utf-8') as file:
-        ground_truth = json.load(file)
-except OSError:
-    raise OSError(f'Error in opening the specified json file: {GROUND_TRUTH_PATH}')
+
+# The ground truth is loaded on first use (see `load_ground_truth`), not at import
+_ground_truth = None
+_ground_truth_index = None
+
+def load_ground_truth(path=None):
+    """Load (once) and return the ground truth from `path`, or GROUND_TRUTH_PATH by default."""
+    global _ground_truth, _ground_truth_index
+    if _ground_truth is None or path is not None:
+        path = path or GROUND_TRUTH_PATH
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                _ground_truth = json.load(file)
+        except OSError:
+            raise OSError(f'Error in opening the specified json file: {path}')
+        _ground_truth_index = None
+    return _ground_truth
+
+def set_ground_truth(ground_truth):
+    """Use an already loaded ground truth dict for the eval_submission_* functions."""
+    global _ground_truth, _ground_truth_index
+    _ground_truth = ground_truth
+    _ground_truth_index = None
+
+def __getattr__(name):
+    # Keep `challenge_eval.ground_truth` working now that loading is lazy
+    if name == "ground_truth":
+        return load_ground_truth()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 LEGAL_ENTITY_LABELS = [
     "anatomical location",
@@ -58,19 +87,484 @@ LEGAL_RELATION_LABELS = [
 
 
 
+def _deduplicate(items: list, key) -> tuple:
+    """Keep the first item for each key. Returns (kept items, number removed)."""
+    seen = set()
+    deduped = []
+    for item in items:
+        item_key = key(item)
+        if item_key not in seen:
+            seen.add(item_key)
+            deduped.append(item)
+    return deduped, len(items) - len(deduped)
+
+def _remove_overlapping_in_document(entities: list) -> list:
+    """Keep the longest entity of each chain of overlapping entities of one document."""
+    # Group entities by location
+    groups = {'title': [], 'abstract': []}
+    for ent in entities:
+        loc = ent["location"]
+        groups[loc].append(ent)
+
+    # For each location, build overlap clusters and select the longest
+    keepers = set()
+    for loc in groups:
+        group = groups[loc]
+        # sort by start_idx so we have overlapping entities contiguous
+        group = sorted(group, key=lambda e: e["start_idx"])
+
+        clusters = []
+        cluster = []
+        current_end = None
+
+        for ent in group:
+            if not cluster:
+                # start the first cluster
+                cluster = [ent]
+                current_end = ent["end_idx"]
+            else:
+                # check overlap: ent.start_idx < current_end
+                if ent["start_idx"] < current_end:
+                    cluster.append(ent)
+                    # extend cluster span if needed
+                    if ent["end_idx"] > current_end:
+                        current_end = ent["end_idx"]
+                else:
+                    clusters.append(cluster)
+                    cluster = [ent]
+                    current_end = ent["end_idx"]
+        if cluster:
+            clusters.append(cluster)
+
+        # pick the longest entity in each cluster
+        for clust in clusters:
+            # initialize with first entity
+            longest = clust[0]
+            max_len = longest["end_idx"] - longest["start_idx"]
+            # compare with the rest
+            for ent in clust[1:]:
+                length = ent["end_idx"] - ent["start_idx"]
+                if length > max_len:
+                    longest = ent
+                    max_len = length
+            # track by (start, end, loc)
+            keepers.add((longest["start_idx"],
+                         longest["end_idx"],
+                         longest["location"]))
+
+    # Rebuild the entity list in original order, keeping only the keepers
+    deduped = []
+    for ent in entities:
+        key = (ent["start_idx"], ent["end_idx"], ent["location"])
+        if key in keepers:
+            deduped.append(ent)
+            keepers.remove(key)  # avoid duplicates
+    return deduped
+
+
+
+# Prediction field, dedup key and display name of each subtask
+SUBTASKS = ["NER", "binary_tag_RE", "ternary_tag_RE", "ternary_mention_RE"]
+
+SUBTASK_FIELDS = {
+    "NER": "entities",
+    "binary_tag_RE": "binary_tag_based_relations",
+    "ternary_tag_RE": "ternary_tag_based_relations",
+    "ternary_mention_RE": "ternary_mention_based_relations",
+}
+
+SUBTASK_DEDUP_KEYS = {
+    "NER": lambda ent: (ent["start_idx"], ent["end_idx"], ent["location"]),
+    "binary_tag_RE": lambda rel: (rel["subject_label"], rel["object_label"]),
+    "ternary_tag_RE": lambda rel: (rel["subject_label"], rel["predicate"], rel["object_label"]),
+    "ternary_mention_RE": lambda rel: (rel['subject_text_span'], rel["subject_label"], rel["predicate"], rel['object_text_span'], rel["object_label"]),
+}
+
+SUBTASK_DUPLICATE_NAMES = {
+    "NER": "duplicated entities",
+    "binary_tag_RE": "duplicated binary tag-based relations",
+    "ternary_tag_RE": "duplicated ternary tag-based relations",
+    "ternary_mention_RE": "duplicated ternary mention-based relations",
+}
+
+SUBTASK_TITLES = {
+    "NER": "6_1_NER",
+    "binary_tag_RE": "6_2_binary_tag_RE",
+    "ternary_tag_RE": "6_3_ternary_tag_RE",
+    "ternary_mention_RE": "6_4_ternary_mention_RE",
+}
+
+def _read_item(subtask: str, pmid: str, item: dict, validate: bool = True) -> tuple:
+    """
+    Read one entity or relation of a subtask.
+
+    Returns (entry, label): `entry` is matched against the ground truth and
+    `label` is the key used for per-label counts.
+    """
+    if subtask == "NER":
+        try:
+            start_idx = int(item["start_idx"])
+            end_idx = int(item["end_idx"])
+            location = str(item["location"])
+            text_span = str(item["text_span"])
+            label = str(item["label"])
+        except KeyError:
+            raise KeyError(f'{pmid} - Not able to find one or more of the expected fields for entity: {item}')
+
+        if validate and label not in LEGAL_ENTITY_LABELS:
+            raise NameError(f'{pmid} - Illegal label {label} for entity: {item}')
+
+        return (start_idx, end_idx, location, text_span, label), label
+
+    try:
+        subject_label = str(item["subject_label"])
+        object_label = str(item["object_label"])
+        if subtask != "binary_tag_RE":
+            predicate = str(item["predicate"])
+        if subtask == "ternary_mention_RE":
+            subject_text_span = str(item["subject_text_span"])
+            object_text_span = str(item["object_text_span"])
+    except KeyError:
+        raise KeyError(f'{pmid} - Not able to find one or more of the expected fields for relation: {item}')
+
+    if validate:
+        if subject_label not in LEGAL_ENTITY_LABELS:
+            raise NameError(f'{pmid} - Illegal subject entity label {subject_label} for relation: {item}')
+
+        if object_label not in LEGAL_ENTITY_LABELS:
+            raise NameError(f'{pmid} - Illegal object entity label {object_label} for relation: {item}')
+
+        if subtask != "binary_tag_RE" and predicate not in LEGAL_RELATION_LABELS:
+            raise NameError(f'{pmid} - Illegal predicate {predicate} for relation: {item}')
+
+    if subtask == "binary_tag_RE":
+        label = (subject_label, object_label)
+        return label, label
+
+    label = (subject_label, predicate, object_label)
+    if subtask == "ternary_tag_RE":
+        return label, label
+
+    return (subject_text_span, subject_label, predicate, object_text_span, object_label), label
+
+def index_ground_truth(ground_truth, subtasks: list = SUBTASKS) -> dict:
+    """
+    Index the ground truth once: a hash set of gold entries per PMID and subtask,
+    plus the number of annotated items per label, overall and per PMID.
+
+    `ground_truth` is either a dict {pmid: article} or an iterable of
+    (pmid, article) pairs, e.g. from `iter_predictions`.
+    """
+    index = {
+        subtask: {"entries": {}, "annotated_per_label": {}, "annotated_per_document": {}}
+        for subtask in subtasks
+    }
+    articles = ground_truth.items() if isinstance(ground_truth, dict) else ground_truth
+
+    for pmid, article in articles:
+        for subtask in subtasks:
+            field = SUBTASK_FIELDS[subtask]
+            entries = index[subtask]["entries"]
+            annotated_per_label = index[subtask]["annotated_per_label"]
+            annotated_per_document = index[subtask]["annotated_per_document"]
+
+            gold = entries.setdefault(pmid, set())
+            document_counts = annotated_per_document.setdefault(pmid, {})
+            for item in article.get(field, []):
+                entry, label = _read_item(subtask, pmid, item, validate=False)
+                gold.add(entry)
+                annotated_per_label[label] = annotated_per_label.get(label, 0) + 1
+                document_counts[label] = document_counts.get(label, 0) + 1
+
+    return index
+
+def new_subtask_counts(ground_truth_index: dict, subtasks: list = SUBTASKS) -> dict:
+    """Create empty predicted / true positive counters for the given subtasks."""
+    counts = {}
+    for subtask in subtasks:
+        labels = list(ground_truth_index[subtask]["annotated_per_label"].keys())
+        counts[subtask] = {
+            "predicted": {label: 0 for label in labels},
+            "true_positives": {label: 0 for label in labels},
+            "removed_duplicates": 0,
+            "removed_overlapping": 0,
+        }
+    return counts
+
+def clean_items(subtask: str, items: list) -> tuple:
+    """
+    Remove duplicates, and overlapping entities for NER, from the items of one article.
+
+    Returns (kept items, number of duplicates removed, number of overlapping entities removed).
+    """
+    items, removed_duplicates = _deduplicate(items, SUBTASK_DEDUP_KEYS[subtask])
+    if subtask != "NER":
+        return items, removed_duplicates, 0
+
+    kept = _remove_overlapping_in_document(items)
+    return kept, removed_duplicates, len(items) - len(kept)
+
+def score_article(pmid: str, article: dict, ground_truth_index: dict, counts: dict) -> None:
+    """
+    Clean and score the predictions of one article for every subtask in `counts`.
+
+    Duplicates are removed for every subtask and overlapping entities for NER,
+    exactly like the remove_* helpers, then each item is checked against the
+    gold hash set of its PMID. Counters are updated in place.
+    """
+    for subtask, subtask_counts in counts.items():
+        field = SUBTASK_FIELDS[subtask]
+        try:
+            items = article[field]
+        except KeyError:
+            raise KeyError(f'{pmid} - Not able to find field \"{field}\" within article')
+
+        items, removed_duplicates, removed_overlapping = clean_items(subtask, items)
+        subtask_counts["removed_duplicates"] += removed_duplicates
+        subtask_counts["removed_overlapping"] += removed_overlapping
+
+        gold = ground_truth_index[subtask]["entries"].get(pmid, ())
+        predicted = subtask_counts["predicted"]
+        true_positives = subtask_counts["true_positives"]
+
+        for item in items:
+            entry, label = _read_item(subtask, pmid, item)
+
+            if label in predicted:
+                predicted[label] += 1
+
+            if entry in gold:
+                true_positives[label] += 1
+
+def compute_scores(subtask_counts: dict, annotated_per_label: dict) -> tuple:
+    """Return (macro P, macro R, macro F1, micro P, micro R, micro F1) from per-label counts."""
+    labels = list(annotated_per_label.keys())
+    count_annotated = sum(annotated_per_label[label] for label in labels)
+    count_predicted = sum(subtask_counts["predicted"][label] for label in labels)
+    count_true_positives = sum(subtask_counts["true_positives"][label] for label in labels)
+
+    micro_precision = count_true_positives / (count_predicted + 1e-10)
+    micro_recall = count_true_positives / (count_annotated + 1e-10)
+    micro_f1 = 2 * ((micro_precision * micro_recall) / (micro_precision + micro_recall + 1e-10))
+
+    precision, recall, f1 = 0, 0, 0
+    n = 0
+    for label in labels:
+        n += 1
+        current_precision = subtask_counts["true_positives"][label] / (subtask_counts["predicted"][label] + 1e-10)
+        current_recall = subtask_counts["true_positives"][label] / (annotated_per_label[label] + 1e-10)
+
+        precision += current_precision
+        recall += current_recall
+        f1 += 2 * ((current_precision * current_recall) / (current_precision + current_recall + 1e-10))
+
+    n = max(n, 1)
+    precision = precision / n
+    recall = recall / n
+    f1 = f1 / n
+
+    return precision, recall, f1, micro_precision, micro_recall, micro_f1
+
+def report_removed(counts: dict) -> None:
+    """Print how many duplicated / overlapping predictions were dropped per subtask."""
+    for subtask, subtask_counts in counts.items():
+        if subtask_counts["removed_duplicates"] > 0:
+            print(f"=== Removed {subtask_counts['removed_duplicates']} {SUBTASK_DUPLICATE_NAMES[subtask]} from predictions ===")
+        if subtask_counts["removed_overlapping"] > 0:
+            print(f"=== Removed {subtask_counts['removed_overlapping']} overlapping entities ===")
+
+def score_predictions(predictions, ground_truth_index: dict, subtasks: list = SUBTASKS, report: bool = True) -> dict:
+    """
+    Score every requested subtask in a single pass over the predictions.
+
+    `predictions` is either a dict {pmid: article} or an iterable of
+    (pmid, article) pairs, so it can be streamed with `iter_predictions`.
+
+    Returns a dict mapping each subtask to its
+    (macro P, macro R, macro F1, micro P, micro R, micro F1) tuple.
+    """
+    counts = new_subtask_counts(ground_truth_index, subtasks)
+    articles = predictions.items() if isinstance(predictions, dict) else predictions
+    for pmid, article in articles:
+        score_article(pmid, article, ground_truth_index, counts)
+
+    if report:
+        report_removed(counts)
+    return {
+        subtask: compute_scores(counts[subtask], ground_truth_index[subtask]["annotated_per_label"])
+        for subtask in subtasks
+    }
+
+def new_live_state(ground_truth_index: dict, subtasks: list = SUBTASKS) -> dict:
+    """Create the state used to score a run incrementally, one PMID at a time."""
+    return {
+        "ground_truth_index": ground_truth_index,
+        "counts": new_subtask_counts(ground_truth_index, subtasks),
+        "annotated": {subtask: {} for subtask in subtasks},
+        "pmids": set(),
+    }
+
+def update_live_scores(state: dict, pmid: str, article: dict) -> None:
+    """Add the predictions of one finished PMID to the running counters (each PMID counts once)."""
+    if pmid in state["pmids"]:
+        return
+    state["pmids"].add(pmid)
+    score_article(pmid, article, state["ground_truth_index"], state["counts"])
+    for subtask, annotated in state["annotated"].items():
+        for label, count in state["ground_truth_index"][subtask]["annotated_per_document"].get(pmid, {}).items():
+            annotated[label] = annotated.get(label, 0) + count
+
+def live_scores(state: dict) -> dict:
+    """
+    Scores over the PMIDs processed so far, with the same cleaning and matching
+    as a full scoring pass. Once every gold PMID has been processed they are
+    identical to `score_predictions` on the whole run.
+    """
+    results = {}
+    for subtask, subtask_counts in state["counts"].items():
+        annotated = state["annotated"][subtask]
+        # Same label order as the full index so the final sums match exactly
+        annotated_so_far = {
+            label: annotated[label]
+            for label in state["ground_truth_index"][subtask]["annotated_per_label"]
+            if label in annotated
+        }
+        results[subtask] = compute_scores(subtask_counts, annotated_so_far)
+    return results
+
+def get_ground_truth_index() -> dict:
+    """Index the module-level ground truth on first use and reuse it afterwards."""
+    global _ground_truth_index
+    if _ground_truth_index is None:
+        _ground_truth_index = index_ground_truth(load_ground_truth())
+    return _ground_truth_index
+
+def load_predictions(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except OSError:
+        raise OSError(f'Error in opening the specified json file: {path}')
+
+def _iter_json_object_items(file, chunk_size=1 << 20):
+    """
+    Incrementally parse a top-level JSON object and yield its (key, value) pairs.
+
+    Only the current chunk and the value being decoded are kept in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def skip_whitespace(pos):
+        while pos < len(buffer) and buffer[pos] in " \t\r\n":
+            pos += 1
+        return pos
+
+    def read_more():
+        nonlocal buffer, position, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    expecting = "{"
+    key = None
+    while True:
+        position = skip_whitespace(position)
+        if position >= len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of JSON predictions file")
+            read_more()
+            continue
+
+        char = buffer[position]
+        if expecting == "{":
+            if char != "{":
+                raise ValueError("Predictions file must contain a JSON object")
+            position += 1
+            expecting = "key"
+        elif expecting in ("key", "separator"):
+            if char == "}" and (expecting == "separator" or key is None):
+                return
+            if expecting == "separator":
+                if char != ",":
+                    raise ValueError(f"Expected ',' in JSON predictions file, found {char!r}")
+                position += 1
+                expecting = "key"
+                continue
+            try:
+                key, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                read_more()
+                continue
+            position = end
+            expecting = ":"
+        elif expecting == ":":
+            if char != ":":
+                raise ValueError(f"Expected ':' after key {key!r} in JSON predictions file")
+            position += 1
+            expecting = "value"
+        elif expecting == "value":
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                read_more()
+                continue
+            position = end
+            expecting = "separator"
+            yield key, value
+
+def iter_predictions(path, chunk_size=1 << 20):
+    """
+    Stream (pmid, article) pairs from a predictions file without loading it whole.
+
+    Supports `.jsonl` files, with one {"pmid": ..., <article fields>} or
+    {pmid: article} object per line, and regular JSON files holding one
+    {pmid: article} object, which are parsed incrementally.
+    """
+    try:
+        file = open(path, 'r', encoding='utf-8')
+    except OSError:
+        raise OSError(f'Error in opening the specified json file: {path}')
+
+    with file:
+        if path.endswith(".jsonl"):
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "pmid" in record:
+                    pmid = str(record.pop("pmid"))
+                    yield pmid, record
+                else:
+                    yield from record.items()
+        else:
+            yield from _iter_json_object_items(file, chunk_size)
+
+def evaluate_submission(path, subtasks=SUBTASKS, ground_truth_index=None):
+    """
+    Stream one prediction file and score the given subtasks in one pass.
+
+    Memory depends on the largest article, not on the size of the file.
+    """
+    if ground_truth_index is None:
+        ground_truth_index = get_ground_truth_index()
+    return score_predictions(iter_predictions(path), ground_truth_index, subtasks)
+
+
+
 def remove_duplicated_entities(predictions: dict) -> None:
     removed_count = 0
     for pmid in list(predictions.keys()):
-        seen = set()
-        deduped = []
-        for ent in predictions[pmid]["entities"]:
-            key = (ent["start_idx"], ent["end_idx"], ent["location"])
-            if key not in seen:
-                seen.add(key)
-                deduped.append(ent)
-            else:
-                removed_count += 1
-        predictions[pmid]["entities"] = deduped
+        predictions[pmid]["entities"], removed = _deduplicate(predictions[pmid]["entities"], SUBTASK_DEDUP_KEYS["NER"])
+        removed_count += removed
     
     if removed_count > 0:
         print(f"=== Removed {removed_count} duplicated entities from predictions ===")
@@ -84,67 +578,7 @@ def remove_overlapping_entities(predictions: dict) -> None:
     # Iterate over PMIDs
     for pmid in list(predictions.keys()):
         original_len = len(predictions[pmid]['entities'])
-        
-        # Group entities by location
-        groups = {'title': [], 'abstract': []}
-        for ent in predictions[pmid]['entities']:
-            loc = ent["location"]
-            groups[loc].append(ent)
-
-        # For each location, build overlap clusters and select the longest
-        keepers = set()
-        for loc in groups:
-            group = groups[loc]
-            # sort by start_idx so we have overlapping entities contiguous
-            group = sorted(group, key=lambda e: e["start_idx"])
-
-            clusters = []
-            cluster = []
-            current_end = None
-
-            for ent in group:
-                if not cluster:
-                    # start the first cluster
-                    cluster = [ent]
-                    current_end = ent["end_idx"]
-                else:
-                    # check overlap: ent.start_idx < current_end
-                    if ent["start_idx"] < current_end:
-                        cluster.append(ent)
-                        # extend cluster span if needed
-                        if ent["end_idx"] > current_end:
-                            current_end = ent["end_idx"]
-                    else:
-                        clusters.append(cluster)
-                        cluster = [ent]
-                        current_end = ent["end_idx"]
-            if cluster:
-                clusters.append(cluster)
-
-            # pick the longest entity in each cluster
-            for clust in clusters:
-                # initialize with first entity
-                longest = clust[0]
-                max_len = longest["end_idx"] - longest["start_idx"]
-                # compare with the rest
-                for ent in clust[1:]:
-                    length = ent["end_idx"] - ent["start_idx"]
-                    if length > max_len:
-                        longest = ent
-                        max_len = length
-                # track by (start, end, loc)
-                keepers.add((longest["start_idx"],
-                             longest["end_idx"],
-                             longest["location"]))
-
-        # Rebuild the entity list in original order, keeping only the keepers
-        deduped = []
-        for ent in predictions[pmid]['entities']:
-            key = (ent["start_idx"], ent["end_idx"], ent["location"])
-            if key in keepers:
-                deduped.append(ent)
-                keepers.remove(key)  # avoid duplicates
-
+        deduped = _remove_overlapping_in_document(predictions[pmid]['entities'])
         predictions[pmid]["entities"] = deduped
 
         # count how many overlapping entities have been removed for this document
@@ -157,105 +591,17 @@ def remove_overlapping_entities(predictions: dict) -> None:
         pass
 
 def eval_submission_6_1_NER(path):
-    try:
-        with open(path, 'r', encoding='utf-8') as file:
-            predictions = json.load(file)
-    except OSError:
-        raise OSError(f'Error in opening the specified json file: {path}')
-
-    # Remove duplicated and overlapping entities
-    remove_duplicated_entities(predictions)
-    remove_overlapping_entities(predictions)
-    
-    ground_truth_NER = dict()
-    count_annotated_entities_per_label = {}
-    
-    for pmid, article in ground_truth.items():
-        if pmid not in ground_truth_NER:
-            ground_truth_NER[pmid] = []
-        for entity in article['entities']:
-            start_idx = int(entity["start_idx"])
-            end_idx = int(entity["end_idx"])
-            location = str(entity["location"])
-            text_span = str(entity["text_span"])
-            label = str(entity["label"]) 
-            
-            entry = (start_idx, end_idx, location, text_span, label)
-            ground_truth_NER[pmid].append(entry)
-            
-            if label not in count_annotated_entities_per_label:
-                count_annotated_entities_per_label[label] = 0
-            count_annotated_entities_per_label[label] += 1
-
-    count_predicted_entities_per_label = {label: 0 for label in list(count_annotated_entities_per_label.keys())}
-    count_true_positives_per_label = {label: 0 for label in list(count_annotated_entities_per_label.keys())}
-
-    for pmid in predictions.keys():
-        try:
-            entities = predictions[pmid]['entities']
-        except KeyError:
-            raise KeyError(f'{pmid} - Not able to find field \"entities\" within article')
-        
-        for entity in entities:
-            try:
-                start_idx = int(entity["start_idx"])
-                end_idx = int(entity["end_idx"])
-                location = str(entity["location"])
-                text_span = str(entity["text_span"])
-                label = str(entity["label"]) 
-            except KeyError:
-                raise KeyError(f'{pmid} - Not able to find one or more of the expected fields for entity: {entity}')
-            
-            if label not in LEGAL_ENTITY_LABELS:
-                raise NameError(f'{pmid} - Illegal label {label} for entity: {entity}')
-
-            if label in count_predicted_entities_per_label:
-                count_predicted_entities_per_label[label] += 1
-
-            entry = (start_idx, end_idx, location, text_span, label)
-            if entry in ground_truth_NER[pmid]:
-                count_true_positives_per_label[label] += 1
-
-    count_annotated_entities = sum(count_annotated_entities_per_label[label] for label in list(count_annotated_entities_per_label.keys()))
-    count_predicted_entities = sum(count_predicted_entities_per_label[label] for label in list(count_annotated_entities_per_label.keys()))
-    count_true_positives = sum(count_true_positives_per_label[label] for label in list(count_annotated_entities_per_label.keys()))
-
-    micro_precision = count_true_positives / (count_predicted_entities + 1e-10)
-    micro_recall = count_true_positives / (count_annotated_entities + 1e-10)
-    micro_f1 = 2 * ((micro_precision * micro_recall) / (micro_precision + micro_recall + 1e-10))
-
-    precision, recall, f1 = 0, 0, 0
-    n = 0
-    for label in list(count_annotated_entities_per_label.keys()):
-        n += 1
-        current_precision = count_true_positives_per_label[label] / (count_predicted_entities_per_label[label] + 1e-10) 
-        current_recall = count_true_positives_per_label[label] / (count_annotated_entities_per_label[label] + 1e-10) 
-        
-        precision += current_precision
-        recall += current_recall
-        f1 += 2 * ((current_precision * current_recall) / (current_precision + current_recall + 1e-10))
-    
-    precision = precision / n
-    recall = recall / n
-    f1 = f1 / n
-
-    return precision, recall, f1, micro_precision, micro_recall, micro_f1
+    return evaluate_submission(path, ["NER"])["NER"]
 
 
 
 def remove_duplicated_binary_tag_relations(predictions: dict) -> None:
     removed_count = 0
     for pmid in list(predictions.keys()):
-        seen = set()
-        deduped = []
-        for rel in predictions[pmid]["binary_tag_based_relations"]:
-            key = (rel["subject_label"], rel["object_label"])
-            if key not in seen:
-                seen.add(key)
-                deduped.append(rel)
-            else:
-                removed_count += 1
-        predictions[pmid]["binary_tag_based_relations"] = deduped
+        predictions[pmid]["binary_tag_based_relations"], removed = _deduplicate(
+            predictions[pmid]["binary_tag_based_relations"], SUBTASK_DEDUP_KEYS["binary_tag_RE"]
+        )
+        removed_count += removed
     
     if removed_count > 0:
         print(f"=== Removed {removed_count} duplicated binary tag-based relations from predictions ===")
@@ -264,101 +610,17 @@ def remove_duplicated_binary_tag_relations(predictions: dict) -> None:
         pass
 
 def eval_submission_6_2_binary_tag_RE(path):
-    try:
-        with open(path, 'r', encoding='utf-8') as file:
-            predictions = json.load(file)
-    except OSError:
-        raise OSError(f'Error in opening the specified json file: {path}')
-
-    # Remove duplicated binary tag-based relations
-    remove_duplicated_binary_tag_relations(predictions)
-
-    ground_truth_binary_tag_RE = dict()
-    count_annotated_relations_per_label = {}
-
-    for pmid, article in ground_truth.items():
-        if pmid not in ground_truth_binary_tag_RE:
-            ground_truth_binary_tag_RE[pmid] = []
-        for relation in article['binary_tag_based_relations']:
-            subject_label = str(relation["subject_label"])
-            object_label = str(relation["object_label"]) 
-
-            label = (subject_label, object_label)
-            ground_truth_binary_tag_RE[pmid].append(label)
-
-            if label not in count_annotated_relations_per_label:
-                count_annotated_relations_per_label[label] = 0
-            count_annotated_relations_per_label[label] += 1
-    
-    count_predicted_relations_per_label = {label: 0 for label in list(count_annotated_relations_per_label.keys())}
-    count_true_positives_per_label = {label: 0 for label in list(count_annotated_relations_per_label.keys())}
-
-    for pmid in predictions.keys():
-        try:
-            relations = predictions[pmid]['binary_tag_based_relations']
-        except KeyError:
-            raise KeyError(f'{pmid} - Not able to find field \"binary_tag_based_relations\" within article')
-        
-        for relation in relations:
-            try:
-                subject_label = str(relation["subject_label"])
-                object_label = str(relation["object_label"]) 
-            except KeyError:
-                raise KeyError(f'{pmid} - Not able to find one or more of the expected fields for relation: {relation}')
-            
-            if subject_label not in LEGAL_ENTITY_LABELS:
-                raise NameError(f'{pmid} - Illegal subject entity label {subject_label} for relation: {relation}')
-            
-            if object_label not in LEGAL_ENTITY_LABELS:
-                raise NameError(f'{pmid} - Illegal object entity label {object_label} for relation: {relation}')
-
-            label = (subject_label, object_label)
-            if label in count_predicted_relations_per_label:
-                count_predicted_relations_per_label[label] += 1
-
-            if label in ground_truth_binary_tag_RE[pmid]:
-                count_true_positives_per_label[label] += 1
-
-    count_annotated_relations = sum(count_annotated_relations_per_label[label] for label in list(count_annotated_relations_per_label.keys()))
-    count_predicted_relations = sum(count_predicted_relations_per_label[label] for label in list(count_annotated_relations_per_label.keys()))
-    count_true_positives = sum(count_true_positives_per_label[label] for label in list(count_annotated_relations_per_label.keys()))
-
-    micro_precision = count_true_positives / (count_predicted_relations + 1e-10)
-    micro_recall = count_true_positives / (count_annotated_relations + 1e-10)
-    micro_f1 = 2 * ((micro_precision * micro_recall) / (micro_precision + micro_recall + 1e-10))
-
-    precision, recall, f1 = 0, 0, 0
-    n = 0
-    for label in list(count_annotated_relations_per_label.keys()):
-        n += 1
-        current_precision = count_true_positives_per_label[label] / (count_predicted_relations_per_label[label] + 1e-10) 
-        current_recall = count_true_positives_per_label[label] / (count_annotated_relations_per_label[label] + 1e-10) 
-        
-        precision += current_precision
-        recall += current_recall
-        f1 += 2 * ((current_precision * current_recall) / (current_precision + current_recall + 1e-10))
-    
-    precision = precision / n
-    recall = recall / n
-    f1 = f1 / n
-
-    return precision, recall, f1, micro_precision, micro_recall, micro_f1
+    return evaluate_submission(path, ["binary_tag_RE"])["binary_tag_RE"]
 
 
 
 def remove_duplicated_ternary_tag_relations(predictions: dict) -> None:
     removed_count = 0
     for pmid in list(predictions.keys()):
-        seen = set()
-        deduped = []
-        for rel in predictions[pmid]["ternary_tag_based_relations"]:
-            key = (rel["subject_label"], rel["predicate"], rel["object_label"])
-            if key not in seen:
-                seen.add(key)
-                deduped.append(rel)
-            else:
-                removed_count += 1
-        predictions[pmid]["ternary_tag_based_relations"] = deduped
+        predictions[pmid]["ternary_tag_based_relations"], removed = _deduplicate(
+            predictions[pmid]["ternary_tag_based_relations"], SUBTASK_DEDUP_KEYS["ternary_tag_RE"]
+        )
+        removed_count += removed
     
     if removed_count > 0:
         print(f"=== Removed {removed_count} duplicated ternary tag-based relations from predictions ===")
@@ -367,106 +629,17 @@ def remove_duplicated_ternary_tag_relations(predictions: dict) -> None:
         pass
 
 def eval_submission_6_3_ternary_tag_RE(path):
-    try:
-        with open(path, 'r', encoding='utf-8') as file:
-            predictions = json.load(file)
-    except OSError:
-        raise OSError(f'Error in opening the specified json file: {path}')
-
-    # Remove duplicated ternary tag-based relations
-    remove_duplicated_ternary_tag_relations(predictions)
-    
-    ground_truth_ternary_tag_RE = dict()
-    count_annotated_relations_per_label = {}
-
-    for pmid, article in ground_truth.items():
-        if pmid not in ground_truth_ternary_tag_RE:
-            ground_truth_ternary_tag_RE[pmid] = []
-        for relation in article['ternary_tag_based_relations']:
-            subject_label = str(relation["subject_label"])
-            predicate = str(relation["predicate"])
-            object_label = str(relation["object_label"]) 
-            
-            label = (subject_label, predicate, object_label)
-            ground_truth_ternary_tag_RE[pmid].append(label)
-
-            if label not in count_annotated_relations_per_label:
-                count_annotated_relations_per_label[label] = 0
-            count_annotated_relations_per_label[label] += 1
-
-    count_predicted_relations_per_label = {label: 0 for label in list(count_annotated_relations_per_label.keys())}
-    count_true_positives_per_label = {label: 0 for label in list(count_annotated_relations_per_label.keys())}
-
-    for pmid in predictions.keys():
-        try:
-            relations = predictions[pmid]['ternary_tag_based_relations']
-        except KeyError:
-            raise KeyError(f'{pmid} - Not able to find field \"ternary_tag_based_relations\" within article')
-        
-        for relation in relations:            
-            try:
-                subject_label = str(relation["subject_label"])
-                predicate = str(relation["predicate"])
-                object_label = str(relation["object_label"]) 
-            except KeyError:
-                raise KeyError(f'{pmid} - Not able to find one or more of the expected fields for relation: {relation}')
-            
-            if subject_label not in LEGAL_ENTITY_LABELS:
-                raise NameError(f'{pmid} - Illegal subject entity label {subject_label} for relation: {relation}')
-            
-            if object_label not in LEGAL_ENTITY_LABELS:
-                raise NameError(f'{pmid} - Illegal object entity label {object_label} for relation: {relation}')
-            
-            if predicate not in LEGAL_RELATION_LABELS:
-                raise NameError(f'{pmid} - Illegal predicate {predicate} for relation: {relation}')
-
-            label = (subject_label, predicate, object_label)
-            if label in count_predicted_relations_per_label:
-                count_predicted_relations_per_label[label] += 1
-
-            if label in ground_truth_ternary_tag_RE[pmid]:
-                count_true_positives_per_label[label] += 1
-
-    count_annotated_relations = sum(count_annotated_relations_per_label[label] for label in list(count_annotated_relations_per_label.keys()))
-    count_predicted_relations = sum(count_predicted_relations_per_label[label] for label in list(count_annotated_relations_per_label.keys()))
-    count_true_positives = sum(count_true_positives_per_label[label] for label in list(count_annotated_relations_per_label.keys()))
-
-    micro_precision = count_true_positives / (count_predicted_relations + 1e-10)
-    micro_recall = count_true_positives / (count_annotated_relations + 1e-10)
-    micro_f1 = 2 * ((micro_precision * micro_recall) / (micro_precision + micro_recall + 1e-10))
-
-    precision, recall, f1 = 0, 0, 0
-    n = 0
-    for label in list(count_annotated_relations_per_label.keys()):
-        n += 1
-        current_precision = count_true_positives_per_label[label] / (count_predicted_relations_per_label[label] + 1e-10) 
-        current_recall = count_true_positives_per_label[label] / (count_annotated_relations_per_label[label] + 1e-10) 
-        
-        precision += current_precision
-        recall += current_recall
-        f1 += 2 * ((current_precision * current_recall) / (current_precision + current_recall + 1e-10))
-    
-    precision = precision / n
-    recall = recall / n
-    f1 = f1 / n
-
-    return precision, recall, f1, micro_precision, micro_recall, micro_f1
+    return evaluate_submission(path, ["ternary_tag_RE"])["ternary_tag_RE"]
 
 
 
 def remove_duplicated_ternary_mention_relations(predictions: dict) -> None:
     removed_count = 0
     for pmid in list(predictions.keys()):
-        seen = set()
-        deduped = []
-        for rel in predictions[pmid]["ternary_mention_based_relations"]:
-            key = (rel['subject_text_span'], rel["subject_label"], rel["predicate"], rel['object_text_span'], rel["object_label"])
-            if key not in seen:
-                seen.add(key)
-                deduped.append(rel)
-            else:
-                removed_count += 1
-        predictions[pmid]["ternary_mention_based_relations"] = deduped
+        predictions[pmid]["ternary_mention_based_relations"], removed = _deduplicate(
+            predictions[pmid]["ternary_mention_based_relations"], SUBTASK_DEDUP_KEYS["ternary_mention_RE"]
+        )
+        removed_count += removed
     
     if removed_count > 0:
         print(f"=== Removed {removed_count} duplicated ternary mention-based relations from predictions ===")
@@ -475,138 +648,152 @@ def remove_duplicated_ternary_mention_relations(predictions: dict) -> None:
         pass
 
 def eval_submission_6_4_ternary_mention_RE(path):
-    try:
-        with open(path, 'r', encoding='utf-8') as file:
-            predictions = json.load(file)
-    except OSError:
-        raise OSError(f'Error in opening the specified json file: {path}')
+    return evaluate_submission(path, ["ternary_mention_RE"])["ternary_mention_RE"]
 
-    # Remove duplicated ternary mention-based relations
-    remove_duplicated_ternary_mention_relations(predictions)
-    
-    ground_truth_ternary_mention_RE = dict()
-    count_annotated_relations_per_label = {}
-
-    for pmid, article in ground_truth.items():
-        if pmid not in ground_truth_ternary_mention_RE:
-            ground_truth_ternary_mention_RE[pmid] = []
-        for relation in article['ternary_mention_based_relations']:
-            subject_text_span = str(relation["subject_text_span"])
-            subject_label = str(relation["subject_label"])
-            predicate = str(relation["predicate"])
-            object_text_span = str(relation["object_text_span"])
-            object_label = str(relation["object_label"]) 
-
-            entry = (subject_text_span, subject_label, predicate, object_text_span, object_label)
-            ground_truth_ternary_mention_RE[pmid].append(entry)
-
-            label = (subject_label, predicate, object_label)
-            if label not in count_annotated_relations_per_label:
-                count_annotated_relations_per_label[label] = 0
-            count_annotated_relations_per_label[label] += 1
-
-    count_predicted_relations_per_label = {label: 0 for label in list(count_annotated_relations_per_label.keys())}
-    count_true_positives_per_label = {label: 0 for label in list(count_annotated_relations_per_label.keys())}
-    
-    for pmid in predictions.keys():
-        try:
-            relations = predictions[pmid]['ternary_mention_based_relations']
-        except KeyError:
-            raise KeyError(f'{pmid} - Not able to find field \"ternary_mention_based_relations\" within article')
-        
-        for relation in relations:
-            try:
-                subject_text_span = str(relation["subject_text_span"])
-                subject_label = str(relation["subject_label"])
-                predicate = str(relation["predicate"])
-                object_text_span = str(relation["object_text_span"])
-                object_label = str(relation["object_label"]) 
-            except KeyError:
-                raise KeyError(f'{pmid} - Not able to find one or more of the expected fields for relation: {relation}')
-            
-            if subject_label not in LEGAL_ENTITY_LABELS:
-                raise NameError(f'{pmid} - Illegal subject entity label {subject_label} for relation: {relation}')
-            
-            if object_label not in LEGAL_ENTITY_LABELS:
-                raise NameError(f'{pmid} - Illegal object entity label {object_label} for relation: {relation}')
-            
-            if predicate not in LEGAL_RELATION_LABELS:
-                raise NameError(f'{pmid} - Illegal predicate {predicate} for relation: {relation}')
-                        
-            entry = (subject_text_span, subject_label, predicate, object_text_span, object_label)
-            label = (subject_label, predicate, object_label) 
-            
-            if label in count_predicted_relations_per_label:
-                count_predicted_relations_per_label[label] += 1
-            
-            if entry in ground_truth_ternary_mention_RE[pmid]:
-                count_true_positives_per_label[label] += 1
-    
-    count_annotated_relations = sum(count_annotated_relations_per_label[label] for label in list(count_annotated_relations_per_label.keys()))
-    count_predicted_relations = sum(count_predicted_relations_per_label[label] for label in list(count_annotated_relations_per_label.keys()))
-    count_true_positives = sum(count_true_positives_per_label[label] for label in list(count_annotated_relations_per_label.keys()))
 
-    micro_precision = count_true_positives / (count_predicted_relations + 1e-10)
-    micro_recall = count_true_positives / (count_annotated_relations + 1e-10)
-    micro_f1 = 2 * ((micro_precision * micro_recall) / (micro_precision + micro_recall + 1e-10))
+def print_scores(subtask, scores, round_to_decimal_position=4):
+    precision, recall, f1, micro_precision, micro_recall, micro_f1 = scores
+    print(f"\n\n=== {SUBTASK_TITLES[subtask]} ===")
+    print(f"Macro-precision: {round(precision, round_to_decimal_position)}")
+    print(f"Macro-recall: {round(recall, round_to_decimal_position)}")
+    print(f"Macro-F1: {round(f1, round_to_decimal_position)}")
+    print(f"Micro-precision: {round(micro_precision, round_to_decimal_position)}")
+    print(f"Micro-recall: {round(micro_recall, round_to_decimal_position)}")
+    print(f"Micro-F1: {round(micro_f1, round_to_decimal_position)}")
 
-    precision, recall, f1 = 0, 0, 0
-    n = 0
-    for label in list(count_annotated_relations_per_label.keys()):
-        n += 1
-        current_precision = count_true_positives_per_label[label] / (count_predicted_relations_per_label[label] + 1e-10) 
-        current_recall = count_true_positives_per_label[label] / (count_annotated_relations_per_label[label] + 1e-10) 
-        
-        precision += current_precision
-        recall += current_recall
-        f1 += 2 * ((current_precision * current_recall) / (current_precision + current_recall + 1e-10))
-    
-    precision = precision / n
-    recall = recall / n
-    f1 = f1 / n
 
-    return precision, recall, f1, micro_precision, micro_recall, micro_f1
+SCORE_COLUMNS = ["macro_precision", "macro_recall", "macro_f1", "micro_precision", "micro_recall", "micro_f1"]
+
+_worker_ground_truth_index = None
+
+def _init_worker(ground_truth_index):
+    global _worker_ground_truth_index
+    _worker_ground_truth_index = ground_truth_index
+
+def _score_run(path, subtasks=None):
+    """
+    Score one prediction file against the ground truth index shared with this worker.
+
+    When `subtasks` is None, the subtasks are the ones whose field appears in
+    the first article of the file.
+    """
+    try:
+        articles = iter_predictions(path)
+        if subtasks is None:
+            first = next(articles, None)
+            if first is None:
+                return path, {}, None
+            subtasks = [subtask for subtask in SUBTASKS if SUBTASK_FIELDS[subtask] in first[1]]
+            articles = itertools.chain([first], articles)
+        subtasks = [subtask for subtask in subtasks if subtask in _worker_ground_truth_index]
+        return path, score_predictions(articles, _worker_ground_truth_index, subtasks, report=False), None
+    except Exception as e:
+        return path, {}, f"{type(e).__name__}: {e}"
+
+def evaluate_runs(prediction_paths, ground_truth_path=GROUND_TRUTH_PATH, subtasks=None, workers=None):
+    """
+    Score many prediction files against one ground truth, in parallel across processes.
+
+    The ground truth is parsed and indexed once, then shared with every worker.
+
+    Returns a list of rows {"run", "subtask", <score columns>, "error"}, one per
+    run and subtask (or one error row per failed run).
+    """
+    ground_truth_index = index_ground_truth(iter_predictions(ground_truth_path))
+    workers = workers or min(len(prediction_paths), os.cpu_count() or 1)
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(ground_truth_index,)) as pool:
+            results = list(pool.map(_score_run, prediction_paths, itertools.repeat(subtasks)))
+    else:
+        _init_worker(ground_truth_index)
+        results = [_score_run(path, subtasks) for path in prediction_paths]
+
+    rows = []
+    for path, scores, error in results:
+        if error:
+            rows.append({"run": path, "subtask": None, **{column: None for column in SCORE_COLUMNS}, "error": error})
+            continue
+        for subtask in SUBTASKS:
+            if subtask in scores:
+                rows.append({"run": path, "subtask": subtask, **dict(zip(SCORE_COLUMNS, scores[subtask])), "error": None})
+    return rows
+
+def expand_prediction_paths(patterns):
+    """Expand globs, keeping the given order and dropping duplicates."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"⚠️ No prediction file matches '{pattern}'")
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+def save_comparison_table(rows, json_path=None, csv_path=None):
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as file:
+            json.dump(rows, file, indent=4)
+        print(f"📁 Comparison table saved to {json_path}")
+    if csv_path:
+        with open(csv_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=["run", "subtask", *SCORE_COLUMNS, "error"])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"📁 Comparison table saved to {csv_path}")
+
+def print_comparison_table(rows, round_to_decimal_position=4):
+    width = max([len("run")] + [len(row["run"]) for row in rows])
+    print(f"{'run':<{width}}  {'subtask':<18}  " + "  ".join(f"{column:>15}" for column in SCORE_COLUMNS))
+    for row in rows:
+        if row["error"]:
+            print(f"{row['run']:<{width}}  ❌ {row['error']}")
+            continue
+        values = "  ".join(f"{round(row[column], round_to_decimal_position):>15}" for column in SCORE_COLUMNS)
+        print(f"{row['run']:<{width}}  {row['subtask']:<18}  {values}")
 
 
 if __name__ == '__main__':
     round_to_decimal_position = 4
 
-    if eval_6_1_NER:
-        precision, recall, f1, micro_precision, micro_recall, micro_f1 = eval_submission_6_1_NER(PREDICTIONS_PATH_6_1)
-        print("\n\n=== 6_1_NER ===")
-        print(f"Macro-precision: {round(precision, round_to_decimal_position)}")
-        print(f"Macro-recall: {round(recall, round_to_decimal_position)}")
-        print(f"Macro-F1: {round(f1, round_to_decimal_position)}")
-        print(f"Micro-precision: {round(micro_precision, round_to_decimal_position)}")
-        print(f"Micro-recall: {round(micro_recall, round_to_decimal_position)}")
-        print(f"Micro-F1: {round(micro_f1, round_to_decimal_position)}")
-
-    if eval_6_2_binary_tag_RE:
-        precision, recall, f1, micro_precision, micro_recall, micro_f1 = eval_submission_6_2_binary_tag_RE(PREDICTIONS_PATH_6_2)
-        print("\n\n=== 6_2_binary_tag_RE ===")
-        print(f"Macro-precision: {round(precision, round_to_decimal_position)}")
-        print(f"Macro-recall: {round(recall, round_to_decimal_position)}")
-        print(f"Macro-F1: {round(f1, round_to_decimal_position)}")
-        print(f"Micro-precision: {round(micro_precision, round_to_decimal_position)}")
-        print(f"Micro-recall: {round(micro_recall, round_to_decimal_position)}")
-        print(f"Micro-F1: {round(micro_f1, round_to_decimal_position)}")
-
-    if eval_6_3_ternary_tag_RE:
-        precision, recall, f1, micro_precision, micro_recall, micro_f1 = eval_submission_6_3_ternary_tag_RE(PREDICTIONS_PATH_6_3)
-        print("\n\n=== 6_3_ternary_tag_RE ===")
-        print(f"Macro-precision: {round(precision, round_to_decimal_position)}")
-        print(f"Macro-recall: {round(recall, round_to_decimal_position)}")
-        print(f"Macro-F1: {round(f1, round_to_decimal_position)}")
-        print(f"Micro-precision: {round(micro_precision, round_to_decimal_position)}")
-        print(f"Micro-recall: {round(micro_recall, round_to_decimal_position)}")
-        print(f"Micro-F1: {round(micro_f1, round_to_decimal_position)}")
-
-    if eval_6_4_ternary_mention_RE:
-        precision, recall, f1, micro_precision, micro_recall, micro_f1 = eval_submission_6_4_ternary_mention_RE(PREDICTIONS_PATH_6_4)
-        print("\n\n=== 6_4_ternary_mention_RE ===")
-        print(f"Macro-precision: {round(precision, round_to_decimal_position)}")
-        print(f"Macro-recall: {round(recall, round_to_decimal_position)}")
-        print(f"Macro-F1: {round(f1, round_to_decimal_position)}")
-        print(f"Micro-precision: {round(micro_precision, round_to_decimal_position)}")
-        print(f"Micro-recall: {round(micro_recall, round_to_decimal_position)}")
-        print(f"Micro-F1: {round(micro_f1, round_to_decimal_position)}")
+    parser = argparse.ArgumentParser(
+        description="Score one or more prediction files. Without arguments, the PREDICTIONS_PATH_* "
+                    "and eval_* settings at the top of this file are used."
+    )
+    parser.add_argument("predictions", nargs="*", help="Prediction files or glob patterns.")
+    parser.add_argument("--ground-truth", default=GROUND_TRUTH_PATH)
+    parser.add_argument("--subtasks", nargs="+", choices=SUBTASKS,
+                        help="Subtasks to score (default: those present in each file).")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: one per CPU).")
+    parser.add_argument("--output-json", help="Save the comparison table as JSON.")
+    parser.add_argument("--output-csv", help="Save the comparison table as CSV.")
+    args = parser.parse_args()
+
+    if args.predictions:
+        prediction_paths = expand_prediction_paths(args.predictions)
+        rows = evaluate_runs(prediction_paths, args.ground_truth, args.subtasks, args.workers)
+        print_comparison_table(rows, round_to_decimal_position)
+        save_comparison_table(rows, args.output_json, args.output_csv)
+    else:
+        GROUND_TRUTH_PATH = args.ground_truth
+        requested = [
+            ("NER", PREDICTIONS_PATH_6_1, eval_6_1_NER),
+            ("binary_tag_RE", PREDICTIONS_PATH_6_2, eval_6_2_binary_tag_RE),
+            ("ternary_tag_RE", PREDICTIONS_PATH_6_3, eval_6_3_ternary_tag_RE),
+            ("ternary_mention_RE", PREDICTIONS_PATH_6_4, eval_6_4_ternary_mention_RE),
+        ]
+
+        # Score all subtasks that share a prediction file in one pass over it
+        subtasks_per_path = {}
+        for subtask, path, enabled in requested:
+            if enabled:
+                subtasks_per_path.setdefault(path, []).append(subtask)
+
+        results = {}
+        for path, subtasks in subtasks_per_path.items():
+            results.update(evaluate_submission(path, subtasks))
+
+        for subtask in SUBTASKS:
+            if subtask in results:
+                print_scores(subtask, results[subtask], round_to_decimal_position)
@@ -1,9 +1,23 @@
+import argparse
 import json
 import os
-
-gold_path = "gold_s2.json"
-run_prefix = "evaluation/run_"
-output_path = "evaluation/per_object_evaluation.json"
+import sqlite3
+
+parser = argparse.ArgumentParser(description="Per-object evaluation of notebook runs against gold_s2.json.")
+parser.add_argument("--gold", default="gold_s2.json")
+parser.add_argument("--run-prefix", default="evaluation/run_")
+parser.add_argument("--output", default="evaluation/per_object_evaluation.json")
+parser.add_argument("--db", default="evaluation/evaluation.sqlite",
+                    help="SQLite store of every outcome row; pass '' to skip it.")
+parser.add_argument("--run-name", default=None,
+                    help="Name of this run in the SQLite store (defaults to the run prefix).")
+args = parser.parse_args()
+
+gold_path = args.gold
+run_prefix = args.run_prefix
+output_path = args.output
+db_path = args.db
+run_name = args.run_name or run_prefix
 
 # 📂 Load gold data
 with open(gold_path) as f:
@@ -14,7 +28,8 @@ all_tp_ent, all_fp_ent, all_fn_ent = set(), set(), set()
 all_tp_rel, all_fp_rel, all_fn_rel = set(), set(), set()
 
 # 🧬 Entity extractors
-def extract_gold_entities(gold_entry):
+# The optional `classes` dict receives the class of each item (first seen wins)
+def extract_gold_entities(gold_entry, classes=None):
     gold_entities = set()
     for group in gold_entry.get("entities", []):
         for ent_type, items in group.items():
@@ -22,35 +37,42 @@ def extract_gold_entities(gold_entry):
                 label = entity.get("label", "").strip().lower()
                 if label:
                     gold_entities.add(label)
+                    if classes is not None:
+                        classes.setdefault(label, ent_type)
     return gold_entities
 
-def extract_predicted_entities(run_data):
+def extract_predicted_entities(run_data, classes=None):
     pred_entities = set()
     for ent_type, ent_section in run_data.items():
         if isinstance(ent_section, dict):
-            labels = ent_section.get("schemaResponse", {}).get("label", [])
-            pred_entities.update([label.lower().strip() for label in labels])
+            labels = [label.lower().strip() for label in ent_section.get("schemaResponse", {}).get("label", [])]
             attr_key = [k for k in ent_section.keys() if k.endswith("Attributes")]
             if attr_key:
                 for item in ent_section.get(attr_key[0], []):
                     label = item.get("label", "").lower().strip()
                     if label:
-                        pred_entities.add(label)
+                        labels.append(label)
+            pred_entities.update(labels)
+            if classes is not None:
+                for label in labels:
+                    classes.setdefault(label, ent_type)
     return pred_entities
 
 # 🔗 Relation extractors
-def extract_triples_from_gold(gold_entry):
+def extract_triples_from_gold(gold_entry, classes=None):
     triples = set()
     for relation_block in gold_entry.get("relations", []):
-        for _, relation_list in relation_block.items():
+        for relation_type, relation_list in relation_block.items():
             for relation in relation_list:
                 subj = relation.get("subject", "").strip().lower()
                 pred = relation.get("predicate", "").strip().lower()
                 obj = relation.get("object", "").strip().lower()
                 triples.add((subj, pred, obj))
+                if classes is not None:
+                    classes.setdefault((subj, pred, obj), relation_type)
     return triples
 
-def extract_triples_from_run(run_data):
+def extract_triples_from_run(run_data, classes=None):
     triples = set()
     for class_name, section in run_data.items():
         if class_name.endswith("Relationship"):
@@ -61,6 +83,8 @@ def extract_triples_from_run(run_data):
                 obj = relation.get("object", "").strip().lower()
                 for p in pred.split("|"):
                     triples.add((subj, p.strip(), obj))
+                    if classes is not None:
+                        classes.setdefault((subj, p.strip(), obj), class_name)
     return triples
 
 # 📊 Metric helper
@@ -70,6 +94,82 @@ def compute_metrics(tp, fp, fn):
     f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0
     return precision, recall, f1
 
+# 🗄️ SQLite store: one row per (run, object, type, item, outcome), plus aggregates
+def open_store(path):
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE IF NOT EXISTS outcomes (
+            run TEXT NOT NULL,
+            object INTEGER NOT NULL,
+            type TEXT NOT NULL,          -- 'entity' or 'relation'
+            class TEXT,                  -- entity class or relation block / class
+            item TEXT NOT NULL,          -- entity label, or 'subject | predicate | object'
+            outcome TEXT NOT NULL,       -- 'TP', 'FP' or 'FN'
+            subject TEXT, predicate TEXT, object_label TEXT
+        );
+        CREATE INDEX IF NOT EXISTS outcomes_run_object ON outcomes (run, object);
+        CREATE INDEX IF NOT EXISTS outcomes_lookup ON outcomes (type, outcome, class, item);
+
+        CREATE TABLE IF NOT EXISTS item_counts (
+            run TEXT, type TEXT, class TEXT, item TEXT, outcome TEXT, objects INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS item_counts_lookup ON item_counts (type, outcome, class, objects DESC);
+        CREATE INDEX IF NOT EXISTS item_counts_run ON item_counts (run);
+
+        CREATE TABLE IF NOT EXISTS item_totals (
+            type TEXT, class TEXT, item TEXT, outcome TEXT, runs INTEGER, objects INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS item_totals_lookup ON item_totals (type, outcome, class, objects DESC);
+
+        CREATE TABLE IF NOT EXISTS run_metrics (
+            run TEXT, type TEXT, tp INTEGER, fp INTEGER, fn INTEGER,
+            precision REAL, recall REAL, f1_score REAL,
+            PRIMARY KEY (run, type)
+        );
+    """)
+    return connection
+
+def outcome_rows(object_id, item_type, outcomes, classes):
+    for outcome, items in outcomes.items():
+        for item in items:
+            if item_type == "relation":
+                yield (run_name, object_id, item_type, classes.get(item), " | ".join(item), outcome, *item)
+            else:
+                yield (run_name, object_id, item_type, classes.get(item), item, outcome, None, None, None)
+
+def refresh_aggregates(connection, run):
+    """Rebuild the aggregates of one run, then the cross-run totals."""
+    connection.execute("DELETE FROM item_counts WHERE run = ?", (run,))
+    connection.execute("""
+        INSERT INTO item_counts
+        SELECT run, type, class, item, outcome, COUNT(*) FROM outcomes
+        WHERE run = ? GROUP BY run, type, class, item, outcome
+    """, (run,))
+
+    # Metrics from summed per-object counts (unlike the JSON overall metrics, which use set unions)
+    connection.execute("DELETE FROM run_metrics WHERE run = ?", (run,))
+    for item_type, tp, fp, fn in connection.execute("""
+        SELECT type, SUM(outcome = 'TP'), SUM(outcome = 'FP'), SUM(outcome = 'FN')
+        FROM outcomes WHERE run = ? GROUP BY type
+    """, (run,)).fetchall():
+        precision = tp / (tp + fp) if tp or fp else 0
+        recall = tp / (tp + fn) if tp or fn else 0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0
+        connection.execute("INSERT INTO run_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                           (run, item_type, tp, fp, fn, precision, recall, f1))
+
+    connection.execute("DELETE FROM item_totals")
+    connection.execute("""
+        INSERT INTO item_totals
+        SELECT type, class, item, outcome, COUNT(DISTINCT run), SUM(objects) FROM item_counts
+        GROUP BY type, class, item, outcome
+    """)
+
+connection = open_store(db_path) if db_path else None
+if connection:
+    # Re-running a run replaces its rows
+    connection.execute("DELETE FROM outcomes WHERE run = ?", (run_name,))
+
 # 🔁 Loop through each gold object
 for i, gold in enumerate(gold_all):
     run_path = f"{run_prefix}{i+1}.json"
@@ -79,11 +179,13 @@ for i, gold in enumerate(gold_all):
     with open(run_path) as f:
         run = json.load(f)
 
-    gold_ents = extract_gold_entities(gold)
-    pred_ents = extract_predicted_entities(run)
+    # Gold classes first, so TPs and FNs are attributed to the gold class
+    entity_classes, relation_classes = {}, {}
+    gold_ents = extract_gold_entities(gold, entity_classes)
+    pred_ents = extract_predicted_entities(run, entity_classes)
 
-    gold_triples = extract_triples_from_gold(gold)
-    pred_triples = extract_triples_from_run(run)
+    gold_triples = extract_triples_from_gold(gold, relation_classes)
+    pred_triples = extract_triples_from_run(run, relation_classes)
 
     TP_ent = pred_ents & gold_ents
     FP_ent = pred_ents - gold_ents
@@ -101,6 +203,12 @@ for i, gold in enumerate(gold_all):
     all_fp_rel |= FP_rel
     all_fn_rel |= FN_rel
 
+    if connection:
+        connection.executemany("INSERT INTO outcomes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            *outcome_rows(i + 1, "entity", {"TP": TP_ent, "FP": FP_ent, "FN": FN_ent}, entity_classes),
+            *outcome_rows(i + 1, "relation", {"TP": TP_rel, "FP": FP_rel, "FN": FN_rel}, relation_classes),
+        ])
+
     results[f"Object {i+1}"] = {
         "Entities": {
             "true_positives": list(TP_ent),
@@ -136,3 +244,9 @@ with open(output_path, "w") as f:
     json.dump(results, f, indent=2)
 
 print("✅ Evaluation complete. Results saved to:", output_path)
+
+if connection:
+    refresh_aggregates(connection, run_name)
+    connection.commit()
+    connection.close()
+    print(f"🗄️ Outcome rows for run '{run_name}' saved to: {db_path}")
@@ -0,0 +1,266 @@
+import argparse
+import json
+from bisect import bisect_right
+
+from challenge_eval import SUBTASK_FIELDS, clean_items, compute_scores, index_ground_truth, iter_predictions
+
+MATCH_MODES = ["exact", "relaxed_label", "partial", "partial_relaxed_label"]
+ERROR_TYPES = ["correct", "label", "boundary", "label_boundary", "spurious", "missed"]
+BOUNDARY_SHIFTS = ["starts_early", "starts_late", "ends_early", "ends_late"]
+
+
+def build_interval_index(entries):
+    """
+    Index the gold entities of one document for overlap queries.
+
+    Per location, spans are sorted by start with a running maximum of their
+    ends, so the spans overlapping [start, end] are found with one binary
+    search and a backward scan that stops as soon as no earlier span can reach.
+    As in GutBrainIE, `end_idx` is inclusive.
+
+    Args:
+        entries (iterable): Gold entries (start_idx, end_idx, location, text_span, label).
+
+    Returns:
+        dict: location -> {"starts", "max_ends", "entries"}.
+    """
+    groups = {}
+    for entry in entries:
+        groups.setdefault(entry[2], []).append(entry)
+
+    index = {}
+    for location, group in groups.items():
+        group.sort()
+        max_ends = []
+        running_end = -1
+        for entry in group:
+            running_end = max(running_end, entry[1])
+            max_ends.append(running_end)
+        index[location] = {"starts": [entry[0] for entry in group], "max_ends": max_ends, "entries": group}
+    return index
+
+
+def overlapping_entries(interval_index, start, end, location):
+    """Gold entries of one document overlapping [start, end] (`end` inclusive) in `location`."""
+    section = interval_index.get(location)
+    if section is None:
+        return []
+
+    found = []
+    position = bisect_right(section["starts"], end) - 1
+    while position >= 0 and section["max_ends"][position] >= start:
+        entry = section["entries"][position]
+        if entry[1] >= start:
+            found.append(entry)
+        position -= 1
+    return found
+
+
+def _overlap(a, b):
+    """Number of characters shared by two spans with inclusive ends."""
+    return min(a[1], b[1]) - max(a[0], b[0]) + 1
+
+
+def _match_partial(predicted, interval_index, same_label):
+    """
+    One-to-one overlap matching. Predictions with the exact span of an unused
+    gold entity are matched to it first; every other prediction then takes
+    the unused overlapping gold entity with the largest overlap.
+
+    Returns the list of (predicted entry, gold entry) pairs.
+    """
+    used = set()
+    pairs = []
+    remaining = []
+    for entry in sorted(predicted):
+        exact = [
+            gold for gold in overlapping_entries(interval_index, entry[0], entry[1], entry[2])
+            if gold not in used and gold[:2] == entry[:2] and (not same_label or gold[4] == entry[4])
+        ]
+        if exact:
+            used.add(exact[0])
+            pairs.append((entry, exact[0]))
+        else:
+            remaining.append(entry)
+
+    for entry in remaining:
+        candidates = [
+            gold for gold in overlapping_entries(interval_index, entry[0], entry[1], entry[2])
+            if gold not in used and (not same_label or gold[4] == entry[4])
+        ]
+        if candidates:
+            gold = max(candidates, key=lambda g: (_overlap(entry, g), -g[0]))
+            used.add(gold)
+            pairs.append((entry, gold))
+    return pairs
+
+
+def new_error_counts(ground_truth_index):
+    """Create empty counters for every match mode, error type and boundary shift."""
+    labels = list(ground_truth_index["NER"]["annotated_per_label"].keys())
+    return {
+        "modes": {
+            mode: {
+                "predicted": {label: 0 for label in labels},
+                "true_positives": {label: 0 for label in labels},
+                "predicted_total": 0,
+                "true_positives_total": 0,
+            }
+            for mode in MATCH_MODES
+        },
+        "errors": {error: 0 for error in ERROR_TYPES},
+        "errors_per_label": {label: {error: 0 for error in ERROR_TYPES} for label in labels},
+        "boundary_shifts": {shift: 0 for shift in BOUNDARY_SHIFTS},
+    }
+
+
+def _count_match(mode_counts, predicted_label, true_positive_label=None):
+    mode_counts["predicted_total"] += 1
+    if predicted_label in mode_counts["predicted"]:
+        mode_counts["predicted"][predicted_label] += 1
+    if true_positive_label is not None:
+        mode_counts["true_positives_total"] += 1
+        if true_positive_label in mode_counts["true_positives"]:
+            mode_counts["true_positives"][true_positive_label] += 1
+
+
+def score_article_errors(pmid, article, ground_truth_index, counts):
+    """
+    Score the NER predictions of one article in every match mode and classify its errors.
+
+    Predictions are cleaned exactly like `challenge_eval.py`. Each prediction is
+    then "correct" (same span and label), a "label" error (same span), a
+    "boundary" error (overlaps a gold entity of the same label), a
+    "label_boundary" error (overlaps one of another label) or "spurious"; gold
+    entities overlapped by no prediction are "missed". Counters are updated in place.
+    """
+    entities, _, _ = clean_items("NER", article.get(SUBTASK_FIELDS["NER"], []))
+    predicted = [
+        (int(ent["start_idx"]), int(ent["end_idx"]), str(ent["location"]), str(ent["text_span"]), str(ent["label"]))
+        for ent in entities
+    ]
+    gold = ground_truth_index["NER"]["entries"].get(pmid, set())
+    interval_index = build_interval_index(gold)
+    gold_labels_by_span = {}
+    for entry in gold:
+        gold_labels_by_span.setdefault(entry[:3], set()).add(entry[4])
+
+    modes = counts["modes"]
+    for entry in predicted:
+        span, label = entry[:3], entry[4]
+        _count_match(modes["exact"], label, label if entry in gold else None)
+        _count_match(modes["relaxed_label"], label, label if span in gold_labels_by_span else None)
+
+    for mode, same_label in (("partial", True), ("partial_relaxed_label", False)):
+        pairs = _match_partial(predicted, interval_index, same_label)
+        matched = {entry: gold_entry for entry, gold_entry in pairs}
+        for entry in predicted:
+            _count_match(modes[mode], entry[4], entry[4] if entry in matched else None)
+
+    touched = set()
+    for entry in predicted:
+        span, label = entry[:3], entry[4]
+        overlapping = overlapping_entries(interval_index, *span)
+        touched.update(overlapping)
+
+        if label in gold_labels_by_span.get(span, ()):
+            error = "correct"
+        elif span in gold_labels_by_span:
+            error = "label"
+        elif any(gold_entry[4] == label for gold_entry in overlapping):
+            error = "boundary"
+            closest = max((g for g in overlapping if g[4] == label), key=lambda g: (_overlap(entry, g), -g[0]))
+            shifts = counts["boundary_shifts"]
+            shifts["starts_early"] += entry[0] < closest[0]
+            shifts["starts_late"] += entry[0] > closest[0]
+            shifts["ends_early"] += entry[1] < closest[1]
+            shifts["ends_late"] += entry[1] > closest[1]
+        elif overlapping:
+            error = "label_boundary"
+        else:
+            error = "spurious"
+
+        counts["errors"][error] += 1
+        if label in counts["errors_per_label"]:
+            counts["errors_per_label"][label][error] += 1
+
+    for gold_entry in gold - touched:
+        counts["errors"]["missed"] += 1
+        counts["errors_per_label"][gold_entry[4]]["missed"] += 1
+
+
+def _micro_scores(true_positives, predicted, annotated):
+    micro_precision = true_positives / (predicted + 1e-10)
+    micro_recall = true_positives / (annotated + 1e-10)
+    micro_f1 = 2 * ((micro_precision * micro_recall) / (micro_precision + micro_recall + 1e-10))
+    return micro_precision, micro_recall, micro_f1
+
+
+def evaluate_ner_errors(predictions, ground_truth_index):
+    """
+    Partial-match scores and an error breakdown for NER predictions.
+
+    In "exact" and "partial" modes labels must agree, and micro / macro scores
+    use the same formulas as `challenge_eval.py` ("exact" reproduces its NER
+    scores). The "relaxed_label" modes ignore labels, so only micro scores are
+    reported for them.
+
+    Args:
+        predictions: dict {pmid: article} or iterable of (pmid, article) pairs.
+        ground_truth_index (dict): Index from `challenge_eval.index_ground_truth` with "NER".
+
+    Returns:
+        dict: {"modes": {mode: {metric: score}}, "errors", "errors_per_label", "boundary_shifts"}.
+    """
+    counts = new_error_counts(ground_truth_index)
+    articles = predictions.items() if isinstance(predictions, dict) else predictions
+    for pmid, article in articles:
+        score_article_errors(pmid, article, ground_truth_index, counts)
+
+    annotated_per_label = ground_truth_index["NER"]["annotated_per_label"]
+    annotated = sum(annotated_per_label.values())
+    report = {"modes": {}}
+    for mode, mode_counts in counts["modes"].items():
+        if mode in ("exact", "partial"):
+            scores = compute_scores(mode_counts, annotated_per_label)
+            report["modes"][mode] = dict(zip(
+                ["macro_precision", "macro_recall", "macro_f1", "micro_precision", "micro_recall", "micro_f1"], scores
+            ))
+        else:
+            scores = _micro_scores(mode_counts["true_positives_total"], mode_counts["predicted_total"], annotated)
+            report["modes"][mode] = dict(zip(["micro_precision", "micro_recall", "micro_f1"], scores))
+
+    report["errors"] = counts["errors"]
+    report["errors_per_label"] = counts["errors_per_label"]
+    report["boundary_shifts"] = counts["boundary_shifts"]
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Partial-match NER scores and boundary error breakdown.")
+    parser.add_argument("predictions", help="Prediction file (.json or .jsonl).")
+    parser.add_argument("--ground-truth", default="dev.json")
+    parser.add_argument("--output", help="Optional path to save the report as JSON.")
+    args = parser.parse_args()
+
+    with open(args.ground_truth, 'r', encoding='utf-8') as file:
+        ground_truth_index = index_ground_truth(json.load(file), ["NER"])
+
+    report = evaluate_ner_errors(iter_predictions(args.predictions), ground_truth_index)
+
+    for mode, scores in report["modes"].items():
+        print(f"\n=== 6_1_NER ({mode}) ===")
+        for metric, score in scores.items():
+            print(f"{metric}: {score:.4f}")
+
+    print("\n=== Error breakdown ===")
+    for error, count in report["errors"].items():
+        print(f"{error}: {count}")
+    print("\n=== Boundary shifts ===")
+    for shift, count in report["boundary_shifts"].items():
+        print(f"{shift}: {count}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4)
+        print(f"\n📁 Report saved to {args.output}")
@@ -0,0 +1,64 @@
+import json
+import os
+
+from utils.dependency_graph import DependencyGraph
+from utils.handle_relationship_classes import check_and_remove_two_dependency_classes, prune_relationship_classes
+from utils.process_relationship_entities import build_relationship_prompt
+from utils.schema import load_schema
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(REPO, "generated", "schema.json")
+
+RESPONSES = {
+    "Bacteria": {"schemaResponse": {"mentions": ["Akkermansia"]}},
+    "DiseaseDisorderOrFinding": {"schemaResponse": {"mentions": ["Parkinson's disease"]}},
+}
+
+
+def test_relationship_ranges_resolve_to_named_entity_classes():
+    ranges = load_schema(SCHEMA_PATH).relationship_ranges["BacteriaDDFRelationship"]
+    assert (ranges["subject"], ranges["object"]) == ("Bacteria", "DiseaseDisorderOrFinding")
+
+
+def test_ddf_relationship_survives_pruning_when_its_arguments_have_instances():
+    schema = load_schema(SCHEMA_PATH)
+    relationships = {"BacteriaDDFRelationship": list(schema.relationship_arguments("BacteriaDDFRelationship").values())}
+    graph = DependencyGraph({
+        "Bacteria": {"dependencies": []},
+        "DiseaseDisorderOrFinding": {"dependencies": []},
+        "BacteriaDDFRelationship": {"dependencies": relationships["BacteriaDDFRelationship"]},
+    })
+
+    assert prune_relationship_classes(relationships, RESPONSES, graph) == []
+    assert "BacteriaDDFRelationship" in relationships
+
+
+def test_ddf_relationship_prompt_lists_the_instances_of_its_arguments():
+    prompt = build_relationship_prompt(SCHEMA_PATH, "BacteriaDDFRelationship", RESPONSES)
+    assert "Akkermansia of the class 'Bacteria'" in prompt
+    assert "Parkinson's disease of the class 'DiseaseDisorderOrFinding'" in prompt
+
+
+def test_pruned_dependencies_file_keeps_ancestors_and_levels(tmp_path):
+    class_dependencies = {
+        "Bacteria": {"dependencies": [], "ancestors": [], "level": 0},
+        "DiseaseDisorderOrFinding": {"dependencies": [], "ancestors": [], "level": 0},
+        "Drug": {"dependencies": [], "ancestors": [], "level": 0},
+        "BacteriaDDFRelationship": {
+            "dependencies": ["Bacteria", "DiseaseDisorderOrFinding"],
+            "ancestors": ["Bacteria", "DiseaseDisorderOrFinding"],
+            "level": 1,
+        },
+        "BacteriaDrugRelationship": {"dependencies": ["Bacteria", "Drug"], "ancestors": ["Bacteria", "Drug"], "level": 1},
+    }
+    path = tmp_path / "class_dependencies.json"
+    path.write_text(json.dumps(class_dependencies))
+
+    relationships = {
+        class_name: details["dependencies"] for class_name, details in class_dependencies.items() if details["level"]
+    }
+    check_and_remove_two_dependency_classes(relationships, RESPONSES, str(path))
+
+    pruned = json.loads(path.read_text())
+    assert list(pruned) == ["Bacteria", "DiseaseDisorderOrFinding", "BacteriaDDFRelationship"]
+    assert pruned["BacteriaDDFRelationship"] == class_dependencies["BacteriaDDFRelationship"]
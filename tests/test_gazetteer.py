@@ -0,0 +1,75 @@
+import json
+import os
+
+import utils.run_corpus as run_corpus
+from utils.gazetteer import build_gazetteer, candidate_classes, gazetteer_prepass
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(REPO, "generated", "schema.json")
+
+ABSTRACT = "Akkermansia levels were lower in patients with depression."
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_candidates_mark_their_classes_as_present(tmp_path):
+    terms = tmp_path / "terms.tsv"
+    terms.write_text("Akkermansia\tbacteria\nglucose\tchemical\n")
+    gazetteer = build_gazetteer(corpus_paths=(), term_list_paths=[str(terms)], exclude_pmids=())
+
+    candidates = gazetteer_prepass(gazetteer, "Dietary glucose and the gut", ABSTRACT)
+    classes = candidate_classes(candidates, ["Bacteria", "Chemical", "Metabolites", "Food"])
+    assert classes == ["Bacteria", "Chemical", "Metabolites"]
+
+
+def test_object_list_items_of_prepass_documents_are_excluded_by_text(tmp_path):
+    corpus = write_json(tmp_path / "corpus.json", [
+        {"text": f"Intro. {ABSTRACT}", "entities": [{"Disease": [{"label": "depression"}]}]},
+        {"text": "Patients with anxiety.", "entities": [{"Disease": [{"label": "anxiety"}]}]},
+    ])
+    dataset = write_json(tmp_path / "dataset.json", {"12345678": {"metadata": {"title": "", "abstract": ABSTRACT}}})
+
+    gazetteer = build_gazetteer(corpus_paths=[corpus], prepass_dataset_path=dataset)
+    assert gazetteer["terms"] == ["anxiety"]
+
+
+def test_corpus_runner_feeds_candidates_to_triage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("output")
+    write_json(tmp_path / "dataset.json", {"1": {"metadata": {"title": "Gut bacteria", "abstract": ABSTRACT}}})
+    terms = tmp_path / "terms.tsv"
+    terms.write_text("Akkermansia\tbacteria\n")
+    gazetteer = build_gazetteer(corpus_paths=(), term_list_paths=[str(terms)], exclude_pmids=())
+
+    options = {}
+
+    def fake_named_entity_stage(named_entity_classes, schema, sample_text_path, response_formats_path,
+                                output_responses_path, prompts_save_path, **extraction_options):
+        options.update(extraction_options)
+        with open(output_responses_path, "w", encoding="utf-8") as file:
+            json.dump({}, file)
+
+    def fake_conversion(output_responses_path, text_sample_path, final_output_path, pmid, located_mentions):
+        with open(final_output_path, "w", encoding="utf-8") as file:
+            json.dump({pmid: {"entities": []}}, file)
+
+    monkeypatch.setattr(run_corpus, "process_named_entity_classes", fake_named_entity_stage)
+    monkeypatch.setattr(run_corpus, "convert_extracted_to_span_annotated", fake_conversion)
+
+    run_corpus.run_named_entity_corpus(
+        dataset_path="dataset.json",
+        final_predictions_path="predictions.json",
+        schema_path=SCHEMA_PATH,
+        sample_text_path="sample.txt",
+        output_responses_path="output/responses.json",
+        named_entity_classes={"Bacteria": {}, "Food": {}},
+        gazetteer=gazetteer,
+        triage=True,
+        known_present_classes=["Food"],
+    )
+
+    assert options["triage"] is True
+    assert options["known_present_classes"] == ["Food", "Bacteria"]
@@ -0,0 +1,55 @@
+from challenge_eval import index_ground_truth
+from ner_error_eval import build_interval_index, evaluate_ner_errors, overlapping_entries
+
+
+def entity(start_idx, end_idx, text_span, label, location="abstract"):
+    return {"start_idx": start_idx, "end_idx": end_idx, "location": location, "text_span": text_span, "label": label}
+
+
+def report_for(gold_entities, predicted_entities):
+    ground_truth_index = index_ground_truth({"1": {"entities": gold_entities}}, ["NER"])
+    return evaluate_ner_errors({"1": {"entities": predicted_entities}}, ground_truth_index)
+
+
+def test_overlap_query_uses_inclusive_ends():
+    index = build_interval_index([(10, 10, "abstract", "a", "DDF"), (20, 25, "abstract", "abcdef", "gene")])
+    assert overlapping_entries(index, 10, 10, "abstract") == [(10, 10, "abstract", "a", "DDF")]
+    assert overlapping_entries(index, 25, 30, "abstract") == [(20, 25, "abstract", "abcdef", "gene")]
+    assert overlapping_entries(index, 15, 20, "abstract") == [(20, 25, "abstract", "abcdef", "gene")]
+    assert overlapping_entries(index, 11, 19, "abstract") == []
+
+
+def test_single_character_entity_is_correct_in_every_mode():
+    gold = [entity(10, 10, "a", "DDF")]
+    report = report_for(gold, [entity(10, 10, "a", "DDF")])
+
+    assert report["modes"]["exact"]["micro_precision"] > 0.99
+    assert report["modes"]["partial"]["micro_precision"] > 0.99
+    assert report["errors"]["correct"] == 1
+    assert report["errors"]["missed"] == 0
+
+
+def test_edge_touching_spans_are_boundary_errors():
+    gold = [entity(20, 25, "abcdef", "gene"), entity(40, 44, "abcde", "DDF")]
+    predicted = [entity(25, 30, "fghijk", "gene"), entity(45, 47, "fgh", "DDF")]
+    report = report_for(gold, predicted)
+
+    # (25, 30) shares character 25 with (20, 25); (45, 47) only touches (40, 44) from outside
+    assert report["errors"]["boundary"] == 1
+    assert report["errors"]["spurious"] == 1
+    assert report["errors"]["missed"] == 1
+    assert report["boundary_shifts"]["starts_late"] == 1
+    assert report["boundary_shifts"]["ends_late"] == 1
+    assert report["modes"]["partial"]["micro_precision"] > 0.49
+    assert report["modes"]["exact"]["micro_precision"] < 0.01
+
+
+def test_exact_span_is_matched_before_a_containing_span():
+    gold = [entity(0, 20, "a" * 21, "DDF"), entity(10, 15, "b" * 6, "DDF")]
+    predicted = [entity(10, 15, "b" * 6, "DDF"), entity(16, 19, "c" * 4, "DDF")]
+    report = report_for(gold, predicted)
+
+    # (10, 15) takes its exact gold span, leaving (0, 20) for (16, 19)
+    assert report["modes"]["partial"]["micro_precision"] > 0.99
+    assert report["modes"]["partial"]["micro_recall"] > 0.99
+    assert report["modes"]["partial_relaxed_label"]["micro_recall"] > 0.99
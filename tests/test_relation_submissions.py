@@ -0,0 +1,112 @@
+import json
+import os
+
+import utils.process_relationship_entities as process_relationship_entities
+import utils.run_corpus as run_corpus
+from utils.extract_named_entity_classes import extract_named_entity_classes
+from utils.process_dependent_classes import process_dependent_classes
+from utils.relation_submissions import write_relation_submissions
+from utils.schema import load_schema
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(REPO, "generated", "schema.json")
+CLASS_DEPENDENCIES_PATH = os.path.join(REPO, "generated", "class_dependencies.json")
+
+TITLE = "Gut bacteria in human blood"
+NER_RESPONSES = {
+    "AnatomicalLocation": {"schemaResponse": {"mentions": ["blood"]}},
+    "Human": {"schemaResponse": {"mentions": ["human"]}},
+}
+RELATIONSHIP_RESPONSE = {
+    "AnatomicalLocationHumanRelationshipRelationships": [
+        {"subject": "blood", "predicate": "located in", "object": "human"}
+    ]
+}
+
+
+def entity(start_idx, end_idx, text_span, label, location="title"):
+    return {"start_idx": start_idx, "end_idx": end_idx, "location": location, "text_span": text_span, "label": label}
+
+
+def fake_named_entity_stage(named_entity_classes, schema, sample_text_path, response_formats_path,
+                            output_responses_path, prompts_save_path, **options):
+    with open(output_responses_path, "w", encoding="utf-8") as file:
+        json.dump(NER_RESPONSES, file)
+
+
+def fake_conversion(output_responses_path, text_sample_path, final_output_path, pmid, located_mentions):
+    entities = [entity(22, 26, "blood", "anatomical location"), entity(16, 20, "human", "human")]
+    with open(final_output_path, "w", encoding="utf-8") as file:
+        json.dump({pmid: {"entities": entities}}, file)
+
+
+def fake_dependent_stage(class_dependencies, schema, text_sample_path, responses_path, compression=None):
+    with open(responses_path, "r", encoding="utf-8") as file:
+        responses = json.load(file)
+    # The relationship stage runs on the named entities of the same PMID
+    assert responses == NER_RESPONSES
+    responses["AnatomicalLocationHumanRelationship"] = RELATIONSHIP_RESPONSE
+    with open(responses_path, "w", encoding="utf-8") as file:
+        json.dump(responses, file)
+    return []
+
+
+def test_relationship_response_reaches_submissions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("output")
+    with open("dataset.json", "w", encoding="utf-8") as file:
+        json.dump({"1": {"metadata": {"title": TITLE, "abstract": ""}}}, file)
+
+    monkeypatch.setattr(run_corpus, "process_named_entity_classes", fake_named_entity_stage)
+    monkeypatch.setattr(run_corpus, "convert_extracted_to_span_annotated", fake_conversion)
+    monkeypatch.setattr(run_corpus, "process_dependent_classes", fake_dependent_stage)
+
+    run_corpus.run_named_entity_corpus(
+        dataset_path="dataset.json",
+        final_predictions_path="predictions.json",
+        schema_path=SCHEMA_PATH,
+        sample_text_path="sample.txt",
+        output_responses_path="output/responses.json",
+        named_entity_classes={"AnatomicalLocation": {}, "Human": {}},
+        responses_by_pmid_path="responses_by_pmid.json",
+        class_dependencies_path=CLASS_DEPENDENCIES_PATH,
+    )
+
+    output_paths = {subtask: f"{subtask}.json" for subtask in ("binary_tag_RE", "ternary_tag_RE", "ternary_mention_RE")}
+    write_relation_submissions("responses_by_pmid.json", "predictions.json", SCHEMA_PATH, output_paths)
+
+    with open("ternary_mention_RE.json", "r", encoding="utf-8") as file:
+        submission = json.load(file)
+    assert submission["1"]["ternary_mention_based_relations"] == [{
+        "subject_text_span": "blood", "subject_label": "anatomical location", "predicate": "located in",
+        "object_text_span": "human", "object_label": "human",
+    }]
+    with open("binary_tag_RE.json", "r", encoding="utf-8") as file:
+        submission = json.load(file)
+    assert submission["1"]["binary_tag_based_relations"] == [{"subject_label": "anatomical location", "object_label": "human"}]
+
+
+def test_ddf_relationships_reach_the_relationship_stage(tmp_path, monkeypatch):
+    # Real scheduler and pruning on the real dependencies, every named entity class with instances
+    schema = load_schema(SCHEMA_PATH)
+    responses = {
+        class_name: {"schemaResponse": {schema.identifier(class_name) or "mentions": ["x"]}}
+        for class_name in extract_named_entity_classes(schema)
+    }
+    responses_path = tmp_path / "responses.json"
+    responses_path.write_text(json.dumps(responses))
+    text_path = tmp_path / "sample.txt"
+    text_path.write_text(f'title: "{TITLE}"\nabstract: ""')
+
+    extracted = {}
+
+    def fake_relationship_stage(response_formats_path, text_sample_path, prompts_save_path,
+                                relationships, schema, generated_responses_path, compression=None):
+        extracted.update(relationships)
+
+    monkeypatch.setattr(process_relationship_entities, "call_gpt_for_relationship_extraction", fake_relationship_stage)
+    removed = process_dependent_classes(CLASS_DEPENDENCIES_PATH, schema, str(text_path), str(responses_path))
+
+    assert removed == []
+    assert len(extracted) == len(schema.relationship_ranges)
+    assert extracted["BacteriaDDFRelationship"] == ["Bacteria", "DiseaseDisorderOrFinding"]
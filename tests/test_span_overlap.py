@@ -0,0 +1,26 @@
+from utils.span_overlap import resolve_overlaps
+
+CLASS_PRIORITY = {"DDF": 0, "gene": 1}
+
+
+def entity(start_idx, end_idx, label="DDF", location="abstract"):
+    return {"start_idx": start_idx, "end_idx": end_idx, "location": location, "text_span": f"{start_idx}-{end_idx}", "label": label}
+
+
+def spans(entities):
+    return sorted((e["start_idx"], e["end_idx"]) for e in entities)
+
+
+def test_touching_spans_are_kept_by_every_policy():
+    # Each span starts at the previous end, which the scorer does not count as an overlap
+    entities = [entity(0, 5), entity(5, 9, "gene"), entity(9, 14)]
+    for policy in ("longest", "class_priority", "nested"):
+        assert spans(resolve_overlaps(entities, policy, CLASS_PRIORITY)) == [(0, 5), (5, 9), (9, 14)], policy
+
+
+def test_overlapping_spans_still_conflict():
+    entities = [entity(0, 5, "gene"), entity(4, 12), entity(6, 6, "gene")]
+    assert spans(resolve_overlaps(entities, "longest")) == [(4, 12)]
+    assert spans(resolve_overlaps(entities, "class_priority", CLASS_PRIORITY)) == [(4, 12)]
+    # (6, 6) is nested in (4, 12) and (0, 5) crosses it
+    assert spans(resolve_overlaps(entities, "nested", CLASS_PRIORITY)) == [(4, 12), (6, 6)]
@@ -0,0 +1,85 @@
+import copy
+import json
+import os
+import random
+
+from challenge_eval import remove_duplicated_entities, remove_overlapping_entities
+from utils.span_store import (
+    build_span_store, deduplicate_spans, load_span_store, remove_overlapping_spans, save_span_store,
+    span_store_to_predictions
+)
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PREDICTIONS_PATH = os.path.join(REPO, "org_T61_BaselineRun_NuNerZero.json")
+
+
+def entity(start_idx, end_idx, label="DDF", location="abstract"):
+    return {"start_idx": start_idx, "end_idx": end_idx, "location": location, "text_span": f"{start_idx}-{end_idx}", "label": label}
+
+
+def scorer_cleaning(predictions):
+    predictions = copy.deepcopy(predictions)
+    remove_duplicated_entities(predictions)
+    deduplicated = copy.deepcopy(predictions)
+    remove_overlapping_entities(predictions)
+    return deduplicated, predictions
+
+
+def store_cleaning(predictions):
+    store, _ = deduplicate_spans(build_span_store(predictions))
+    deduplicated = span_store_to_predictions(store)
+    store, _ = remove_overlapping_spans(store)
+    return deduplicated, span_store_to_predictions(store)
+
+
+def random_predictions(seed, documents=30, spans=25):
+    rng = random.Random(seed)
+    predictions = {}
+    for pmid in range(documents):
+        entities = []
+        for _ in range(spans):
+            start = rng.randrange(0, 120)
+            entities.append(entity(start, start + rng.randrange(0, 12), rng.choice(["DDF", "gene"]), rng.choice(["title", "abstract"])))
+        # Exact duplicates and spans touching an earlier end
+        entities += [dict(rng.choice(entities)) for _ in range(3)]
+        entities += [entity(e["end_idx"], e["end_idx"] + 3, location=e["location"]) for e in rng.sample(entities, 3)]
+        predictions[str(10000000 + pmid)] = {"entities": entities}
+    return predictions
+
+
+def test_cleaning_matches_the_scorer_on_the_baseline_run():
+    with open(PREDICTIONS_PATH, "r", encoding="utf-8") as file:
+        predictions = json.load(file)
+    assert store_cleaning(predictions) == scorer_cleaning(predictions)
+
+
+def test_cleaning_matches_the_scorer_on_touching_nested_and_tied_spans():
+    predictions = {"1": {"entities": [
+        entity(0, 5), entity(5, 9), entity(9, 9),  # each starts at the previous end: not overlapping for the scorer
+        entity(20, 30), entity(22, 25), entity(24, 34),  # one chain, (24, 34) and (20, 30) tie on length
+        entity(20, 30, label="gene"),  # duplicate span with another label
+        entity(3, 4, location="title"), entity(0, 9, location="title"),
+    ]}, "2": {"entities": []}}
+    assert store_cleaning(predictions) == scorer_cleaning(predictions)
+
+
+def test_cleaning_matches_the_scorer_on_random_spans():
+    for seed in range(5):
+        predictions = random_predictions(seed)
+        assert store_cleaning(predictions) == scorer_cleaning(predictions)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    with open(PREDICTIONS_PATH, "r", encoding="utf-8") as file:
+        predictions = json.load(file)
+    path = str(tmp_path / "spans.npz")
+
+    save_span_store(build_span_store(predictions), path)
+    loaded = load_span_store(path)
+
+    assert span_store_to_predictions(loaded) == {
+        pmid: {"entities": [{key: entity[key] for key in ("start_idx", "end_idx", "location", "text_span", "label")}
+                            for entity in article["entities"]]}
+        for pmid, article in predictions.items()
+    }
+    assert span_store_to_predictions(load_span_store(PREDICTIONS_PATH)) == span_store_to_predictions(loaded)
@@ -0,0 +1,191 @@
+import re
+
+from utils.openai_client import get_client
+from utils.schema import load_schema
+
+# Candidate tokens: runs of letters and digits (Greek letters included). Punctuation is
+# never numbered, so a range cannot start or end on it but keeps it inside (e.g. hyphens).
+TOKEN_PATTERN = re.compile(r"\w+")
+
+TOKEN_RANGE_INSTRUCTIONS = """
+Every word of the text is preceded by its number in brackets, e.g. "[12]Parkinson [13]disease".
+Return each mention as the numbers of its first and last word ("first_token", "last_token", inclusive).
+- Annotate only full, standalone words or word groups, using the longest valid version of a mention.
+- Composite names (e.g., "short-chain fatty acids") are one mention.
+- Extract both full names and abbreviations, and standalone abbreviations of known biomedical terms.
+- Do NOT extract generic terms alone (e.g., "disease", "patients") or adjectives ("hypertensive").
+"""
+
+
+def number_tokens(sections):
+    """
+    Enumerate the candidate tokens of a document.
+
+    Args:
+        sections (dict): Mapping from location name (e.g. "title", "abstract") to its text.
+
+    Returns:
+        list: (location, start, end) of every token, `end` exclusive. The index of a token in this
+            list is its id; ids run across sections in order.
+    """
+    return [
+        (location, match.start(), match.end())
+        for location, text in sections.items()
+        for match in TOKEN_PATTERN.finditer(text)
+    ]
+
+
+def render_numbered_sections(sections, tokens):
+    """Return the document text with "[id]" inserted before every token, one line per section."""
+    lines = []
+    token_id = 0
+    for location, text in sections.items():
+        parts = []
+        previous_end = 0
+        while token_id < len(tokens) and tokens[token_id][0] == location:
+            _, start, end = tokens[token_id]
+            parts.append(f"{text[previous_end:start]}[{token_id}]{text[start:end]}")
+            previous_end = end
+            token_id += 1
+        parts.append(text[previous_end:])
+        lines.append(f"{location}: {''.join(parts)}")
+    return "\n".join(lines)
+
+
+def build_token_range_response_format(class_name):
+    """
+    Build a strict response format asking for the token ranges of the mentions of a class.
+
+    Args:
+        class_name (str): The named entity class.
+
+    Returns:
+        dict: A strict json_schema response format {"mentions": [{"first_token", "last_token"}]}.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": f"{class_name}_token_ranges",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "mentions": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "first_token": {"type": "integer"},
+                                "last_token": {"type": "integer"}
+                            },
+                            "required": ["first_token", "last_token"],
+                            "additionalProperties": False
+                        }
+                    }
+                },
+                "required": ["mentions"],
+                "additionalProperties": False
+            },
+            "strict": True
+        }
+    }
+
+
+def token_ranges_to_entities(token_ranges, tokens, sections, label):
+    """
+    Map token ranges to entities with direct lookups in the token table, without any text search.
+
+    Ranges with unknown ids, reversed bounds or crossing sections are dropped.
+
+    Args:
+        token_ranges (list): {"first_token", "last_token"} dicts, as returned by the model.
+        tokens (list): Output of `number_tokens` for the same sections.
+        sections (dict): Mapping from location name to its text.
+        label (str): Final label of the entities.
+
+    Returns:
+        list: Entities in the BioNLP span format ("end_idx" inclusive).
+    """
+    entities = []
+    for token_range in token_ranges:
+        first, last = token_range["first_token"], token_range["last_token"]
+        if not 0 <= first <= last < len(tokens):
+            continue
+        location, start, _ = tokens[first]
+        last_location, _, end = tokens[last]
+        if location != last_location:
+            continue
+        entities.append({
+            "start_idx": start,
+            "end_idx": end - 1,
+            "location": location,
+            "text_span": sections[location][start:end],
+            "label": label
+        })
+    return entities
+
+
+def extract_token_range_entities(named_entity_classes, schema, sections, model="gpt-4o-2024-08-06"):
+    """
+    Extract named entities by asking the model for token ranges instead of mention strings.
+
+    The title and abstract are sent with numbered tokens and each class call
+    returns only pairs of integers, so completions are short and every
+    mention maps to exactly one position.
+
+    Args:
+        named_entity_classes (dict): Named entity classes to process.
+        schema (str, dict or Schema): The schema, or the path of its JSON file.
+        sections (dict): {"title": ..., "abstract": ...} of the document.
+        model (str): Model used for the extraction calls.
+
+    Returns:
+        tuple: (entities in the BioNLP span format, responses keyed by class name with the
+            "schemaResponse" mentions as text and the raw "tokenRanges").
+    """
+    from utils.process_named_entities import CLASS_NAME_TO_LABEL
+    from utils.response_validation import parse_response, response_to_dict
+
+    schema = load_schema(schema)
+    tokens = number_tokens(sections)
+    numbered_text = render_numbered_sections(sections, tokens)
+
+    entities = []
+    responses = {}
+    for class_name in named_entity_classes:
+        class_info = schema.classes.get(class_name, {})
+        class_description = class_info.get("description", "")
+        annotation_rules = class_info.get("annotations", {}).get("annotation_rules")
+        label = CLASS_NAME_TO_LABEL.get(class_name, class_name)
+        response_format = build_token_range_response_format(class_name)
+
+        instructions = f"Extract all mentions of entities of class '{class_name}' that are **explicitly** mentioned in the text. "
+        if class_description:
+            instructions += f"A '{class_name}' is defined as: {class_description}. "
+        instructions += TOKEN_RANGE_INSTRUCTIONS
+        if annotation_rules:
+            instructions += f"- {annotation_rules}\n"
+
+        responses[class_name] = {"schemaResponse": None, "tokenRanges": None}
+        try:
+            response = get_client().chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": f"You are an expert biomedical annotator.\n{instructions}"},
+                    {"role": "user", "content": numbered_text}
+                ],
+                response_format=response_format
+            )
+            token_ranges = response_to_dict(parse_response(response.choices[0].message.content, response_format))["mentions"]
+        except Exception as e:
+            print(f"❌ Error processing token ranges for {class_name}: {e}")
+            continue
+
+        class_entities = token_ranges_to_entities(token_ranges, tokens, sections, label)
+        entities.extend(class_entities)
+        responses[class_name] = {
+            "schemaResponse": {"mentions": list(dict.fromkeys(entity["text_span"] for entity in class_entities))},
+            "tokenRanges": token_ranges
+        }
+        print(f"✅ {len(class_entities)} {class_name} mentions extracted as token ranges")
+
+    return entities, responses
@@ -1,65 +1,203 @@
 import json
-import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
+import os
+from xml.sax.saxutils import escape
 
+from utils.dependency_graph import DependencyGraph
 
+LEVEL_COLORS = ["green", "#ADD8E6", "#FFD580", "#F4A6A6", "#C3B1E1"]
 
-def draw_dependency_graph(json_file, output_image="dependency_graph.png"):
+
+def build_dependency_graph(json_file, node_suffix="Prompt"):
     """
-    Draw an unlabeled dependency graph for prompts, based on the final JSON file.
+    Build the nodes and edges of a dependency graph, grouped by topological level.
+
+    Works with class_dependencies.json and with prompt files whose entries
+    have a "dependencies" list or dict. Uses no plotting library.
 
     Args:
-        json_file (str): Path to the final prompts JSON file.
-        output_image (str): Path to save the generated graph image.
+        json_file (str): Path to the JSON file.
+        node_suffix (str): Suffix appended to class names to form node names.
+
+    Returns:
+        dict: {"nodes": [{"id", "class", "level"}], "edges": [[source, target]], "levels": [[node ids]]}.
     """
-    # Load the JSON data
     with open(json_file, 'r') as file:
         data = json.load(file)
-    
-    # Create a directed graph
-    G = nx.DiGraph()
 
-    # Add nodes and edges
+    class_dependencies = {}
     for class_name, details in data.items():
-        # Add the node for the current class with "Prompt" suffix
-        node_name = f"{class_name}Prompt"
-        G.add_node(node_name, layer=1, color="green")  # Default color for independent classes
-
-        # If the class has dependencies, add edges
-        dependencies = details.get("dependencies", {})
+        dependencies = details.get("dependencies", []) if isinstance(details, dict) else []
         if isinstance(dependencies, dict):
-            for dep_class in dependencies.values():
-                dep_node_name = f"{dep_class}Prompt"
-                G.add_edge(dep_node_name, node_name)
-                G.nodes[node_name]["layer"] = 2  # Mark dependent nodes in the second layer
-                G.nodes[node_name]["color"] = "#ADD8E6" 
-        elif isinstance(dependencies, list):
-            for dep_class in dependencies:
-                dep_node_name = f"{dep_class}Prompt"
-                G.add_edge(dep_node_name, node_name)
-                G.nodes[node_name]["layer"] = 2
-                G.nodes[node_name]["color"] = "#ADD8E6" 
-
-    # Get node colors and positions
+            dependencies = list(dependencies.values())
+        class_dependencies[class_name] = {"dependencies": dependencies}
+
+    # Classes only referenced as dependencies become nodes too
+    for details in list(class_dependencies.values()):
+        for dependency in details["dependencies"]:
+            class_dependencies.setdefault(dependency, {"dependencies": []})
+
+    graph = DependencyGraph(class_dependencies)
+    try:
+        levels = graph.topological_levels()
+    except ValueError as e:
+        # Fall back to two layers: independent and dependent classes
+        print(f"⚠️ {e}. Drawing dependent classes on one level.")
+        levels = {name: int(bool(deps)) for name, deps in graph.dependencies.items()}
+
+    nodes = [
+        {"id": f"{class_name}{node_suffix}", "class": class_name, "level": levels[class_name]}
+        for class_name in graph.dependencies
+    ]
+    edges = [
+        [f"{dependency}{node_suffix}", f"{class_name}{node_suffix}"]
+        for class_name, dependencies in graph.dependencies.items()
+        for dependency in dict.fromkeys(dependencies)
+    ]
+    grouped = []
+    for node in nodes:
+        while len(grouped) <= node["level"]:
+            grouped.append([])
+        grouped[node["level"]].append(node["id"])
+
+    return {"nodes": nodes, "edges": edges, "levels": grouped}
+
+
+def _level_color(level):
+    return LEVEL_COLORS[min(level, len(LEVEL_COLORS) - 1)]
+
+
+def to_dot(graph):
+    """Render the graph as Graphviz DOT, with one cluster per topological level."""
+    lines = ["digraph dependencies {", "    rankdir=LR;", "    node [shape=box, style=filled];"]
+    for level, node_ids in enumerate(graph["levels"]):
+        lines.append(f"    subgraph cluster_level_{level} {{")
+        lines.append(f'        label="Level {level}"; rank=same;')
+        for node_id in node_ids:
+            lines.append(f'        "{node_id}" [fillcolor="{_level_color(level)}"];')
+        lines.append("    }")
+    for source, target in graph["edges"]:
+        lines.append(f'    "{source}" -> "{target}";')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def to_svg(graph, column_width=320, row_height=28, node_width=260, node_height=22):
+    """
+    Render the graph as a standalone SVG: one column per level, straight edges.
+
+    Layout is a single pass over the nodes, so thousands of classes render in
+    well under a second with no plotting library.
+    """
+    positions = {}
+    for level, node_ids in enumerate(graph["levels"]):
+        for row, node_id in enumerate(node_ids):
+            positions[node_id] = (20 + level * column_width, 40 + row * row_height)
+
+    width = 40 + max(len(graph["levels"]), 1) * column_width
+    height = 60 + max((len(ids) for ids in graph["levels"]), default=0) * row_height
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="11">',
+        '<defs><marker id="arrow" markerWidth="8" markerHeight="8" refX="8" refY="4" orient="auto">'
+        '<path d="M0,0 L8,4 L0,8 z" fill="black"/></marker></defs>',
+    ]
+    for level in range(len(graph["levels"])):
+        parts.append(f'<text x="{20 + level * column_width}" y="20" font-weight="bold">Level {level}</text>')
+    for source, target in graph["edges"]:
+        x1, y1 = positions[source]
+        x2, y2 = positions[target]
+        parts.append(
+            f'<line x1="{x1 + node_width}" y1="{y1 + node_height / 2}" x2="{x2}" y2="{y2 + node_height / 2}" '
+            f'stroke="black" stroke-opacity="0.4" marker-end="url(#arrow)"/>'
+        )
+    for node in graph["nodes"]:
+        x, y = positions[node["id"]]
+        parts.append(
+            f'<rect x="{x}" y="{y}" width="{node_width}" height="{node_height}" rx="4" '
+            f'fill="{_level_color(node["level"])}" stroke="black"/>'
+            f'<text x="{x + 6}" y="{y + 15}">{escape(node["id"])}</text>'
+        )
+    parts.append("</svg>")
+    return "\n".join(parts) + "\n"
+
+
+def _draw_raster(graph, output_image, dpi, show):
+    """
+    Draw with networkx / matplotlib, imported only here.
+
+    Without `show`, the figure is rendered on its own Agg canvas, so the
+    matplotlib backend of the caller (e.g. inline notebook plots) is left untouched.
+    """
+    import networkx as nx
+
+    G = nx.DiGraph()
+    for node in graph["nodes"]:
+        G.add_node(node["id"], layer=node["level"], color=_level_color(node["level"]))
+    G.add_edges_from(graph["edges"])
+
     node_colors = [G.nodes[node]["color"] for node in G.nodes()]
-    pos = nx.multipartite_layout(G, subset_key="layer")  # Position nodes by layer
+    pos = nx.multipartite_layout(G, subset_key="layer")  # Position nodes by level
+
+    if show:
+        import matplotlib.pyplot as plt
+        figure = plt.figure(figsize=(12, 8))
+    else:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        figure = Figure(figsize=(12, 8))
+        FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
 
-    # Draw the graph
-    plt.figure(figsize=(12, 8))
     nx.draw(
-        G, pos, with_labels=True, labels={node: node for node in G.nodes()},  # Add node names with "Prompt" suffix
+        G, pos, ax=ax, with_labels=True, labels={node: node for node in G.nodes()},
         node_color=node_colors, node_size=3000, font_size=10, font_weight="bold",
         arrowsize=20, edge_color="black"
     )
-    
-    plt.title("Dependency Graph (Unlabeled)", fontsize=16)
-    plt.savefig(output_image, dpi=300, bbox_inches='tight')
-    plt.show()
+    ax.set_title("Dependency Graph (Unlabeled)", fontsize=16)
+    figure.savefig(output_image, dpi=dpi, bbox_inches='tight')
+    if show:
+        plt.show()
+        plt.close(figure)
 
 
-# Example Usage
-# draw_dependency_graph_v2("generated_prompts/final_prompts.json", "dependency_graph_v2.png")
+def draw_dependency_graph(json_file, output_image="dependency_graph.png", dpi=100, show=False, node_suffix="Prompt"):
+    """
+    Draw or export the dependency graph of a prompts or class_dependencies JSON file.
+
+    The format follows the output extension: ".dot", ".svg" and ".json" are
+    written directly without any plotting library; other extensions (e.g.
+    ".png") are rendered with networkx and matplotlib on a standalone Agg
+    canvas, without changing the global matplotlib backend. Nodes are grouped by topological level.
+
+    Args:
+        json_file (str): Path to the final prompts (or class dependencies) JSON file.
+        output_image (str): Path to save the generated graph.
+        dpi (int): Resolution of raster images.
+        show (bool): Also open an interactive window (raster formats only).
+        node_suffix (str): Suffix appended to class names to form node names.
+
+    Returns:
+        dict: The graph, as returned by `build_dependency_graph`.
+    """
+    graph = build_dependency_graph(json_file, node_suffix)
+    extension = os.path.splitext(output_image)[1].lower()
+
+    if extension in (".dot", ".gv"):
+        content = to_dot(graph)
+    elif extension == ".svg":
+        content = to_svg(graph)
+    elif extension == ".json":
+        content = json.dumps(graph, indent=4)
+    else:
+        _draw_raster(graph, output_image, dpi, show)
+        print(f"✅ Dependency graph saved to {output_image}")
+        return graph
+
+    with open(output_image, "w") as file:
+        file.write(content)
+    print(f"✅ Dependency graph saved to {output_image}")
+    return graph
 
 
 # Example Usage
+# draw_dependency_graph("generated/class_dependencies.json", "generated/graphs/class_dependency_graph.svg")
@@ -0,0 +1,164 @@
+import json
+
+
+class DependencyGraph:
+    """
+    Class dependencies with a reverse-adjacency index.
+
+    `dependencies[c]` lists the classes `c` depends on (its parent, or the
+    subject and object of a relationship) and `dependents[c]` holds the classes
+    that depend on `c` (as dict keys, for O(1) removal), so dependents are
+    found without scanning every class. Other keys of a class (such as the
+    "ancestors" and "level" written by `generate_dependencies`) are kept in
+    `details` and written back by `to_dict`.
+    """
+
+    def __init__(self, class_dependencies):
+        """
+        Args:
+            class_dependencies (dict): {class_name: {"dependencies": [...]}}, as saved in class_dependencies.json.
+        """
+        self.dependencies = {}
+        self.dependents = {}
+        self.details = {}
+        for class_name, details in class_dependencies.items():
+            self.dependencies[class_name] = list(details.get("dependencies", []))
+            self.dependents.setdefault(class_name, {})
+            self.details[class_name] = {key: value for key, value in details.items() if key != "dependencies"}
+        for class_name, dependencies in self.dependencies.items():
+            for dependency in dependencies:
+                self.dependents.setdefault(dependency, {})[class_name] = None
+
+    def __contains__(self, class_name):
+        return class_name in self.dependencies
+
+    def __len__(self):
+        return len(self.dependencies)
+
+    def copy(self):
+        return DependencyGraph(self.to_dict())
+
+    def to_dict(self):
+        """Return the dependencies in the class_dependencies.json format, with the other keys of each class."""
+        return {
+            class_name: {"dependencies": list(dependencies), **self.details.get(class_name, {})}
+            for class_name, dependencies in self.dependencies.items()
+        }
+
+    def topological_levels(self):
+        """
+        Assign each class its topological level with Kahn's algorithm.
+
+        Classes without dependencies are level 0, every other class is one
+        level above its deepest dependency (dependencies outside the graph,
+        such as range aliases, count as level 0), so all classes of a level
+        can be processed in the same wave.
+
+        Returns:
+            dict: {class_name: level}.
+
+        Raises:
+            ValueError: If the dependencies contain a cycle.
+        """
+        pending = {
+            class_name: len({dep for dep in dependencies if dep in self.dependencies})
+            for class_name, dependencies in self.dependencies.items()
+        }
+        queue = [class_name for class_name, count in pending.items() if count == 0]
+        levels = {
+            class_name: int(any(dep not in self.dependencies for dep in dependencies))
+            for class_name, dependencies in self.dependencies.items()
+        }
+
+        for class_name in queue:
+            for dependent in self.dependents.get(class_name, ()):
+                if dependent not in pending:
+                    continue
+                levels[dependent] = max(levels[dependent], levels[class_name] + 1)
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    queue.append(dependent)
+
+        if len(queue) < len(self.dependencies):
+            cyclic = [class_name for class_name in self.dependencies if pending[class_name] > 0]
+            raise ValueError(f"Dependency cycle among classes: {', '.join(cyclic)}")
+        return {class_name: levels[class_name] for class_name in queue}
+
+    def waves(self):
+        """Return the classes grouped by topological level, lowest level first."""
+        waves = []
+        for class_name, level in self.topological_levels().items():
+            while len(waves) <= level:
+                waves.append([])
+            waves[level].append(class_name)
+        return waves
+
+    def ancestor_chains(self):
+        """
+        Return every class with all its direct and indirect dependencies.
+
+        Computed once in topological order, each class reusing the chains of
+        its dependencies. Dependencies outside the graph (e.g. range aliases)
+        are kept as they are.
+
+        Returns:
+            dict: {class_name: ancestors}, nearest dependencies first.
+        """
+        chains = {}
+        for class_name in self.topological_levels():
+            ancestors = dict.fromkeys(self.dependencies[class_name])
+            for dependency in self.dependencies[class_name]:
+                ancestors.update(dict.fromkeys(chains.get(dependency, ())))
+            chains[class_name] = list(ancestors)
+        return chains
+
+    def transitive_dependents(self, class_names):
+        """
+        Return the given classes and every class depending on them, directly or not.
+
+        Iterative breadth-first search over the reverse index: linear in the
+        number of classes and dependency edges reached, with no recursion limit.
+        """
+        reached = dict.fromkeys(class_names)
+        queue = list(reached)
+        for class_name in queue:
+            for dependent in self.dependents.get(class_name, ()):
+                if dependent not in reached:
+                    reached[dependent] = None
+                    queue.append(dependent)
+        return list(reached)
+
+    def remove(self, class_names):
+        """
+        Remove the given classes and all their transitive dependents, in place.
+
+        Returns:
+            list: The removed class names (including those that were not in the graph).
+        """
+        removed = self.transitive_dependents(class_names)
+        removed_set = set(removed)
+        for class_name in removed:
+            for dependency in self.dependencies.pop(class_name, ()):
+                if dependency not in removed_set and dependency in self.dependents:
+                    self.dependents[dependency].pop(class_name, None)
+            self.dependents.pop(class_name, None)
+            self.details.pop(class_name, None)
+        return removed
+
+
+def load_dependency_graph(class_dependencies):
+    """
+    Return a DependencyGraph from a graph, a class_dependencies dict or the path of class_dependencies.json.
+    """
+    if isinstance(class_dependencies, DependencyGraph):
+        return class_dependencies
+    if isinstance(class_dependencies, str):
+        with open(class_dependencies, "r") as file:
+            class_dependencies = json.load(file)
+    return DependencyGraph(class_dependencies)
+
+
+def has_instances(class_name, generated_responses):
+    """True if the schemaResponse of a class has at least one non-empty list."""
+    schema_response = (generated_responses.get(class_name) or {}).get("schemaResponse") or {}
+    return any(isinstance(values, list) and values for values in schema_response.values())
@@ -0,0 +1,247 @@
+import json
+import re
+from collections import Counter
+
+import numpy as np
+
+from challenge_eval import LEGAL_ENTITY_LABELS
+from utils.candidate_index import TOKEN_PATTERN
+from utils.gazetteer import GOLD_S2_LABEL_MAP, is_whole_word
+
+# Sentences: from a non-space character to end punctuation followed by whitespace (so "1.5" is kept whole)
+SENTENCE_PATTERN = re.compile(r"\S.*?(?:[.!?](?=\s)|$)", re.S)
+
+
+def split_sentences(text):
+    """Return (start, end) offsets of the sentences of a text, without surrounding whitespace."""
+    offsets = []
+    for match in SENTENCE_PATTERN.finditer(text):
+        start, end = match.start(), match.end()
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            offsets.append((start, end))
+    return offsets
+
+
+def load_annotated_examples(path, label_map=None):
+    """
+    Cut an annotated corpus into sentence-level few-shot examples.
+
+    Two layouts are supported, as in `utils.gazetteer.load_annotated_terms`:
+    - GutBrainIE style (e.g. `dev.json`): {pmid: {"metadata": {"title", "abstract"}, "entities": [...]}}.
+      Entities are assigned to the sentence containing their start offset.
+    - Object list style (e.g. `gold_s2.json`): [{"text", "entities": [{type: [{"label": span}]}]}].
+      Mentions have no offsets and are assigned to every sentence containing them as a whole word.
+
+    A sentence holding a mention whose label is not a GutBrainIE label after
+    `label_map` (e.g. the GO terms and SNP variants of `gold_s2.json`) is
+    skipped: that span may be annotated under another label in GutBrainIE,
+    so the sentence could teach a class to leave out one of its mentions.
+
+    Args:
+        path (str): Path to the annotated JSON file.
+        label_map (dict): Optional mapping from corpus labels/types to final labels.
+
+    Returns:
+        list: One {"pmid", "text", "mentions": {label: [mention, ...]}} dict per sentence
+            holding at least one mention, all with legal labels.
+    """
+    label_map = label_map or {}
+
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+
+    examples = []
+
+    def add(pmid, sentence, labelled_mentions):
+        if any(label not in LEGAL_ENTITY_LABELS for label, _ in labelled_mentions):
+            return
+        mentions = {}
+        for label, mention in labelled_mentions:
+            if mention not in mentions.setdefault(label, []):
+                mentions[label].append(mention)
+        if mentions:
+            examples.append({"pmid": pmid, "text": sentence, "mentions": mentions})
+
+    if isinstance(data, dict):
+        for pmid, article in data.items():
+            if not isinstance(article, dict):
+                continue
+            metadata = article.get("metadata", {})
+            for location in ("title", "abstract"):
+                text = metadata.get(location, "")
+                entities = [entity for entity in article.get("entities", []) if entity.get("location") == location]
+                for start, end in split_sentences(text):
+                    add(str(pmid), text[start:end], [
+                        (label_map.get(entity["label"], entity["label"]), entity["text_span"])
+                        for entity in entities
+                        if start <= entity.get("start_idx", -1) < end and entity.get("text_span") and entity.get("label")
+                    ])
+    elif isinstance(data, list):
+        for index, item in enumerate(data):
+            text = item.get("text", "")
+            terms = [
+                (label_map.get(entity_type, entity_type), entity.get("label", "").strip())
+                for group in item.get("entities", [])
+                for entity_type, items in group.items()
+                for entity in items
+            ]
+            terms = [(label, mention) for label, mention in terms if mention]
+            for start, end in split_sentences(text):
+                sentence = text[start:end]
+                add(str(index), sentence, [
+                    (label, mention) for label, mention in terms
+                    if any(
+                        is_whole_word(sentence, match.start(), match.end())
+                        for match in re.finditer(re.escape(mention), sentence)
+                    )
+                ])
+
+    return examples
+
+
+def _tokenize(text):
+    return [token.lower() for token in TOKEN_PATTERN.findall(text)]
+
+
+def build_example_index(examples, k1=1.5, b=0.75):
+    """
+    Build a BM25 index over few-shot examples.
+
+    Postings are stored as NumPy arrays sorted by term, with their BM25
+    weight precomputed, so scoring a query is a gather and a `bincount`.
+
+    Args:
+        examples (list): Examples as returned by `load_annotated_examples`.
+        k1 (float): BM25 term frequency saturation.
+        b (float): BM25 length normalization.
+
+    Returns:
+        dict: The index, with the `examples`, the `vocabulary`, the postings
+            (`offsets`, `posting_examples`, `posting_weights`) and the example ids of each label.
+    """
+    vocabulary = {}
+    term_ids, example_ids, frequencies = [], [], []
+    lengths = np.zeros(len(examples), dtype=np.float32)
+
+    for example_id, example in enumerate(examples):
+        tokens = _tokenize(example["text"])
+        lengths[example_id] = len(tokens)
+        for term, count in Counter(tokens).items():
+            term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+            example_ids.append(example_id)
+            frequencies.append(count)
+
+    term_ids = np.asarray(term_ids, dtype=np.int32)
+    order = np.argsort(term_ids, kind="stable")
+    posting_examples = np.asarray(example_ids, dtype=np.int32)[order]
+    frequencies = np.asarray(frequencies, dtype=np.float32)[order]
+
+    document_frequencies = np.bincount(term_ids, minlength=len(vocabulary))
+    offsets = np.concatenate([[0], np.cumsum(document_frequencies)])
+    idf = np.log1p((len(examples) - document_frequencies + 0.5) / (document_frequencies + 0.5)).astype(np.float32)
+
+    average_length = lengths.mean() if len(examples) else 1.0
+    norms = k1 * (1 - b + b * lengths[posting_examples] / max(average_length, 1.0))
+    posting_weights = np.repeat(idf, document_frequencies) * frequencies * (k1 + 1) / (frequencies + norms)
+
+    by_label = {}
+    for example_id, example in enumerate(examples):
+        for label in example["mentions"]:
+            by_label.setdefault(label, []).append(example_id)
+
+    return {
+        "examples": examples,
+        "vocabulary": vocabulary,
+        "offsets": offsets,
+        "posting_examples": posting_examples,
+        "posting_weights": posting_weights.astype(np.float32),
+        "by_label": {label: np.asarray(ids, dtype=np.int32) for label, ids in by_label.items()},
+    }
+
+
+def load_example_index(corpus_paths=("dev.json", "gold_s2.json"), label_map=GOLD_S2_LABEL_MAP, **bm25_options):
+    """
+    Build a BM25 example index from annotated corpora.
+
+    Only labels annotated in the corpora get retrieved examples; the other
+    classes keep their static prompt examples. `dev.json` holds no entities,
+    so with the defaults only gene, DDF, chemical and drug (from
+    `gold_s2.json`) are covered, and the other nine labels fall back.
+
+    Args:
+        corpus_paths (iterable): Annotated JSON files (see `load_annotated_examples`).
+        label_map (dict): Mapping from corpus labels/types to final labels.
+        **bm25_options: `k1` and `b` for `build_example_index`.
+
+    Returns:
+        dict: The example index.
+    """
+    examples = []
+    for path in corpus_paths:
+        examples.extend(load_annotated_examples(path, label_map))
+    return build_example_index(examples, **bm25_options)
+
+
+def score_examples(index, query):
+    """Return the BM25 score of every example of the index for a query text."""
+    term_ids = {index["vocabulary"][term] for term in _tokenize(query) if term in index["vocabulary"]}
+    offsets = index["offsets"]
+    positions = [np.arange(offsets[term_id], offsets[term_id + 1]) for term_id in term_ids]
+    positions = np.concatenate(positions) if positions else np.zeros(0, dtype=np.int64)
+    return np.bincount(
+        index["posting_examples"][positions],
+        weights=index["posting_weights"][positions],
+        minlength=len(index["examples"])
+    )
+
+
+def select_examples(index, query, label, k=3, token_budget=150, exclude_pmids=()):
+    """
+    Pick the examples of a label most similar to a document, within a token budget.
+
+    Examples are taken by decreasing BM25 score and skipped when they do not
+    fit in the remaining budget. Examples of an excluded PMID or whose
+    sentence appears in the query are never used, so a document never sees
+    its own annotations.
+
+    Args:
+        index (dict): Output of `build_example_index`.
+        query (str): The document text.
+        label (str): Final label of the class (e.g. "DDF").
+        k (int): Maximum number of examples.
+        token_budget (int): Maximum number of tokens of the selected examples
+            (inputs and outputs), counted with `utils.prompt_size.count_tokens`.
+        exclude_pmids (iterable): PMIDs whose examples must not be used.
+
+    Returns:
+        list: Up to `k` {"input", "output"} dicts, "output" being the expected `{"mentions": [...]}` JSON.
+    """
+    from utils.prompt_size import count_tokens
+
+    candidates = index["by_label"].get(label)
+    if candidates is None or not k:
+        return []
+
+    scores = score_examples(index, query)[candidates]
+    exclude_pmids = {str(pmid) for pmid in exclude_pmids}
+    selected = []
+    seen_inputs = set()
+    remaining = token_budget
+
+    for example_id in candidates[np.argsort(-scores, kind="stable")]:
+        example = index["examples"][example_id]
+        if example["pmid"] in exclude_pmids or example["text"] in seen_inputs or example["text"] in query:
+            continue
+        output = json.dumps({"mentions": example["mentions"][label]}, ensure_ascii=False)
+        tokens = count_tokens(example["text"]) + count_tokens(output)
+        if tokens > remaining:
+            continue
+        selected.append({"input": example["text"], "output": output})
+        seen_inputs.add(example["text"])
+        remaining -= tokens
+        if len(selected) == k:
+            break
+
+    return selected
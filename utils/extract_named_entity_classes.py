@@ -1,17 +1,10 @@
-import yaml
-import json
+from utils.schema import DEFAULT_SCHEMA_PATH, load_schema
 
-def extract_named_entity_classes():
-    # Load the JSON file
-    json_file = 'generated/schema.json'
-    with open(json_file, 'r') as file:
-        data = json.load(file)
-    
-    # Extract classes with is_a = "NamedEntity"
-    named_entity_classes = {
-        class_name: details
-        for class_name, details in data.get('classes', {}).items()
-        if details.get('is_a') == "NamedEntity"
-    }
-    
-    return named_entity_classes
\ No newline at end of file
+def extract_named_entity_classes(schema=DEFAULT_SCHEMA_PATH):
+    # Load the schema (a path, dict or already loaded Schema)
+    schema = load_schema(schema)
+
+    # Classes with is_a = "NamedEntity"
+    named_entity_classes = schema.named_entity_classes()
+
+    return named_entity_classes
@@ -0,0 +1,414 @@
+import json
+from collections import deque
+
+from challenge_eval import LEGAL_ENTITY_LABELS
+
+# Mapping from `gold_s2.json` entity types to the final GutBrainIE labels. Gene products
+# (proteins and RNAs) are "gene" mentions in GutBrainIE; GO terms and SNP variants have no
+# GutBrainIE label and are dropped.
+GOLD_S2_LABEL_MAP = {
+    "Disease": "DDF",
+    "Diseases": "DDF",
+    "disease": "DDF",
+    "Gene": "gene",
+    "Genes": "gene",
+    "Protein": "gene",
+    "Proteins": "gene",
+    "mRNA": "gene",
+    "miRNA": "gene",
+    "miRNAs": "gene",
+    "lncRNA": "gene",
+    "lncRNAs": "gene",
+    "snoRNA": "gene",
+    "snoRNAs": "gene",
+    "Chemical": "chemical",
+    "Drug": "drug",
+    "mRNA vaccine": "drug",
+}
+
+def fold_case(text):
+    """
+    Lowercase a string character by character without changing its length.
+
+    Characters whose lowercase form expands to several characters (e.g. 'İ')
+    are kept as they are, so offsets in the folded text match the original.
+
+    Args:
+        text (str): The text to fold.
+
+    Returns:
+        str: The folded text, with the same length as the input.
+    """
+    folded = []
+    for char in text:
+        lower = char.lower()
+        folded.append(lower if len(lower) == 1 else char)
+    return "".join(folded)
+
+
+def is_whole_word(text, start, end):
+    """
+    Check that text[start:end] is not glued to a letter or digit on either side.
+
+    Args:
+        text (str): The full text.
+        start (int): Start offset of the match (inclusive).
+        end (int): End offset of the match (exclusive).
+
+    Returns:
+        bool: True if the match is delimited by word boundaries.
+    """
+    if start > 0 and text[start - 1].isalnum() and text[start].isalnum():
+        return False
+    if end < len(text) and text[end].isalnum() and text[end - 1].isalnum():
+        return False
+    return True
+
+
+def build_automaton(patterns):
+    """
+    Compile an Aho-Corasick automaton over a list of patterns.
+
+    Args:
+        patterns (list): Strings to search for. The index of each pattern is
+            reported back by `iter_automaton_matches`.
+
+    Returns:
+        dict: The automaton, with `goto`, `fail` and `output` tables and the
+            original `patterns`.
+    """
+    goto = [{}]
+    output = [[]]
+
+    for pattern_id, pattern in enumerate(patterns):
+        if not pattern:
+            continue
+        state = 0
+        for char in pattern:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][char] = next_state
+                goto.append({})
+                output.append([])
+            state = next_state
+        output[state].append(pattern_id)
+
+    # Breadth-first pass to build failure links and merge outputs
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(char, 0)
+            output[next_state] = output[next_state] + output[fail[next_state]]
+
+    return {"goto": goto, "fail": fail, "output": output, "patterns": list(patterns)}
+
+
+def iter_automaton_matches(automaton, text, whole_words=True):
+    """
+    Scan a text once and yield every occurrence of every pattern.
+
+    Args:
+        automaton (dict): Automaton returned by `build_automaton`.
+        text (str): The text to scan.
+        whole_words (bool): If True, skip matches that start or end inside a word.
+
+    Yields:
+        tuple: (start, end, pattern_id) with `end` exclusive.
+    """
+    goto = automaton["goto"]
+    fail = automaton["fail"]
+    output = automaton["output"]
+    patterns = automaton["patterns"]
+
+    state = 0
+    for position, char in enumerate(text):
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        for pattern_id in output[state]:
+            end = position + 1
+            start = end - len(patterns[pattern_id])
+            if whole_words and not is_whole_word(text, start, end):
+                continue
+            yield start, end, pattern_id
+
+
+def load_annotated_terms(path, label_map=None, exclude_texts=()):
+    """
+    Collect (text_span, label) pairs from an annotated corpus file.
+
+    Two layouts are supported:
+    - GutBrainIE style (e.g. `dev.json`): {pmid: {"entities": [{"text_span", "label", ...}]}}
+    - Object list style (e.g. `gold_s2.json`): [{"text", "entities": [{type: [{"label": span}]}]}]
+
+    Args:
+        path (str): Path to the annotated JSON file.
+        label_map (dict): Optional mapping from corpus labels/types to final labels.
+            Labels that are not in the map are kept as they are.
+        exclude_texts (iterable): Texts (e.g. titles and abstracts) whose object list items are
+            skipped. Those items have no PMID, so this is how they are matched to documents.
+
+    Returns:
+        list: List of (pmid_or_index, text_span, label) tuples.
+    """
+    label_map = label_map or {}
+
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+
+    terms = []
+    if isinstance(data, dict):
+        for pmid, article in data.items():
+            for entity in article.get("entities", []):
+                text_span = entity.get("text_span", "")
+                label = entity.get("label", "")
+                if text_span and label:
+                    terms.append((str(pmid), text_span, label_map.get(label, label)))
+    elif isinstance(data, list):
+        exclude_texts = [text.strip() for text in exclude_texts if text and text.strip()]
+        for index, item in enumerate(data):
+            item_text = item.get("text", "")
+            if any(text in item_text for text in exclude_texts):
+                continue
+            for group in item.get("entities", []):
+                for entity_type, items in group.items():
+                    for entity in items:
+                        text_span = entity.get("label", "").strip()
+                        if text_span:
+                            terms.append((str(index), text_span, label_map.get(entity_type, entity_type)))
+
+    return terms
+
+
+def load_term_list(path):
+    """
+    Load an external term list.
+
+    Accepts either a JSON file mapping labels to lists of terms, or a text file
+    with one `term<TAB>label` pair per line.
+
+    Args:
+        path (str): Path to the term list.
+
+    Returns:
+        list: List of (text_span, label) tuples.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        if path.endswith(".json"):
+            data = json.load(file)
+            return [(term, label) for label, label_terms in data.items() for term in label_terms]
+
+        terms = []
+        for line in file:
+            line = line.rstrip("\n")
+            if not line.strip() or "\t" not in line:
+                continue
+            term, label = line.split("\t", 1)
+            terms.append((term.strip(), label.strip()))
+        return terms
+
+
+def build_gazetteer(
+    corpus_paths=("dev.json", "gold_s2.json"), term_list_paths=(), label_map=GOLD_S2_LABEL_MAP,
+    exclude_pmids=None, prepass_dataset_path="dev.json", lowercase=False, min_confidence=0.8, min_count=1,
+    min_length=2
+):
+    """
+    Build a gazetteer and its Aho-Corasick automaton from annotated corpora and term lists.
+
+    Each term keeps the labels it was annotated with. A term/label pair is kept
+    when the label accounts for at least `min_confidence` of the term's
+    annotations and was seen at least `min_count` times. Terms from external
+    lists always pass the count threshold. Labels that are not legal
+    GutBrainIE labels after `label_map` are dropped, so the candidates can be
+    scored with `challenge_eval.py`.
+
+    Args:
+        corpus_paths (iterable): Annotated JSON files (see `load_annotated_terms`).
+        term_list_paths (iterable): External term lists (see `load_term_list`).
+        label_map (dict): Optional mapping from corpus labels/types to final labels.
+        exclude_pmids (iterable): PMIDs to leave out of PMID-keyed corpora. Defaults to the PMIDs of
+            `prepass_dataset_path`, so the documents being pre-passed never find their own gold
+            annotations. Pass `()` to keep every PMID. Object list corpora such as `gold_s2.json`
+            are keyed by position, so by default their items holding the title or abstract of a
+            pre-pass document are left out instead.
+        prepass_dataset_path (str): Documents the pre-pass will run on (see `run_gazetteer_prepass`).
+        lowercase (bool): Match case-insensitively.
+        min_confidence (float): Minimum share of a term's annotations carrying the label.
+        min_count (int): Minimum number of annotations of the term with the label.
+        min_length (int): Minimum term length in characters.
+
+    Returns:
+        dict: Gazetteer with `terms`, `labels`, `confidence` and the compiled `automaton`.
+    """
+    label_map = label_map or {}
+    exclude_texts = []
+    if exclude_pmids is None:
+        exclude_pmids = []
+        if prepass_dataset_path:
+            try:
+                with open(prepass_dataset_path, "r", encoding="utf-8") as file:
+                    prepass_dataset = json.load(file)
+                exclude_pmids = list(prepass_dataset)
+                for doc in prepass_dataset.values():
+                    metadata = doc.get("metadata", doc)
+                    exclude_texts += [metadata.get("title", ""), metadata.get("abstract", "")]
+            except FileNotFoundError:
+                print(f"⚠️ Pre-pass dataset not found: {prepass_dataset_path}")
+    exclude_pmids = set(map(str, exclude_pmids))
+    label_counts = {}
+    dropped_labels = {}
+
+    def add(term, label, weight):
+        if label not in LEGAL_ENTITY_LABELS:
+            dropped_labels[label] = dropped_labels.get(label, 0) + 1
+            return
+        key = fold_case(term) if lowercase else term
+        if len(key) < min_length:
+            return
+        counts = label_counts.setdefault(key, {})
+        counts[label] = counts.get(label, 0) + weight
+
+    for path in corpus_paths:
+        try:
+            for pmid, text_span, label in load_annotated_terms(path, label_map, exclude_texts):
+                if pmid not in exclude_pmids:
+                    add(text_span, label, 1)
+        except FileNotFoundError:
+            print(f"⚠️ Gazetteer source not found: {path}")
+
+    for path in term_list_paths:
+        try:
+            for text_span, label in load_term_list(path):
+                add(text_span, label_map.get(label, label), min_count)
+        except FileNotFoundError:
+            print(f"⚠️ Term list not found: {path}")
+
+    terms, labels, confidence = [], [], []
+    for term, counts in label_counts.items():
+        total = sum(counts.values())
+        for label, count in counts.items():
+            score = count / total
+            if count >= min_count and score >= min_confidence:
+                terms.append(term)
+                labels.append(label)
+                confidence.append(round(score, 4))
+
+    if dropped_labels:
+        dropped = ", ".join(f"{label} ({count})" for label, count in sorted(dropped_labels.items()))
+        print(f"⚠️ Dropped annotations with labels outside GutBrainIE: {dropped}")
+    print(f"✅ Gazetteer built with {len(terms)} term/label pairs from {len(label_counts)} distinct terms "
+          f"({len(exclude_pmids)} PMIDs excluded).")
+
+    return {
+        "terms": terms,
+        "labels": labels,
+        "confidence": confidence,
+        "lowercase": lowercase,
+        "automaton": build_automaton(terms),
+    }
+
+
+def gazetteer_prepass(gazetteer, title, abstract):
+    """
+    Find gazetteer candidates in a document's title and abstract in one linear scan each.
+
+    Args:
+        gazetteer (dict): Gazetteer returned by `build_gazetteer`.
+        title (str): Document title.
+        abstract (str): Document abstract.
+
+    Returns:
+        list: Candidate entities in the BioNLP span format, each with an extra
+            `confidence` field.
+    """
+    candidates = []
+    for location, text in (("title", title), ("abstract", abstract)):
+        search_text = fold_case(text) if gazetteer["lowercase"] else text
+        for start, end, term_id in iter_automaton_matches(gazetteer["automaton"], search_text):
+            candidates.append({
+                "start_idx": start,
+                "end_idx": end - 1,
+                "location": location,
+                "text_span": text[start:end],
+                "label": gazetteer["labels"][term_id],
+                "confidence": gazetteer["confidence"][term_id],
+            })
+    return candidates
+
+
+def candidates_by_label(candidates):
+    """
+    Group candidate entities into unique mention strings per label.
+
+    Args:
+        candidates (list): Candidates returned by `gazetteer_prepass`.
+
+    Returns:
+        dict: Mapping from label to the list of distinct mentions found.
+    """
+    grouped = {}
+    for candidate in candidates:
+        mentions = grouped.setdefault(candidate["label"], [])
+        if candidate["text_span"] not in mentions:
+            mentions.append(candidate["text_span"])
+    return grouped
+
+
+def candidate_classes(candidates, named_entity_classes):
+    """
+    Named entity classes with at least one gazetteer candidate, e.g. for the
+    `known_present_classes` of `process_named_entity_classes`, which triage never skips.
+
+    Args:
+        candidates (list): Candidates returned by `gazetteer_prepass`.
+        named_entity_classes (iterable): Named entity class names to check.
+
+    Returns:
+        list: The class names whose label (see `LABEL_TO_CLASS_NAMES`) has a candidate.
+    """
+    from utils.process_named_entities import LABEL_TO_CLASS_NAMES
+
+    present = {
+        class_name for label in candidates_by_label(candidates) for class_name in LABEL_TO_CLASS_NAMES.get(label, ())
+    }
+    return [class_name for class_name in named_entity_classes if class_name in present]
+
+
+def run_gazetteer_prepass(gazetteer, dataset_path="dev.json", output_path="output/gazetteer_candidates.json"):
+    """
+    Run the gazetteer pre-pass over every document of a dataset and save the candidates.
+
+    The output uses the same {pmid: {"entities": [...]}} layout as the final
+    predictions, so it can be scored directly with `challenge_eval.py`.
+
+    Args:
+        gazetteer (dict): Gazetteer returned by `build_gazetteer`.
+        dataset_path (str): Path to the input documents (title & abstract per PMID).
+        output_path (str): Path to save the candidates.
+
+    Returns:
+        dict: The candidates per PMID.
+    """
+    with open(dataset_path, "r", encoding="utf-8") as file:
+        dataset = json.load(file)
+
+    output = {}
+    for pmid, doc in dataset.items():
+        metadata = doc.get("metadata", doc)
+        candidates = gazetteer_prepass(gazetteer, metadata.get("title", ""), metadata.get("abstract", ""))
+        output[pmid] = {"entities": candidates}
+
+    with open(output_path, "w", encoding="utf-8") as file:
+        json.dump(output, file, indent=4, ensure_ascii=True)
+
+    total = sum(len(doc["entities"]) for doc in output.values())
+    print(f"✅ Gazetteer pre-pass found {total} candidates in {len(output)} documents. Saved to {output_path}")
+    return output
@@ -1,24 +1,33 @@
 import json
 import os
 
+from utils.dependency_graph import DependencyGraph
+from utils.schema import load_schema
+
 def generate_dependencies(input_file="generated/schema.json", output_file="generated/class_dependencies.json"):
     """
     Generate dependencies for all classes in the input schema, excluding classes where is_a = RelationshipType.
 
+    Each class records its direct dependencies (its `is_a` parent, and for
+    relationships the subject, object and any other attribute ranging over a
+    class), its full ancestor chain and its topological level. Classes of the
+    same level do not depend on each other, so they can run in the same wave.
+    Dependency cycles are reported and nothing is saved.
+
     Args:
-        input_file (str): Path to the schema.json file.
+        input_file (str or Schema): Path to the schema.json file, or an already loaded Schema.
         output_file (str): Path to save the generated class dependencies JSON.
 
     Returns:
-        None: Saves the dependencies JSON file inside the generated directory.
+        list: The classes grouped in waves by level (None on error). Saves the
+            dependencies JSON file inside the generated directory.
     """
     # Ensure output directory exists
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
     # Load schema JSON
     try:
-        with open(input_file, "r") as file:
-            schema_data = json.load(file)
+        schema = load_schema(input_file)
     except FileNotFoundError:
         print(f"❌ ERROR: The input file '{input_file}' was not found.")
         return
@@ -26,7 +35,7 @@ def generate_dependencies(input_file="generated/schema.json", output_file="gener
         print(f"❌ ERROR: Failed to parse JSON in '{input_file}'. Please check the file format.")
         return
 
-    classes = schema_data.get("classes", {})
+    classes = schema.classes
     dependencies_output = {}
 
     print("🔍 Extracting class dependencies...")
@@ -45,25 +54,36 @@ def generate_dependencies(input_file="generated/schema.json", output_file="gener
             dependencies.append(is_a)
 
         # Handle relationships in "Triple" classes
-        if is_a == "Triple":
-            attributes = class_details.get("attributes", {})
-            subject = attributes.get("subject", {}).get("range", "")
-            object_ = attributes.get("object", {}).get("range", "")
-
-            if subject:
-                dependencies.append(subject)
-            if object_:
-                dependencies.append(object_)
+        if is_a == "Triple" and class_name in schema.relationship_ranges:
+            # Subject, object, and for n-ary relationships further arguments ranging over classes
+            dependencies.extend(schema.relationship_arguments(class_name).values())
 
         # Store dependencies if found
         dependencies_output[class_name] = {"dependencies": dependencies}
 
         print(f"   ✅ {class_name}: {dependencies if dependencies else 'No dependencies found'}")
 
+    # Levels and ancestor chains, computed once for the whole schema
+    graph = DependencyGraph(dependencies_output)
+    try:
+        levels = graph.topological_levels()
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        return
+    ancestor_chains = graph.ancestor_chains()
+    for class_name, details in dependencies_output.items():
+        details["ancestors"] = ancestor_chains[class_name]
+        details["level"] = levels[class_name]
+
     # Save the generated dependencies JSON
     with open(output_file, "w") as file:
         json.dump(dependencies_output, file, indent=4)
 
     print(f"\n🎯 **Class dependencies successfully generated!**")
-    print(f"📂 **Input File:** {input_file}")
+    print(f"📂 **Input File:** {schema.path or input_file}")
     print(f"📂 **Output File:** {output_file}")
+
+    waves = graph.waves()
+    for level, wave in enumerate(waves):
+        print(f"   🌊 Wave {level}: {len(wave)} classes")
+    return waves
@@ -1,4 +1,5 @@
-import json
+from utils.response_formats import save_response_formats
+from utils.schema import load_schema
 
 
 def generate_combined_response_format_with_inheritance(schema, class_name, parent_class=None):
@@ -7,20 +8,21 @@ def generate_combined_response_format_with_inheritance(schema, class_name, paren
     considering inheritance and handling enums.
 
     Args:
-        schema (dict): The schema containing class definitions.
+        schema (dict or Schema): The schema containing class definitions.
         class_name (str): The name of the class.
         parent_class (str): The name of the parent class (if any).
 
     Returns:
         dict: The combined response formats for the specified class.
     """
-    class_info = schema["classes"].get(class_name, {})
-    parent_info = schema["classes"].get(parent_class, {}) if parent_class else {}
+    schema = load_schema(schema)
+    class_info = schema.classes.get(class_name, {})
+    parent_info = schema.classes.get(parent_class, {}) if parent_class else {}
     attributes = class_info.get("attributes", {})
     parent_attributes = parent_info.get("attributes", {})
 
     # ✅ Extract enums
-    enums = schema.get("enums", {})
+    enums = schema.enum_values
 
     # ✅ Combine attributes of the child and parent classes
     combined_attributes = {**parent_attributes, **attributes}
@@ -80,9 +82,7 @@ def generate_combined_response_format_with_inheritance(schema, class_name, paren
 
         # ✅ Handle enum types (checking both parent & child attributes)
         if attr_type in enums:
-            enum_values = enums[attr_type].get("enum", [])
-            if not enum_values:  # If `enum` is empty, check for permissible_values instead
-                enum_values = list(enums[attr_type].get("permissible_values", {}).keys())
+            enum_values = enums[attr_type]  # `enum`, or permissible_values when it is empty
 
             if is_multivalued:
                 field_type["items"] = {"type": "string", "enum": enum_values}
@@ -135,13 +135,12 @@ def generate_inherited_response_formats(schema_path, output_path, single_depende
     Generate response formats for inherited classes and save them to a file.
 
     Args:
-        schema_path (str): Path to the input schema JSON file.
+        schema_path (str or Schema): Path to the input schema JSON file, or an already loaded Schema.
         output_path (str): Path to save the generated response formats.
         single_dependency_classes (dict): Dictionary mapping child classes to their parent classes.
     """
     # Load the schema
-    with open(schema_path, "r") as file:
-        schema = json.load(file)
+    schema = load_schema(schema_path)
 
     inherited_response_formats = {}
 
@@ -154,8 +153,7 @@ def generate_inherited_response_formats(schema_path, output_path, single_depende
         except ValueError as e:
             print(f"Error for class {child_class}: {e}")
 
-    # Save the response formats to a file
-    with open(output_path, "w") as file:
-        json.dump(inherited_response_formats, file, indent=4)
+    # Save the response formats to a file, one copy per distinct schema
+    bundle = save_response_formats(inherited_response_formats, output_path)
 
-    print(f"✅✅ Response formats for inherited classes saved to {output_path}")
+    print(f"✅✅ Response formats for inherited classes saved to {output_path} ({len(bundle['schemas'])} distinct schemas)")
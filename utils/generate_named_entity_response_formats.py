@@ -1,25 +1,25 @@
-import json
+from utils.response_formats import save_response_formats
+from utils.schema import load_schema
 
 def generate_named_entity_response_formats(schema_path, output_path, named_entity_classes):
     """
     Generate schemaResponseFormat and attributeResponseFormat for named entity classes.
 
     Args:
-        schema_path (str): Path to the input schema JSON file.
+        schema_path (str or Schema): Path to the input schema JSON file, or an already loaded Schema.
         output_path (str): Path to save the generated response formats.
         named_entity_classes (list): List of named entity classes.
 
     Returns:
-        None: Saves the response format JSON file.
+        None: Saves the response formats as a bundle (see `utils.response_formats`).
     """
-    with open(schema_path, "r") as file:
-        schema = json.load(file)
+    schema = load_schema(schema_path)
 
-    enums = schema.get("enums", {})
+    enums = schema.enum_values
     response_formats = {}
 
     for class_name in named_entity_classes:
-        class_info = schema.get("classes", {}).get(class_name, {})
+        class_info = schema.classes.get(class_name, {})
         attributes = class_info.get("attributes", {})
 
         identifier = None
@@ -39,7 +39,7 @@ def generate_named_entity_response_formats(schema_path, output_path, named_entit
             field_type = {"type": "array" if is_multivalued else "string"}
 
             if attr_type in enums:  # Handle enum types
-                enum_values = enums[attr_type].get("enum", [])
+                enum_values = enums[attr_type]
                 field_type["items"] = {"type": "string", "enum": enum_values} if is_multivalued else {"enum": enum_values}
             elif is_multivalued:
                 field_type["items"] = {"type": "string"}
@@ -105,9 +105,32 @@ def generate_named_entity_response_formats(schema_path, output_path, named_entit
 
         response_formats[class_name] = {**schema_response_format}
 
-    # Save response formats
-    with open(output_path, "w") as file:
-        json.dump(response_formats, file, indent=4)
+    # Save response formats, one copy per distinct schema
+    bundle = save_response_formats(response_formats, output_path)
 
-    print(f"✅ Named entity response formats saved to {output_path}")
+    print(f"✅ Named entity response formats saved to {output_path} ({len(bundle['schemas'])} distinct schemas)")
 
+
+def build_triage_response_format(named_entity_classes):
+    """
+    Build a response format asking, for each named entity class, whether it is present in a text.
+
+    Args:
+        named_entity_classes (list): List of named entity classes.
+
+    Returns:
+        dict: A strict json_schema response format with one boolean per class.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "named_entity_class_presence",
+            "schema": {
+                "type": "object",
+                "properties": {class_name: {"type": "boolean"} for class_name in named_entity_classes},
+                "required": list(named_entity_classes),
+                "additionalProperties": False
+            },
+            "strict": True
+        }
+    }
@@ -1,39 +1,31 @@
-import json
+from utils.response_formats import save_response_formats
+from utils.schema import load_schema
 
 def generate_relationship_response_format(schema_path, output_format_path, two_dependency_classes):
     """
     Generate a single response format for relationship-type classes based on schema definitions.
 
     Args:
-        schema_path (str): Path to the JSON schema file.
+        schema_path (str or Schema): Path to the JSON schema file, or an already loaded Schema.
         output_format_path (str): Path to save the generated response format.
         two_dependency_classes (dict): Dictionary containing relationship-type classes (with exactly two dependencies).
     
     Returns:
-        None: Saves the response format JSON.
+        None: Saves the response formats as a bundle (see `utils.response_formats`).
     """
-    with open(schema_path, "r") as file:
-        schema = json.load(file)
+    schema = load_schema(schema_path)
 
     relationship_formats = {}
 
     for class_name, dependencies in two_dependency_classes.items():
-        class_data = schema["classes"].get(class_name, {})
+        class_data = schema.classes.get(class_name, {})
         attributes = class_data.get("attributes", {})
 
         properties = {}
         required_fields = []
 
-        # ✅ Dynamically Extract Predicate Enum Value
-        predicate_values = []
-        predicate_range = attributes.get("predicate", {}).get("range", None)
-
-        if predicate_range and predicate_range in schema["classes"]:
-            predicate_class_info = schema["classes"][predicate_range]
-            predicate_id = predicate_class_info.get("attributes", {}).get("id", {}).get("pattern", None)
-
-            if predicate_id:
-                predicate_values = [p.strip().strip("^$") for p in predicate_id.split("|")]
+        # ✅ Predicate enum values, from the id pattern of the predicate class
+        predicate_values = schema.predicate_values(class_name)
 
         for attr_name, attr_data in attributes.items():
             attr_type = attr_data.get("range", "string").lower()  # Default to string if not specified
@@ -42,7 +34,7 @@ def generate_relationship_response_format(schema_path, output_format_path, two_d
                 field_type = {"type": "string", "enum": predicate_values}  # ✅ Add enum for predicate
             elif attr_type == "date":
                 field_type = {"type": "string"}
-            elif attr_type in schema["classes"]:  # If it's a reference to another class
+            elif attr_type in schema.classes:  # If it's a reference to another class
                 field_type = {"type": "string"}  # IDs of referenced classes should be string
             else:
                 field_type = {"type": "number"} if attr_type in ["integer", "float"] else {"type": "string"}
@@ -78,9 +70,8 @@ def generate_relationship_response_format(schema_path, output_format_path, two_d
 
         relationship_formats[class_name] = response_format
 
-    with open(output_format_path, "w") as file:
-        json.dump(relationship_formats, file, indent=4)
+    bundle = save_response_formats(relationship_formats, output_format_path)
 
-    print(f"Generated response formats saved to {output_format_path}")
+    print(f"Generated response formats saved to {output_format_path} ({len(bundle['schemas'])} distinct schemas)")
 
 
@@ -1,24 +1,6 @@
 import json
 
-def find_classes_with_one_dependency(dependencies_path):
-    """
-    Identify classes with exactly one dependency.
-
-    Args:
-        dependencies_path (str): Path to the class dependencies file.
-
-    Returns:
-        dict: Dictionary of classes with one dependency and their parent class.
-    """
-    with open(dependencies_path, "r") as file:
-        class_dependencies = json.load(file)
-
-    one_dependency_classes = {
-        class_name: data["dependencies"][0]
-        for class_name, data in class_dependencies.items()
-        if len(data["dependencies"]) == 1
-    }
-    return one_dependency_classes
+from utils.dependency_graph import DependencyGraph, has_instances
 
 def check_parent_has_instances(parent_class, responses_path):
     """
@@ -26,47 +8,63 @@ def check_parent_has_instances(parent_class, responses_path):
 
     Args:
         parent_class (str): The parent class name.
-        responses_path (str): Path to the generated responses file.
+        responses_path (str or dict): Path to the generated responses file, or the responses already loaded.
 
     Returns:
         bool: True if the parent class has instances, False otherwise.
     """
-    with open(responses_path, "r") as file:
-        generated_responses = json.load(file)
-
-    parent_response = generated_responses.get(parent_class, {}).get("schemaResponse", {})
-    if not parent_response:
-        return False
+    if isinstance(responses_path, str):
+        with open(responses_path, "r") as file:
+            generated_responses = json.load(file)
+    else:
+        generated_responses = responses_path
 
-    # Check if the schemaResponse has any non-empty attribute
-    for attribute, values in parent_response.items():
-        if isinstance(values, list) and values:  # Non-empty list
-            return True
-    return False
+    return has_instances(parent_class, generated_responses)
 
 def remove_class_and_dependents(class_name, class_dependencies, single_dependency_classes):
     """
-    Recursively remove a class and its dependents from the class dependencies dictionary and single_dependency_classes.
+    Remove a class and its transitive dependents from the class dependencies and single_dependency_classes.
+
+    Dependents are found with one breadth-first search over a reverse index,
+    so the cost is linear in the size of the dependency graph.
 
     Args:
         class_name (str): The name of the class to remove.
-        class_dependencies (dict): The dictionary of class dependencies.
+        class_dependencies (dict or DependencyGraph): The class dependencies.
         single_dependency_classes (dict): The dictionary of single dependency classes.
 
     Returns:
-        None: The function modifies the dictionaries in place.
+        None: The function modifies the dictionaries (or graph) in place.
+    """
+    if isinstance(class_dependencies, DependencyGraph):
+        removed = class_dependencies.remove([class_name])
+    else:
+        removed = DependencyGraph(class_dependencies).transitive_dependents([class_name])
+        for removed_class in removed:
+            class_dependencies.pop(removed_class, None)
+
+    for removed_class in removed:
+        single_dependency_classes.pop(removed_class, None)
+
+def prune_single_dependency_classes(single_dependency_classes, generated_responses, graph):
     """
-    # Find all classes that depend on the given class
-    dependents = [child for child, details in class_dependencies.items() if class_name in details.get("dependencies", [])]
+    Drop, in memory, the inherited classes whose parent has no instances in this document.
 
-    # Remove the given class from class_dependencies
-    if class_name in class_dependencies:
-        del class_dependencies[class_name]
+    Args:
+        single_dependency_classes (dict): Child class -> parent class, modified in place.
+        generated_responses (dict): Responses of the current document.
+        graph (DependencyGraph): Dependencies of the current document, modified in place.
 
-    # Remove the given class from single_dependency_classes
-    if class_name in single_dependency_classes:
-        del single_dependency_classes[class_name]
+    Returns:
+        list: The removed class names.
+    """
+    missing_parents = {
+        parent_class for parent_class in set(single_dependency_classes.values())
+        if not has_instances(parent_class, generated_responses)
+    }
+    children = [child for child, parent in single_dependency_classes.items() if parent in missing_parents]
 
-    # Recursively remove all dependents
-    for dependent in dependents:
-        remove_class_and_dependents(dependent, class_dependencies, single_dependency_classes)
+    removed = graph.remove(children)
+    for removed_class in removed:
+        single_dependency_classes.pop(removed_class, None)
+    return removed
@@ -1,55 +1,62 @@
 import json
 
-# File path to class_dependencies.json
+from utils.dependency_graph import DependencyGraph, has_instances, load_dependency_graph
 
-def find_classes_with_two_dependencies(dependencies_path):
+def remove_class_and_dependents(class_name, class_dependencies, two_dependency_classes):
     """
-    Identify classes with exactly two dependencies.
+    Remove a class and its transitive dependents from the class dependencies and two_dependency_classes.
+
+    Dependents are found with one breadth-first search over a reverse index,
+    so the cost is linear in the size of the dependency graph.
 
     Args:
-        dependencies_path (str): Path to the class dependencies file.
+        class_name (str): The name of the class to remove.
+        class_dependencies (dict or DependencyGraph): The class dependencies.
+        two_dependency_classes (dict): The dictionary of two dependency classes.
 
     Returns:
-        dict: Dictionary of classes with two dependencies and their parent classes.
+        None: The function modifies the dictionaries (or graph) in place.
     """
-    with open(dependencies_path, "r") as file:
-        class_dependencies = json.load(file)
-
-    two_dependency_classes = {
-        class_name: data["dependencies"]
-        for class_name, data in class_dependencies.items()
-        if len(data["dependencies"]) == 2
-    }
-    print("Classes with exactly two dependencies:")
-    print(two_dependency_classes)
-    return two_dependency_classes
+    if isinstance(class_dependencies, DependencyGraph):
+        removed = class_dependencies.remove([class_name])
+    else:
+        removed = DependencyGraph(class_dependencies).transitive_dependents([class_name])
+        for removed_class in removed:
+            class_dependencies.pop(removed_class, None)
 
-def remove_class_and_dependents(class_name, class_dependencies, two_dependency_classes):
+    for removed_class in removed:
+        two_dependency_classes.pop(removed_class, None)
+
+def prune_relationship_classes(two_dependency_classes, generated_responses, graph):
     """
-    Recursively remove a class and its dependents from the class dependencies dictionary and two_dependency_classes.
+    Remove, in memory, the relationship classes with a dependency (argument) that has no instances.
+
+    The dependencies without instances and everything depending on them are
+    removed in one pass over the reverse index, with no file writes, so it
+    can run per document on a copy of the corpus-wide graph.
 
     Args:
-        class_name (str): The name of the class to remove.
-        class_dependencies (dict): The dictionary of class dependencies.
-        two_dependency_classes (dict): The dictionary of two dependency classes.
+        two_dependency_classes (dict): Relationship class -> its dependencies, modified in place.
+        generated_responses (dict): Responses of the current document.
+        graph (DependencyGraph): Dependencies of the current document, modified in place.
 
     Returns:
-        None: The function modifies the dictionaries in place.
+        list: The removed class names.
     """
-    # Find all classes that depend on the given class
-    dependents = [child for child, deps in class_dependencies.items() if class_name in deps.get("dependencies", [])]
-
-    # Remove the given class from class_dependencies
-    if class_name in class_dependencies:
-        del class_dependencies[class_name]
-
-    # Remove the given class from two_dependency_classes
-    if class_name in two_dependency_classes:
-        del two_dependency_classes[class_name]
-
-    # Recursively remove all dependents
-    for dependent in dependents:
-        remove_class_and_dependents(dependent, class_dependencies, two_dependency_classes)
+    dependencies = dict.fromkeys(dep for deps in two_dependency_classes.values() for dep in deps)
+    missing = {dep for dep in dependencies if not has_instances(dep, generated_responses)}
+    incomplete = [
+        class_name for class_name, deps in two_dependency_classes.items() if any(dep in missing for dep in deps)
+    ]
+    for class_name in incomplete:
+        print(f"Class '{class_name}' has dependencies with missing instances. Removing '{class_name}' and its dependents.")
+    for dep in missing:
+        print(f"Dependency '{dep}' has no instances. Removing it and its dependents.")
+
+    removed = graph.remove([dep for dep in dependencies if dep in missing] + incomplete)
+    for removed_class in removed:
+        two_dependency_classes.pop(removed_class, None)
+    return removed
 
 def check_and_remove_two_dependency_classes(two_dependency_classes, responses_path, class_dependencies_file):
     """
@@ -58,42 +65,26 @@ def check_and_remove_two_dependency_classes(two_dependency_classes, responses_pa
 
     Args:
         two_dependency_classes (dict): Classes with two dependencies and their parent classes.
-        responses_path (str): Path to the generated responses file.
-        class_dependencies_file (str): Path to the class dependencies file.
+        responses_path (str or dict): Path to the generated responses file, or the responses already loaded.
+        class_dependencies_file (str or DependencyGraph): Path to the class dependencies file, or a graph
+            to prune in memory (nothing is written then).
 
     Returns:
-        None: Modifies the dependencies file in place.
+        None: Modifies the dependencies file (or graph) in place.
     """
     # Load generated responses and class dependencies
-    with open(responses_path, "r") as file:
-        generated_responses = json.load(file)
-
-    with open(class_dependencies_file, "r") as file:
-        class_dependencies = json.load(file)
-
-    for class_name, dependencies in two_dependency_classes.copy().items():
-        # Check if both dependencies have instances
-        dependency_instances = {
-            dep: any(
-                values for values in generated_responses.get(dep, {}).get("schemaResponse", {}).values()
-                if isinstance(values, list) and values
-            )
-            for dep in dependencies
-        }
-
-        # If any dependency is missing instances, remove the class and its dependents
-        if not all(dependency_instances.values()):
-            print(f"Class '{class_name}' has dependencies with missing instances. Removing '{class_name}' and its dependents.")
-            for dep, has_instances in dependency_instances.items():
-                if not has_instances:
-                    print(f"Dependency '{dep}' has no instances. Removing it and its dependents.")
-                    remove_class_and_dependents(dep, class_dependencies, two_dependency_classes)
-            remove_class_and_dependents(class_name, class_dependencies, two_dependency_classes)
-
-    # Save the updated dependencies back to the file
-    with open(class_dependencies_file, "w") as file:
-        json.dump(class_dependencies, file, indent=4)
-
-    print("Updated class dependencies saved.")
-
-# Example usage
+    if isinstance(responses_path, str):
+        with open(responses_path, "r") as file:
+            generated_responses = json.load(file)
+    else:
+        generated_responses = responses_path
+
+    graph = load_dependency_graph(class_dependencies_file)
+    prune_relationship_classes(two_dependency_classes, generated_responses, graph)
+
+    if isinstance(class_dependencies_file, str):
+        # Save the updated dependencies back to the file
+        with open(class_dependencies_file, "w") as file:
+            json.dump(graph.to_dict(), file, indent=4)
+
+        print("Updated class dependencies saved.")
@@ -0,0 +1,30 @@
+import os
+
+# PLACE API KEY HERE (or set the OPENAI_API_KEY environment variable)
+API_KEY = ""
+
+# Shared client, created on first use
+_client = None
+
+
+def get_client(api_key=None):
+    """
+    Return the shared OpenAI client, creating it on first use.
+
+    The `openai` package is only imported here, so modules that call the API
+    (and scripts or worker processes that merely import them) start without
+    paying its import cost.
+
+    Args:
+        api_key (str): Optional key; replaces the shared client with one using it.
+            Defaults to API_KEY, then to the OPENAI_API_KEY environment variable.
+
+    Returns:
+        OpenAI: The client.
+    """
+    global _client
+    if _client is None or api_key is not None:
+        from openai import OpenAI
+
+        _client = OpenAI(api_key=api_key or API_KEY or os.environ.get("OPENAI_API_KEY"))
+    return _client
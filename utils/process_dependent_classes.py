@@ -0,0 +1,113 @@
+import json
+
+from utils.dependency_graph import load_dependency_graph
+from utils.handle_inherited_classes import prune_single_dependency_classes
+from utils.handle_relationship_classes import prune_relationship_classes
+from utils.schema import load_schema
+
+
+def schedule_dependent_classes(class_dependencies, schema):
+    """
+    Group the classes that depend on others into waves, by topological level.
+
+    Every class of a wave only depends on classes of earlier waves (or on the
+    named entities), so a wave can run once the previous one is done. Classes
+    are routed by kind rather than by their number of dependencies:
+    relationships (including n-ary ones) go to the relationship extractor,
+    other classes with a single parent to the inherited class extractor.
+
+    Args:
+        class_dependencies (str, dict or DependencyGraph): Path to class_dependencies.json,
+            or the dependencies already loaded.
+        schema (str, dict or Schema): The schema, or the path of its JSON file.
+
+    Returns:
+        list: One {"inherited": {child: parent}, "relationship": {class_name: dependencies}}
+            dict per level above the named entities, lowest level first.
+    """
+    graph = load_dependency_graph(class_dependencies)
+    schema = load_schema(schema)
+
+    waves = []
+    for wave in graph.waves():
+        inherited, relationships = {}, {}
+        for class_name in wave:
+            dependencies = graph.dependencies[class_name]
+            if not dependencies:
+                continue
+            if class_name in schema.relationship_ranges:
+                relationships[class_name] = list(dependencies)
+            elif len(dependencies) == 1:
+                inherited[class_name] = dependencies[0]
+            else:
+                print(f"⚠️ No extractor for '{class_name}': not a relationship but depends on {', '.join(dependencies)}")
+        if inherited or relationships:
+            waves.append({"inherited": inherited, "relationship": relationships})
+    return waves
+
+
+def process_dependent_classes(
+    class_dependencies, schema_path, text_sample_path, responses_path,
+    inherited_response_formats_path="generated/response_formats/inherited_response_formats.json",
+    relationship_response_formats_path="generated/response_formats/relationship_response_formats.json",
+    inherited_prompts_path="generated/prompts/inherited_class_prompts.json",
+    relationship_prompts_path="generated/prompts/relationship_classes_prompts.json",
+    compression=None
+):
+    """
+    Extract the inherited and relationship classes of one document, wave by wave.
+
+    Before each wave, the classes whose dependencies have no instances in the
+    responses so far are pruned, with their dependents, from a copy of the
+    graph, so later waves only run classes that can have instances.
+
+    Args:
+        class_dependencies (str, dict or DependencyGraph): Dependencies of the whole schema (not modified).
+        schema_path (str or Schema): Path to the schema JSON file, or an already loaded Schema.
+        text_sample_path (str): Path to the text of the document.
+        responses_path (str): Responses of the named entity stage; every wave adds its responses to it.
+        inherited_response_formats_path (str): Response formats of the inherited classes.
+        relationship_response_formats_path (str): Response formats of the relationship classes.
+        inherited_prompts_path (str): Where the inherited class prompts are saved.
+        relationship_prompts_path (str): Where the relationship prompts are saved.
+        compression (iterable): Prompt compression options for the relationship stage.
+
+    Returns:
+        list: The classes removed because a dependency has no instances.
+    """
+    from utils.process_inherited_entities import process_inherited_entity_classes
+    from utils.process_relationship_entities import call_gpt_for_relationship_extraction
+
+    schema = load_schema(schema_path)
+    graph = load_dependency_graph(class_dependencies).copy()
+    waves = schedule_dependent_classes(graph, schema)
+
+    with open(text_sample_path, "r", encoding="utf-8") as file:
+        text = file.read()
+
+    removed = []
+    for level, wave in enumerate(waves, start=1):
+        with open(responses_path, "r", encoding="utf-8") as file:
+            responses = json.load(file)
+
+        # Classes removed in earlier waves took their dependents with them
+        inherited = {child: parent for child, parent in wave["inherited"].items() if child in graph}
+        relationships = {
+            class_name: dependencies for class_name, dependencies in wave["relationship"].items() if class_name in graph
+        }
+        removed += prune_single_dependency_classes(inherited, responses, graph)
+        removed += prune_relationship_classes(relationships, responses, graph)
+
+        print(f"\n🌊 Wave {level}: {len(inherited)} inherited and {len(relationships)} relationship classes")
+        if inherited:
+            process_inherited_entity_classes(
+                schema, responses_path, text, inherited_response_formats_path,
+                responses_path, inherited_prompts_path, inherited
+            )
+        if relationships:
+            call_gpt_for_relationship_extraction(
+                relationship_response_formats_path, text_sample_path, relationship_prompts_path,
+                relationships, schema, responses_path, compression
+            )
+
+    return list(dict.fromkeys(removed))
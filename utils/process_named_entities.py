@@ -1,27 +1,52 @@
 import json
-from openai import OpenAI
-
-# PLACE API KEY HERE
-# Initialize OpenAI client
-
-API_KEY=""
-client = OpenAI(api_key=API_KEY)
-
-def convert_extracted_to_span_annotated(output_responses_path, text_sample_path, final_output_path, pmid="00000000"):
-    import json
-    from collections import defaultdict
-
-    def find_all_occurrences(text, substring):
-        """Return all start indices of substring in text."""
-        start = 0
-        indices = []
-        while True:
-            start = text.find(substring, start)
-            if start == -1:
-                break
-            indices.append(start)
-            start += len(substring)
-        return indices
+import re
+
+from utils.openai_client import get_client
+from utils.response_formats import load_response_formats
+from utils.schema import load_schema
+
+# Mapping from internal class names to final labels
+CLASS_NAME_TO_LABEL = {
+    "AnatomicalLocation": "anatomical location",
+    "Animal": "animal",
+    "BiomedicalTechnique": "biomedical technique",
+    "Bacteria": "bacteria",
+    "Chemical": "chemical",
+    "DietarySupplement": "dietary supplement",
+    "DiseaseDisorderOrFinding": "DDF",
+    "Metabolites": "chemical",
+    "Drug": "drug",
+    "Food": "food",
+    "Gene": "gene",
+    "Human": "human",
+    "Microbiome": "microbiome",
+    "StatisticalTechnique": "statistical technique",
+}
+
+# Final label -> the NamedEntity classes annotated with it (e.g. "chemical" covers Chemical and Metabolites)
+LABEL_TO_CLASS_NAMES = {
+    label: [class_name for class_name, class_label in CLASS_NAME_TO_LABEL.items() if class_label == label]
+    for label in CLASS_NAME_TO_LABEL.values()
+}
+
+
+def split_title_abstract(full_text):
+    """Split the text of a sample file (a 'title: "..."' line and an 'abstract: "..."' line) into its sections."""
+    title_start = full_text.find("title:")
+    abstract_start = full_text.find("abstract:")
+
+    title = full_text[title_start + len("title:"):abstract_start].strip().strip('"').strip()
+    abstract = full_text[abstract_start + len("abstract:"):].strip().strip('"').strip()
+    return {"title": title, "abstract": abstract}
+
+
+def convert_extracted_to_span_annotated(
+    output_responses_path, text_sample_path, final_output_path, pmid="00000000", align_unmatched=True,
+    overlap_policy="longest", class_priority=None, schema_path="generated/schema.json", located_mentions=None
+):
+    from utils.span_alignment import align_mentions, build_alignment_index
+    from utils.span_locator import locate_mentions
+    from utils.span_overlap import load_class_priority, resolve_overlaps
 
     # Load extracted mentions from GPT output
     with open(output_responses_path, "r", encoding="utf-8") as f:
@@ -32,68 +57,65 @@ def convert_extracted_to_span_annotated(output_responses_path, text_sample_path,
         full_text = f.read()
 
     # Extract title and abstract
-    title_start = full_text.find("title:")
-    abstract_start = full_text.find("abstract:")
+    sections = split_title_abstract(full_text)
 
-    title = full_text[title_start + len("title:"):abstract_start].strip().strip('"').strip()
-    abstract = full_text[abstract_start + len("abstract:"):].strip().strip('"').strip()
+    # Collect (label, mention) pairs for every class
+    labelled_mentions = []
+    for class_name, content in data.items():
+        if not content or not content.get("schemaResponse") or "mentions" not in content["schemaResponse"]:
+            continue
 
-    # Define mapping from internal class names to final labels
-    class_name_to_label = {
-        "AnatomicalLocation": "anatomical location",
-        "Animal": "animal",
-        "BiomedicalTechnique": "biomedical technique",
-        "Bacteria": "bacteria",
-        "Chemical": "chemical",
-        "DietarySupplement": "dietary supplement",
-        "DiseaseDisorderOrFinding": "DDF",
-        "Metabolites": "chemical",
-        "Drug": "drug",
-        "Food": "food",
-        "Gene": "gene",
-        "Human": "human",
-        "Microbiome": "microbiome",
-        "StatisticalTechnique": "statistical technique",
-    }
+        label = CLASS_NAME_TO_LABEL.get(class_name, class_name)
+        for span in content["schemaResponse"]["mentions"]:
+            labelled_mentions.append((label, span))
 
-    entities = []
+    # Locate all mentions in a single pass over the title and the abstract, except those
+    # already located while their response was streamed
+    located_mentions = located_mentions or {}
+    positions = locate_mentions(
+        (span for _, span in labelled_mentions if span not in located_mentions), sections
+    )
+    positions.update(
+        {span: list(located_mentions[span]) for _, span in labelled_mentions if span in located_mentions}
+    )
 
-    for class_name, content in data.items():
-        if not content or "schemaResponse" not in content or "mentions" not in content["schemaResponse"]:
-            continue
+    # Recover mentions that differ from the text in quotes, Greek letters, spacing or small typos
+    unmatched = [span for span, found_positions in positions.items() if not found_positions]
+    if align_unmatched and unmatched:
+        aligned = align_mentions(unmatched, build_alignment_index(sections))
+        for span, aligned_positions in aligned.items():
+            if aligned_positions:
+                positions[span] = [(location, start, end) for location, start, end, _ in aligned_positions]
+                recovered = {sections[location][start:end] for location, start, end, _ in aligned_positions}
+                print(f"🩹 Recovered span '{span}' as {', '.join(repr(text) for text in sorted(recovered))}")
+
+    entities = []
 
-        mentions = content["schemaResponse"]["mentions"]
-        label = class_name_to_label.get(class_name, class_name)
-
-        for span in mentions:
-            found = False
-
-            title_positions = find_all_occurrences(title, span)
-            for start_idx in title_positions:
-                entity = {
-                    "start_idx": start_idx,
-                    "end_idx": start_idx + len(span) - 1,
-                    "location": "title",
-                    "text_span": span,
-                    "label": label
-                }
-                entities.append(entity)
-                found = True
-
-            abstract_positions = find_all_occurrences(abstract, span)
-            for start_idx in abstract_positions:
-                entity = {
-                    "start_idx": start_idx,
-                    "end_idx": start_idx + len(span) - 1,
-                    "location": "abstract",
-                    "text_span": span,
-                    "label": label
-                }
-                entities.append(entity)
-                found = True
-
-            if not found:
-                print(f"⚠️ Could not find span: '{span}'")
+    for label, span in labelled_mentions:
+        found = False
+
+        for location, start_idx, end in positions.get(span, []):
+            entity = {
+                "start_idx": start_idx,
+                "end_idx": end - 1,
+                "location": location,
+                "text_span": sections[location][start_idx:end],
+                "label": label
+            }
+            entities.append(entity)
+            found = True
+
+        if not found:
+            print(f"⚠️ Could not find span: '{span}'")
+
+    # Resolve duplicated and overlapping spans before writing (None keeps the raw spans)
+    if overlap_policy:
+        if overlap_policy == "class_priority" and class_priority is None:
+            class_priority = load_class_priority(schema_path, CLASS_NAME_TO_LABEL)
+        resolved = resolve_overlaps(entities, overlap_policy, class_priority)
+        if len(resolved) < len(entities):
+            print(f"✂️ Removed {len(entities) - len(resolved)} duplicated/overlapping spans ({overlap_policy})")
+        entities = resolved
 
     # Output in BioNLP required format
     output = {pmid: {"entities": entities}}
@@ -108,114 +130,131 @@ def convert_extracted_to_span_annotated(output_responses_path, text_sample_path,
 
 
 
-def process_named_entity_classes(
-    named_entity_classes, schema_path, text_sample_path, response_formats_path, output_responses_path, prompts_save_path
-):
+def triage_named_entity_classes(named_entity_classes, schema, text, model="gpt-4o-mini", known_present=None):
     """
-    Generate prompts, call GPT for named entity extraction, and save results.
+    Ask a small model once which named entity classes are present in the text.
 
     Args:
-        named_entity_classes (dict): Named entity classes to process.
-        schema_path (str): Path to the schema JSON file.
-        text_sample_path (str): Path to the input text sample file.
-        response_formats_path (str): Path to the response formats JSON file.
-        output_responses_path (str): Path to save the extracted responses.
-        prompts_save_path (str): Path to save the generated prompts.
+        named_entity_classes (dict): Named entity classes to check.
+        schema (dict): The schema containing class definitions.
+        text (str): The input text.
+        model (str): Model used for the triage call.
+        known_present (iterable): Classes already known to be present (e.g. from
+            gazetteer candidates). They are always kept.
 
     Returns:
-        None: Saves generated responses and prompts to their respective files.
+        list: Class names flagged as present. Falls back to all classes if the call fails.
     """
+    from utils.generate_named_entity_response_formats import build_triage_response_format
+    from utils.response_validation import parse_response, response_to_dict
 
+    class_names = list(named_entity_classes)
+    class_lines = "\n".join(
+        f"- {class_name}: {schema['classes'].get(class_name, {}).get('description', '')}"
+        for class_name in class_names
+    )
 
+    triage_response_format = build_triage_response_format(class_names)
+    try:
+        triage_response = get_client().chat.completions.create(
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an expert biomedical annotator. For each entity class, answer whether "
+                               "at least one mention of that class is **explicitly** present in the text."
+                },
+                {"role": "user", "content": f"Entity classes:\n{class_lines}\n\nText:\n{text}"}
+            ],
+            response_format=triage_response_format
+        )
+        presence = response_to_dict(parse_response(triage_response.choices[0].message.content, triage_response_format))
+    except Exception as e:
+        print(f"❌ Error during class triage, extracting all classes: {e}")
+        return class_names
 
-
-    # Load schema and text
-    with open(schema_path, "r") as file:
-        schema = json.load(file)
-
-    with open(text_sample_path, "r", encoding='utf-8') as file:
-        text = file.read()
-    # Ensure consistent Unicode handling
-    #text = text.encode('utf-8').decode('unicode-escape')
-    print(text)
-    # text_safe = text.encode("unicode_escape").decode("utf-8").replace("{", "{{").replace("}", "}}")
-    # text = text.encode("utf-8").decode("unicode_escape")
-    # Load response formats
-    with open(response_formats_path, "r") as schema_file:
-        response_formats = json.load(schema_file)
-
-    combined_responses = {}
-    generated_prompts = {}
-    already_extracted_entities = []  # List of tuples (entity_text, label)
+    known_present = set(known_present or [])
+    present = [class_name for class_name in class_names if presence.get(class_name, True) or class_name in known_present]
+    print(f"🔎 Triage kept {len(present)}/{len(class_names)} classes: {', '.join(present)}")
+    return present
 
 
-    # Extract schema title and description
-    schema_title = schema.get("title", "")
-    schema_description = schema.get("description", "")
-    schema_intro = (
-        f"The schema is titled '{schema_title}' and described as follows: {schema_description}"
-        if schema_title and schema_description
-        else f"the schema is described as follows: {schema_description}"
-        if schema_description
-        else f"The schema is titled '{schema_title}'"
-        if schema_title
-        else ""
-    )
+def shorten_example(example_input, example_output):
+    """
+    Keep only the sentences of an example input that contain one of its expected mentions.
 
-    # Process each named entity class
-    for class_name, details in named_entity_classes.items():
-        class_info = schema["classes"].get(class_name, {})
-        class_description = class_info.get("description", "")
-        # attributes = class_info.get("attributes", {})
-
-
-        # Generate schema and attribute prompts
-        class_intro = f"A '{class_name}' is defined as: {class_description}. " if class_description else ""
-        print(class_intro)
-        # Extract optional examples and rules
-        annotations = class_info.get("annotations", {})
-        prompt_examples = annotations.get("prompt.examples")
-        annotation_rules = annotations.get("annotation_rules")
-        example_input=annotations.get("example.input")
-        example_output=annotations.get("example.output")
-
-        # Build schema prompt
-        schema_prompt = (
-            f"Extract all mentions of entities of class '{class_name}' that are **explicitly** mentioned in the provided text. "
-            f"{class_intro} Return a list of all entity mentions for the class {class_name}."
-        )
+    Args:
+        example_input (str): Example text.
+        example_output (str): Expected output, with the mentions as quoted strings after "mentions".
 
-        # Add optional sections
-        if prompt_examples:
-            schema_prompt += f"""
+    Returns:
+        str: The shortened example, or the original one if no sentence contains a mention.
+    """
+    mentions_part = example_output[example_output.find('"mentions"') + len('"mentions"'):]
+    mentions = [mention.lower() for mention in re.findall(r'"((?:[^"\\]|\\.)+)"', mentions_part)]
+    sentences = re.split(r"(?<=[.!?])\s+", example_input)
+    kept = [sentence for sentence in sentences if any(mention in sentence.lower() for mention in mentions)]
+    return " ".join(kept) if kept else example_input
 
-            # Examples  
 
-            # {prompt_examples}"""
+def _compact(content):
+    """Strip the template indentation of a prompt and collapse blank lines."""
+    lines = [line.strip() for line in content.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
 
-        # If there are already extracted entities, add a warning
-        # if already_extracted_entities:
-        #     previous_entities_text = "\n".join([f"- {text_span} → {label}" for text_span, label in already_extracted_entities])
-        #     schema_prompt = f"""⚡ IMPORTANT CONTEXT ⚡
-        # The following entities have already been extracted with their respective classes:
-        # {previous_entities_text}
 
-        # ❗ DO NOT annotate these entities again under '{class_name}' or any other class.
+def build_named_entity_messages(schema, class_name, text, compression=None, retrieved_examples=None):
+    """
+    Build the chat messages of the extraction call of one named entity class.
 
-        # """ + schema_prompt
+    Without compression the prompt is the original one. Compression options
+    (see `utils.prompt_size.PROMPT_COMPRESSION_OPTIONS`) trade prompt tokens
+    for possible quality changes, to be measured with `utils.prompt_size`.
 
+    Args:
+        schema (dict or Schema): The schema containing class definitions.
+        class_name (str): The named entity class.
+        text (str): The document text.
+        compression (iterable): Prompt compression options.
+        retrieved_examples (list): Optional {"input", "output"} examples (see
+            `utils.example_retrieval.select_examples`). When given, they replace the
+            example annotation of the class and the fixed Gene example.
 
+    Returns:
+        tuple: (messages, schema_prompt).
+    """
+    compression = set(compression or ())
+
+    class_info = load_schema(schema).classes.get(class_name, {})
+    class_description = class_info.get("description", "")
+
+    # Generate schema prompt
+    class_intro = f"A '{class_name}' is defined as: {class_description}. " if class_description else ""
+    # Extract optional examples and rules
+    annotations = class_info.get("annotations", {})
+    prompt_examples = annotations.get("prompt.examples")
+    annotation_rules = annotations.get("annotation_rules")
+    example_input=annotations.get("example.input")
+    example_output=annotations.get("example.output")
+
+    # Build schema prompt
+    schema_prompt = (
+        f"Extract all mentions of entities of class '{class_name}' that are **explicitly** mentioned in the provided text. "
+        f"{class_intro} Return a list of all entity mentions for the class {class_name}."
+    )
 
+    # Add optional sections
+    if prompt_examples:
+        schema_prompt += f"""
 
-        # Extract response formats
-        schema_response_format = response_formats.get(class_name, {}).get("schemaResponseFormat")
-        # attribute_response_format = response_formats.get(class_name, {}).get("attributeResponseFormat")
+            # Examples  
 
-        combined_responses[class_name] = {"schemaResponse": None}
-        extracted_labels = []
+            # {prompt_examples}"""
 
-        instructions = f"""
-        Your task is to extract mentions of type '{class_name}' from the provided biomedical text. Rules are:
+    # The shared prefix names no class, so the system prompt is identical for every class
+    task = "the requested type" if "shared_prefix" in compression else f"type '{class_name}'"
+    instructions = f"""
+        Your task is to extract mentions of {task} from the provided biomedical text. Rules are:
         - Annotate only full, standalone words or word groups. Do NOT extract partial words.
         - Composite names (e.g., "short-chain fatty acids") must be labeled as one entity if meaningful.
         - Always extract the **longest valid version** of a mention, including important modifiers.
@@ -234,36 +273,56 @@ def process_named_entity_classes(
         - Mentions that overlap with previously extracted spans.
         """
 
-        if annotation_rules:
-            instructions += f"""
+    class_rules = ""
+    if annotation_rules:
+        class_rules = f"""
             * {annotation_rules}
         """
-            
-        print("===== SYSTEM PROMPT =====")
-        print(f"""
-            # Identity
 
-            You are an expert biomedical annotator working on structured entity extraction.
+    if "shorten_examples" in compression and example_input and example_output:
+        example_input = shorten_example(example_input, example_output)
 
-            # Instructions
+    examples = ""
+    if retrieved_examples:
+        for number, example in enumerate(retrieved_examples, start=1):
+            examples += f"""                        Example Input {number}:
+                         {example["input"]}
+                        Example Output {number}:
+                         {example["output"]}
 
-            {instructions}
+"""
+    elif example_input or example_output or "drop_empty_sections" not in compression:
+        examples += f"""                        Example Input 1:
+                         {example_input}
+                        Example Output 1:
+                         {example_output}
 
-            # Schema
+"""
+    if "drop_static_example" not in compression and not retrieved_examples:
+        examples += """                        Example Input 2:
+                        "The aggregation of gamma-synuclein (γsyn) in the brain is a hallmark of Parkinson’s disease."
 
-            {schema_prompt}
-            """)
+                        Example Output 2:
+                        {
+                          "Gene": {
+                            "schemaResponse": {
+                              "mentions": [
+                                "gamma-synuclein",
+                                "γsyn"
+                              ]
+                            }
+                          }
+                        }
+"""
+    if examples:
+        examples = f"""
+                         # Examples
 
-        # Call GPT for schema response
-        if schema_response_format:
-            print(schema_response_format["json_schema"])
-            try:
-                schema_response = client.chat.completions.create(
-                    model="gpt-4o-2024-08-06",
-                    messages = [
-                      {
-                          "role": "system",
-                          "content": f"""
+{examples}"""
+
+    if "shared_prefix" in compression:
+        # Identical system prompt and text for every class, so providers can reuse the cached prefix
+        system_content = f"""
                   
                   # Identity
 
@@ -272,46 +331,175 @@ def process_named_entity_classes(
                   # Instructions
 
                   {instructions}
+                  """
+        user_content = f"""
+                        
+                          Extract mentions from the following input:
+                          "{text}"
+
+                         # Schema
+
+                          {schema_prompt}
+                          {class_rules}
+{examples}                          """
+    else:
+        system_content = f"""
+                  
+                  # Identity
+
+                  You are an expert biomedical annotator working on structured entity extraction.
+
+                  # Instructions
+
+                  {instructions + class_rules}
 
                   # Schema
 
                   {schema_prompt}
                   """
-                      },
-                      {
-                          "role": "user",
-                          "content": f"""
+        user_content = f"""
                         
                           Extract mentions from the following input:
                           "{text}"
+{examples}                          """
 
-                         # Examples
+    if "compact_whitespace" in compression:
+        system_content, user_content = _compact(system_content), _compact(user_content)
 
-                        Example Input 1:
-                         {example_input}
-                        Example Output 1:
-                         {example_output}
+    messages = [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": user_content}
+    ]
+    return messages, schema_prompt
 
-                        Example Input 2:
-                        "The aggregation of gamma-synuclein (γsyn) in the brain is a hallmark of Parkinson’s disease."
 
-                        Example Output 2:
-                        {{
-                          "Gene": {{
-                            "schemaResponse": {{
-                              "mentions": [
-                                "gamma-synuclein",
-                                "γsyn"
-                              ]
-                            }}
-                          }}
-                        }}
-                          """
-                      }
-                  ],
-                    response_format={"type": "json_schema", "json_schema": schema_response_format["json_schema"]}
+def process_named_entity_classes(
+    named_entity_classes, schema_path, text_sample_path, response_formats_path, output_responses_path, prompts_save_path,
+    triage=False, triage_model="gpt-4o-mini", known_present_classes=None, stream=False, compression=None,
+    example_index=None, examples_per_class=3, example_token_budget=150, exclude_example_pmids=()
+):
+    """
+    Generate prompts, call GPT for named entity extraction, and save results.
+
+    Args:
+        named_entity_classes (dict): Named entity classes to process.
+        schema_path (str or Schema): Path to the schema JSON file, or an already loaded Schema.
+        text_sample_path (str): Path to the input text sample file.
+        response_formats_path (str): Path to the response formats JSON file.
+        output_responses_path (str): Path to save the extracted responses.
+        prompts_save_path (str): Path to save the generated prompts.
+        triage (bool): If True, first ask `triage_model` which classes are present
+            and only run full extraction for those.
+        triage_model (str): Model used for the triage call.
+        known_present_classes (iterable): Classes that must never be skipped by triage.
+        stream (bool): If True, stream each structured output and locate every mention in
+            the text as soon as it is complete, while the model is still generating.
+        compression (iterable): Prompt compression options, see `build_named_entity_messages`.
+        example_index (dict): Optional BM25 index of annotated examples (see
+            `utils.example_retrieval.load_example_index`). The examples of each class
+            most similar to the text replace the static ones in its prompt.
+        examples_per_class (int): Maximum number of retrieved examples per class.
+        example_token_budget (int): Maximum number of tokens of the retrieved examples of a class.
+        exclude_example_pmids (iterable): PMIDs whose annotations must not be used as examples.
+
+    Returns:
+        dict: Mentions located while streaming, {mention: [(location, start_idx, end_idx)]}
+            (empty unless `stream` is set), to pass to `convert_extracted_to_span_annotated`.
+            Generated responses and prompts are saved to their respective files.
+    """
+    from utils.example_retrieval import select_examples
+    from utils.response_streaming import MentionStreamParser, iter_streamed_mentions
+    from utils.response_validation import parse_response, response_to_dict
+    from utils.span_locator import locate_mention
+
+
+
+
+    # Load schema and text
+    schema = load_schema(schema_path)
+
+    with open(text_sample_path, "r", encoding='utf-8') as file:
+        text = file.read()
+    # Ensure consistent Unicode handling
+    #text = text.encode('utf-8').decode('unicode-escape')
+    print(text)
+    # text_safe = text.encode("unicode_escape").decode("utf-8").replace("{", "{{").replace("}", "}}")
+    # text = text.encode("utf-8").decode("unicode_escape")
+    # Load response formats
+    response_formats = load_response_formats(response_formats_path)
+    sections = split_title_abstract(text)
+    located_mentions = {}
+
+    combined_responses = {}
+    generated_prompts = {}
+    already_extracted_entities = []  # List of tuples (entity_text, label)
+
+
+    # Extract schema title and description
+    schema_title = schema.get("title", "")
+    schema_description = schema.get("description", "")
+    schema_intro = (
+        f"The schema is titled '{schema_title}' and described as follows: {schema_description}"
+        if schema_title and schema_description
+        else f"the schema is described as follows: {schema_description}"
+        if schema_description
+        else f"The schema is titled '{schema_title}'"
+        if schema_title
+        else ""
+    )
+
+    # Optionally skip classes that a cheap triage call reports as absent
+    present_classes = (
+        triage_named_entity_classes(named_entity_classes, schema, text, triage_model, known_present_classes)
+        if triage else list(named_entity_classes)
+    )
+
+    # Process each named entity class
+    for class_name, details in named_entity_classes.items():
+        if class_name not in present_classes:
+            combined_responses[class_name] = {"schemaResponse": {"mentions": []}}
+            print(f"⏭️ Skipping {class_name}: not present according to triage")
+            continue
+
+        # Extract response formats
+        schema_response_format = response_formats.get(class_name, {}).get("schemaResponseFormat")
+        # attribute_response_format = response_formats.get(class_name, {}).get("attributeResponseFormat")
+
+        combined_responses[class_name] = {"schemaResponse": None}
+        extracted_labels = []
+
+        retrieved_examples = None
+        if example_index is not None:
+            retrieved_examples = select_examples(
+                example_index, text, CLASS_NAME_TO_LABEL.get(class_name, class_name),
+                examples_per_class, example_token_budget, exclude_example_pmids
+            )
+        messages, schema_prompt = build_named_entity_messages(schema, class_name, text, compression, retrieved_examples)
+
+        print("===== SYSTEM PROMPT =====")
+        print(messages[0]["content"])
+
+        # Call GPT for schema response
+        if schema_response_format:
+            print(schema_response_format["json_schema"])
+            try:
+                schema_response = get_client().chat.completions.create(
+                    model="gpt-4o-2024-08-06",
+                    messages=messages,
+                    response_format={"type": "json_schema", "json_schema": schema_response_format["json_schema"]},
+                    stream=stream
                 )
-                schema_response_json = json.loads(schema_response.choices[0].message.content)
+                if stream:
+                    # Locate mentions as they arrive, overlapping alignment with generation
+                    parser = MentionStreamParser()
+                    for mention in iter_streamed_mentions(schema_response, parser):
+                        mention = mention.strip()
+                        if mention and mention not in located_mentions:
+                            located_mentions[mention] = locate_mention(mention, sections)
+                    content = parser.content
+                else:
+                    content = schema_response.choices[0].message.content
+                schema_response_json = response_to_dict(parse_response(content, schema_response_format))
                 combined_responses[class_name]["schemaResponse"] = schema_response_json
                 extracted_labels = list(schema_response_json.values())[0] if schema_response_json else []
                 # Save the extracted labels to the already_extracted_entities list
@@ -341,6 +529,9 @@ def process_named_entity_classes(
     convert_extracted_to_span_annotated(
       output_responses_path="output/generated_responses.json",
       text_sample_path=text_sample_path,
-      final_output_path="converted_entities_with_spans.json"
+      final_output_path="converted_entities_with_spans.json",
+      located_mentions=located_mentions
     )
 
+    return located_mentions
+
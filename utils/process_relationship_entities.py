@@ -1,11 +1,133 @@
 import json
-from openai import OpenAI
 
-# Initialize OpenAI client
+from utils.openai_client import get_client
+from utils.response_formats import load_response_formats
+from utils.schema import load_schema
+
+
+def build_relationship_prompt(schema, class_name, existing_responses, compression=None):
+    """
+    Build the extraction prompt of a relationship class, listing the instances found for its subject and
+    object, and for n-ary relationships for each further argument.
+
+    Args:
+        schema (dict or Schema): The schema containing class definitions.
+        class_name (str): The relationship class.
+        existing_responses (dict): Responses of the previous stages, keyed by class name.
+        compression (iterable): Prompt compression options (see `utils.prompt_size.PROMPT_COMPRESSION_OPTIONS`);
+            "dedupe_identifiers" lists each identifier once.
+
+    Returns:
+        str: The prompt.
+    """
+    schema = load_schema(schema)
+    compression = set(compression or ())
+
+    # Extract details from schema
+    class_info = schema["classes"].get(class_name, {})
+    subject_info = class_info["attributes"].get("subject", {})
+    object_info = class_info["attributes"].get("object", {})
+    predicate_class = class_info["attributes"].get("predicate", {}).get("range", "")
+
+    # Extract schema title and description
+    schema_title = schema.get("title", "")
+    schema_description = schema.get("description", "")
+    schema_intro = (
+        f"The schema is titled '{schema_title}' and described as follows: {schema_description}."
+        if schema_title and schema_description
+        else f"the schema is described as follows: {schema_description}."
+        if schema_description
+        else f"The schema is titled '{schema_title}'"
+        if schema_title
+        else ""
+    )
+
+    # Ranges resolved to the class names the responses are keyed by
+    subject_class = schema.relationship_ranges[class_name]["subject"]
+    object_class = schema.relationship_ranges[class_name]["object"]
+
+    # Retrieve predicate value
+    predicate_value = schema.predicate_patterns.get(class_name, "")
+
+    # ✅ Extract cardinalities dynamically (if they exist)
+    subject_min_cardinality = subject_info.get("minimum_cardinality")
+    subject_max_cardinality = subject_info.get("maximum_cardinality")
+
+    object_min_cardinality = object_info.get("minimum_cardinality")
+    object_max_cardinality = object_info.get("maximum_cardinality")
+
+    # Extract attributes and their descriptions
+    attribute_details = [
+        f"{attr_name} ({attr_info.get('description', '')})"
+        for attr_name, attr_info in class_info.get("attributes", {}).items()
+        if attr_name not in ["subject", "object", "predicate"]  # Exclude relationship keys
+    ]
+
+    # Extract identified instances of subject and object from generated_responses.json
+    subject_instances = existing_responses.get(subject_class, {}).get("schemaResponse", {})
+    subject_identifiers = list(subject_instances.values())[0] if subject_instances else []
+
+    object_instances = existing_responses.get(object_class, {}).get("schemaResponse", {})
+    object_identifiers = list(object_instances.values())[0] if object_instances else []
+
+    # ✅ Construct dynamic prompt
+    description_text = f"The '{predicate_value}' relationship is described as follows: \"{class_info.get('description', '')}\"\n" if class_info.get("description") else ""
+    if "dedupe_identifiers" in compression:
+        # Each identifier once, and one shared list when subject and object instances are the same
+        subject_identifiers = list(dict.fromkeys(subject_identifiers))
+        object_identifiers = list(dict.fromkeys(object_identifiers))
+        if subject_identifiers == object_identifiers:
+            instances_text = f"{', '.join(subject_identifiers)} of the classes '{subject_class}' and '{object_class}'. "
+        else:
+            instances_text = f"{', '.join(subject_identifiers)} of the class '{subject_class}' and instances {', '.join(object_identifiers)} of the class '{object_class}'. "
+    else:
+        instances_text = f"{', '.join(subject_identifiers)} of the class '{subject_class}' and instances {', '.join(object_identifiers)} of the class '{object_class}'. "
+
+    # n-ary relationships: instances of the further arguments, one set per role
+    for role, argument_class in schema.relationship_arguments(class_name).items():
+        if role in ("subject", "object"):
+            continue
+        argument_instances = existing_responses.get(argument_class, {}).get("schemaResponse", {})
+        argument_identifiers = list(argument_instances.values())[0] if argument_instances else []
+        if "dedupe_identifiers" in compression:
+            argument_identifiers = list(dict.fromkeys(argument_identifiers))
+        instances_text += f"The '{role}' must be one of the instances {', '.join(argument_identifiers)} of the class '{argument_class}'. "
+    prompt = (
+        f"{schema_intro} Your task is to extract relationships of predicate '{predicate_value}' (and its synonyms) between entities of class '{subject_class}' and '{object_class}' "
+        f"that are **explicitly mentioned in the provided text**.  **If a protein is not explicitly written in the text, do not include it in the response, even if it is commonly associated with the entities mentioned.** The extraction should be strictly limited to the words present in the text."
+        f"{description_text}"
+        f"From the text below, you have to identify and extract relationships of predicate '{predicate_value}' among instances: "
+        f"{instances_text}"
+        f"Entities involved in '{predicate_value}' relationships must belong to these sets.\n"
+    )
+
+    # ✅ Only include cardinality constraints if they exist
+    if (subject_min_cardinality is not None and subject_max_cardinality is not None) or \
+       (object_min_cardinality is not None and object_max_cardinality is not None):
+
+        prompt += "Cardinality constraints:\n"
+
+        if subject_min_cardinality is not None and subject_max_cardinality is not None:
+            prompt += (
+                f"- A '{object_class}' can be followed by a minimum of {subject_min_cardinality} and a maximum of {subject_max_cardinality} '{subject_class}'.\n"
+            )
+
+        if object_min_cardinality is not None and object_max_cardinality is not None:
+            prompt += (
+                f"- A '{subject_class}' can follow a minimum of {object_min_cardinality} and a maximum of {object_max_cardinality} '{object_class}'.\n"
+            )
+
+        prompt += "\n"
+
+    # ✅ Add extracted attributes
+    prompt += f"Extract and include the following attributes for each relationship:\n{', '.join(attribute_details)}.\n"
+
+    return prompt
+
 
 def call_gpt_for_relationship_extraction(
     response_formats_path, text_sample_path, prompts_save_path, 
-    two_dependency_classes, schema_path, generated_responses_path
+    two_dependency_classes, schema_path, generated_responses_path, compression=None
 ):
     """
     Call GPT to process relationship-type entity extraction using generated response formats.
@@ -15,20 +137,22 @@ def call_gpt_for_relationship_extraction(
         response_formats_path (str): Path to the response formats JSON file.
         text_sample_path (str): Path to the text sample file.
         prompts_save_path (str): Path to save the generated prompts.
-        two_dependency_classes (dict): Dictionary containing relationship-type classes.
-        schema_path (str): Path to the JSON schema file.
+        two_dependency_classes (dict): Relationship classes to extract, with their dependencies
+            (two, or more for n-ary relationships).
+        schema_path (str or Schema): Path to the JSON schema file, or an already loaded Schema.
         generated_responses_path (str): Path to the file containing previously identified instances.
+        compression (iterable): Prompt compression options, see `build_relationship_prompt`.
 
     Returns:
         None: Saves the generated responses and prompts.
     """
+    from utils.response_validation import parse_response, response_to_dict
+
     # Load response formats
-    with open(response_formats_path, "r") as schema_file:
-        response_formats = json.load(schema_file)
+    response_formats = load_response_formats(response_formats_path)
 
     # Load schema
-    with open(schema_path, "r") as schema_file:
-        schema = json.load(schema_file)
+    schema = load_schema(schema_path)
 
     # Load identified instances from previous entity extraction
     with open(generated_responses_path, "r") as responses_file:
@@ -47,90 +171,14 @@ def call_gpt_for_relationship_extraction(
             response_format = response_formats[class_name].get("responseFormat", None)
 
             if response_format:
-                # Extract details from schema
-                class_info = schema["classes"].get(class_name, {})
-                subject_info = class_info["attributes"].get("subject", {})
-                object_info = class_info["attributes"].get("object", {})
-                predicate_class = class_info["attributes"].get("predicate", {}).get("range", "")
-
-                    # Extract schema title and description
-                schema_title = schema.get("title", "")
-                schema_description = schema.get("description", "")
-                schema_intro = (
-                    f"The schema is titled '{schema_title}' and described as follows: {schema_description}."
-                    if schema_title and schema_description
-                    else f"the schema is described as follows: {schema_description}."
-                    if schema_description
-                    else f"The schema is titled '{schema_title}'"
-                    if schema_title
-                    else ""
-                )
-
-                subject_class = subject_info.get("range", "")
-                object_class = object_info.get("range", "")
-
-                # Retrieve predicate value
-                predicate_value = schema["classes"].get(predicate_class, {}).get("attributes", {}).get("id", {}).get("pattern", "")
-
-                # ✅ Extract cardinalities dynamically (if they exist)
-                subject_min_cardinality = subject_info.get("minimum_cardinality")
-                subject_max_cardinality = subject_info.get("maximum_cardinality")
-
-                object_min_cardinality = object_info.get("minimum_cardinality")
-                object_max_cardinality = object_info.get("maximum_cardinality")
-
-                # Extract attributes and their descriptions
-                attribute_details = [
-                    f"{attr_name} ({attr_info.get('description', '')})"
-                    for attr_name, attr_info in class_info.get("attributes", {}).items()
-                    if attr_name not in ["subject", "object", "predicate"]  # Exclude relationship keys
-                ]
-
-                # Extract identified instances of subject and object from generated_responses.json
-                subject_instances = existing_responses.get(subject_class, {}).get("schemaResponse", {})
-                subject_identifiers = list(subject_instances.values())[0] if subject_instances else []
-
-                object_instances = existing_responses.get(object_class, {}).get("schemaResponse", {})
-                object_identifiers = list(object_instances.values())[0] if object_instances else []
-
-                # ✅ Construct dynamic prompt
-                description_text = f"The '{predicate_value}' relationship is described as follows: \"{class_info.get('description', '')}\"\n" if class_info.get("description") else ""
-                prompt = (
-                    f"{schema_intro} Your task is to extract relationships of predicate '{predicate_value}' (and its synonyms) between entities of class '{subject_class}' and '{object_class}' "
-                    f"that are **explicitly mentioned in the provided text**.  **If a protein is not explicitly written in the text, do not include it in the response, even if it is commonly associated with the entities mentioned.** The extraction should be strictly limited to the words present in the text."
-                    f"{description_text}"
-                    f"From the text below, you have to identify and extract relationships of predicate '{predicate_value}' among instances: "
-                    f"{', '.join(subject_identifiers)} of the class '{subject_class}' and instances {', '.join(object_identifiers)} of the class '{object_class}'. "
-                    f"Entities involved in '{predicate_value}' relationships must belong to these sets.\n"
-                )
-
-                # ✅ Only include cardinality constraints if they exist
-                if (subject_min_cardinality is not None and subject_max_cardinality is not None) or \
-                   (object_min_cardinality is not None and object_max_cardinality is not None):
-
-                    prompt += "Cardinality constraints:\n"
-
-                    if subject_min_cardinality is not None and subject_max_cardinality is not None:
-                        prompt += (
-                            f"- A '{object_class}' can be followed by a minimum of {subject_min_cardinality} and a maximum of {subject_max_cardinality} '{subject_class}'.\n"
-                        )
-
-                    if object_min_cardinality is not None and object_max_cardinality is not None:
-                        prompt += (
-                            f"- A '{subject_class}' can follow a minimum of {object_min_cardinality} and a maximum of {object_max_cardinality} '{object_class}'.\n"
-                        )
-
-                    prompt += "\n"
-
-                # ✅ Add extracted attributes
-                prompt += f"Extract and include the following attributes for each relationship:\n{', '.join(attribute_details)}.\n"
+                prompt = build_relationship_prompt(schema, class_name, existing_responses, compression)
 
                 # Save the prompt for this class
                 generated_prompts[class_name] = prompt
 
                 try:
                     print(f"Processing relationship extraction for class: {class_name}")
-                    schema_response = client.chat.completions.create(
+                    schema_response = get_client().chat.completions.create(
                         model="gpt-4o-2024-08-06",
                         messages=[
                             {"role": "system", "content": "You are an expert in entity and relation extraction from plain text."},
@@ -140,7 +188,9 @@ def call_gpt_for_relationship_extraction(
                         response_format=response_format
                     )
 
-                    combined_responses[class_name] = json.loads(schema_response.choices[0].message.content)
+                    combined_responses[class_name] = response_to_dict(
+                        parse_response(schema_response.choices[0].message.content, response_format)
+                    )
                     print(f"✅ Result for {class_name}: {combined_responses[class_name]}")
                 except Exception as e:
                     print(f"❌ Error processing {class_name}: {e}")
@@ -172,19 +222,19 @@ def call_gpt_for_relationship_extraction_without_dependencies(
         text_sample_path (str): Path to the text sample file.
         prompts_save_path (str): Path to save the generated prompts.
         two_dependency_classes (dict): Dictionary containing relationship-type classes.
-        schema_path (str): Path to the JSON schema file.
+        schema_path (str or Schema): Path to the JSON schema file, or an already loaded Schema.
         generated_responses_path (str): Path to the file containing previously identified instances.
 
     Returns:
         None: Saves the generated responses and prompts.
     """
+    from utils.response_validation import parse_response, response_to_dict
+
     # Load response formats
-    with open(response_formats_path, "r") as schema_file:
-        response_formats = json.load(schema_file)
+    response_formats = load_response_formats(response_formats_path)
 
     # Load schema
-    with open(schema_path, "r") as schema_file:
-        schema = json.load(schema_file)
+    schema = load_schema(schema_path)
 
     # Load identified instances from previous entity extraction
     with open(generated_responses_path, "r") as responses_file:
@@ -222,8 +272,9 @@ def call_gpt_for_relationship_extraction_without_dependencies(
                     else ""
                 )
 
-                subject_class = subject_info.get("range", "")
-                object_class = object_info.get("range", "")
+                # Ranges resolved to the class names the responses are keyed by
+                subject_class = schema.relationship_ranges[class_name]["subject"]
+                object_class = schema.relationship_ranges[class_name]["object"]
 
                 subject_description = schema["classes"].get(subject_class, {}).get("description", "")
                 object_description = schema["classes"].get(object_class, {}).get("description", "")
@@ -232,7 +283,7 @@ def call_gpt_for_relationship_extraction_without_dependencies(
                 object_desc_text = f"A '{object_class}' is defined as: {object_description}.\n" if object_description else ""
 
                 # Retrieve predicate value
-                predicate_value = schema["classes"].get(predicate_class, {}).get("attributes", {}).get("id", {}).get("pattern", "")
+                predicate_value = schema.predicate_patterns.get(class_name, "")
 
                 predicate_parts = predicate_value.split("|")
                 if len(predicate_parts) > 1:
@@ -301,7 +352,7 @@ def call_gpt_for_relationship_extraction_without_dependencies(
 
                 try:
                     print(f"Processing relationship extraction for class: {class_name}")
-                    schema_response = client.chat.completions.create(
+                    schema_response = get_client().chat.completions.create(
                         model="gpt-4o-2024-08-06",
                         messages=[
                             {"role": "system", "content": "You are an expert in entity and relation extraction from plain text."},
@@ -311,7 +362,9 @@ def call_gpt_for_relationship_extraction_without_dependencies(
                         response_format=response_format
                     )
 
-                    combined_responses[class_name] = json.loads(schema_response.choices[0].message.content)
+                    combined_responses[class_name] = response_to_dict(
+                        parse_response(schema_response.choices[0].message.content, response_format)
+                    )
                     print(f"✅ Result for {class_name}: {combined_responses[class_name]}")
                 except Exception as e:
                     print(f"❌ Error processing {class_name}: {e}")
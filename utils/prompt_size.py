@@ -0,0 +1,294 @@
+import argparse
+import json
+
+from utils.example_retrieval import load_example_index, select_examples
+from utils.extract_named_entity_classes import extract_named_entity_classes
+from utils.process_dependent_classes import schedule_dependent_classes
+from utils.process_inherited_entities import build_inherited_prompts
+from utils.process_named_entities import CLASS_NAME_TO_LABEL, build_named_entity_messages
+from utils.process_relationship_entities import build_relationship_prompt
+from utils.response_formats import load_response_formats
+from utils.schema import load_schema
+
+PROMPT_COMPRESSION_OPTIONS = {
+    "shared_prefix": "Same system prompt for every class and the text first, so the prefix is cached by the provider",
+    "compact_whitespace": "Strip the indentation of the prompt templates",
+    "drop_empty_sections": "Omit the example section of classes that have no example annotation",
+    "drop_static_example": "Omit the fixed gamma-synuclein Gene example",
+    "shorten_examples": "Keep only the example sentences that contain an expected mention",
+    "dedupe_identifiers": "List each relationship argument once, and subject/object instances once when identical",
+}
+
+RELATIONSHIP_SYSTEM_PROMPT = "You are an expert in entity and relation extraction from plain text."
+
+# Loaded tiktoken encoding, False when tiktoken is not installed
+_encoding = None
+
+
+def count_tokens(text):
+    """
+    Count the tokens of a text with tiktoken when it is installed, else estimate them as one per 4 characters.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except ImportError:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _add_call(sizes, class_name, messages):
+    chars = sum(len(message["content"]) for message in messages)
+    tokens = sum(count_tokens(message["content"]) for message in messages)
+    class_sizes = sizes.setdefault(class_name, {"calls": 0, "chars": 0, "tokens": 0})
+    class_sizes["calls"] += 1
+    class_sizes["chars"] += chars
+    class_sizes["tokens"] += tokens
+
+
+def _messages(prompt, text):
+    return [
+        {"role": "system", "content": RELATIONSHIP_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+        {"role": "user", "content": f"Text:\n{text}"}
+    ]
+
+
+def prompt_size_report(
+    dataset_path="dev.json", schema_path="generated/schema.json", compression=None,
+    named_entity_classes=None, responses_by_pmid_path=None, example_index=None, examples_per_class=3,
+    example_token_budget=150, class_dependencies_path="generated/class_dependencies.json",
+    inherited_response_formats_path="generated/response_formats/inherited_response_formats.json"
+):
+    """
+    Measure the input size of every extraction call of a corpus, per stage and class, without calling the API.
+
+    The named entity stage is rebuilt for every document. The inherited and
+    relationship stages need the identifiers found by the previous stages, so
+    they are only measured when `responses_by_pmid_path` (as saved by
+    `run_named_entity_corpus` with `class_dependencies_path`) is given. An
+    inherited class is measured when its parent has instances, with one call
+    per response format it has (schema and attributes); the attribute prompt
+    is measured without the identifiers found by the schema call.
+
+    Args:
+        dataset_path (str): Corpus {pmid: {"title", "abstract"}}, with or without a "metadata" level.
+        schema_path (str or Schema): Path to the schema JSON file, or an already loaded Schema.
+        compression (iterable): Prompt compression options (see PROMPT_COMPRESSION_OPTIONS).
+        named_entity_classes (dict): Classes to measure. Defaults to every NamedEntity class of the schema.
+        responses_by_pmid_path (str): Optional {pmid: responses} file for the relationship stage.
+        example_index (dict): Optional few-shot example index, see `process_named_entity_classes`.
+        examples_per_class (int): Maximum number of retrieved examples per class.
+        example_token_budget (int): Maximum number of tokens of the retrieved examples of a class.
+        class_dependencies_path (str): Dependencies giving the parent of every inherited class.
+        inherited_response_formats_path (str): Response formats of the inherited classes.
+
+    Returns:
+        dict: {"stages": {stage: {class_name: {"calls", "chars", "tokens"}}}, "documents",
+            "tokens", "tokens_per_document", "exact_tokens"}.
+    """
+    schema = load_schema(schema_path)
+    if named_entity_classes is None:
+        named_entity_classes = extract_named_entity_classes(schema)
+
+    with open(dataset_path, "r", encoding="utf-8") as file:
+        dataset = json.load(file)
+    responses_by_pmid, inherited_classes, inherited_formats = {}, {}, {}
+    if responses_by_pmid_path:
+        with open(responses_by_pmid_path, "r", encoding="utf-8") as file:
+            responses_by_pmid = json.load(file)
+        for wave in schedule_dependent_classes(class_dependencies_path, schema):
+            inherited_classes.update(wave["inherited"])
+        inherited_formats = load_response_formats(inherited_response_formats_path)
+
+    stages = {"named_entity": {}, "inherited": {}, "relationship": {}}
+    for pmid, doc in dataset.items():
+        metadata = doc.get("metadata", doc)
+        text = f'title: "{metadata.get("title", "")}"\nabstract: "{metadata.get("abstract", "")}"'
+
+        for class_name in named_entity_classes:
+            retrieved_examples = None
+            if example_index is not None:
+                retrieved_examples = select_examples(
+                    example_index, text, CLASS_NAME_TO_LABEL.get(class_name, class_name),
+                    examples_per_class, example_token_budget, (pmid,)
+                )
+            messages, _ = build_named_entity_messages(schema, class_name, text, compression, retrieved_examples)
+            _add_call(stages["named_entity"], class_name, messages)
+
+        if pmid in responses_by_pmid:
+            for child_class, parent_class in inherited_classes.items():
+                prompts = build_inherited_prompts(schema, child_class, parent_class, responses_by_pmid[pmid])
+                if prompts is None:
+                    continue
+                formats = inherited_formats.get(child_class, {})
+                for prompt, format_name in zip(prompts, ("schemaResponseFormat", "attributeResponseFormat")):
+                    if formats.get(format_name):
+                        _add_call(stages["inherited"], child_class, _messages(prompt, text))
+
+            for class_name in schema.relationship_ranges:
+                prompt = build_relationship_prompt(schema, class_name, responses_by_pmid[pmid], compression)
+                _add_call(stages["relationship"], class_name, _messages(prompt, text))
+
+    total_tokens = sum(sizes["tokens"] for stage in stages.values() for sizes in stage.values())
+    return {
+        "stages": stages,
+        "documents": len(dataset),
+        "tokens": total_tokens,
+        "tokens_per_document": total_tokens / len(dataset) if dataset else 0.0,
+        "exact_tokens": bool(_encoding),
+    }
+
+
+def evaluate_compression(
+    variants, gold_path, dataset_path="dev.json", schema_path="generated/schema.json", class_dependencies_path=None,
+    **corpus_options
+):
+    """
+    Run the pipeline once per compression variant and score each run against gold annotations.
+
+    Every run calls the API. NER scores come from the live scoring of
+    `run_named_entity_corpus`, i.e. the same NER scores as `challenge_eval.py`.
+    With `class_dependencies_path`, the inherited and relationship classes are
+    extracted too, and the relation submissions built from them (see
+    `utils.relation_submissions`) are scored on the 6.2 / 6.3 / 6.4 subtasks,
+    which is where relationship-only options such as "dedupe_identifiers" show up.
+
+    Args:
+        variants (dict): {variant name: compression options}.
+        gold_path (str): Gold annotations of the corpus (with relations, to score the relation subtasks).
+        dataset_path (str): Corpus to extract.
+        schema_path (str or Schema): Path to the schema JSON file, or an already loaded Schema.
+        class_dependencies_path (str): Optional path to class_dependencies.json, to also run and score relations.
+        **corpus_options: Extra arguments for `run_named_entity_corpus`.
+
+    Returns:
+        list: One row {"variant", "compression", "tokens_per_document", "micro_f1", "macro_f1",
+            "relation_micro_f1"} per variant. "relation_micro_f1" maps each relation subtask to
+            its micro F1, or is None without `class_dependencies_path`.
+    """
+    from challenge_eval import index_ground_truth, score_predictions
+    from utils.relation_submissions import RELATION_SUBTASKS, build_relation_submissions
+    from utils.run_corpus import run_named_entity_corpus
+
+    schema = load_schema(schema_path)
+    relation_index = None
+    if class_dependencies_path:
+        with open(gold_path, "r", encoding="utf-8") as file:
+            relation_index = index_ground_truth(json.load(file), RELATION_SUBTASKS)
+
+    rows = []
+    for name, compression in variants.items():
+        responses_by_pmid_path = f"output/compression_{name}_responses.json" if class_dependencies_path else None
+        predictions, scores = run_named_entity_corpus(
+            dataset_path=dataset_path,
+            final_predictions_path=f"output/compression_{name}_predictions.json",
+            schema_path=schema,
+            gold_path=gold_path,
+            responses_by_pmid_path=responses_by_pmid_path,
+            class_dependencies_path=class_dependencies_path,
+            compression=compression,
+            **corpus_options
+        )
+        # Measured after the run, so the later stages see the identifiers it found
+        size = prompt_size_report(
+            dataset_path, schema, compression, responses_by_pmid_path=responses_by_pmid_path,
+            example_index=corpus_options.get("example_index"), class_dependencies_path=class_dependencies_path
+        )
+
+        relation_scores = None
+        if relation_index is not None:
+            with open(responses_by_pmid_path, "r", encoding="utf-8") as file:
+                responses_by_pmid = json.load(file)
+            submissions = build_relation_submissions(responses_by_pmid, predictions, schema)
+            relation_scores = {
+                subtask: score_predictions(submissions[subtask], relation_index, [subtask], report=False)[subtask][5]
+                for subtask in RELATION_SUBTASKS
+            }
+
+        ner_scores = (scores or {}).get("NER")
+        rows.append({
+            "variant": name,
+            "compression": list(compression),
+            "tokens_per_document": size["tokens_per_document"],
+            "micro_f1": ner_scores[5] if ner_scores else None,
+            "macro_f1": ner_scores[2] if ner_scores else None,
+            "relation_micro_f1": relation_scores,
+        })
+    return rows
+
+
+def _parse_variant(value):
+    name, _, options = value.partition("=")
+    options = [option for option in options.split(",") if option]
+    unknown = [option for option in options if option not in PROMPT_COMPRESSION_OPTIONS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown compression options: {', '.join(unknown)}")
+    return name, options
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Prompt size per class and stage, for each prompt compression variant.")
+    parser.add_argument("--dataset", default="dev.json")
+    parser.add_argument("--schema", default="generated/schema.json")
+    parser.add_argument("--responses-by-pmid", help="Responses saved by run_named_entity_corpus, to measure the relationship stage.")
+    parser.add_argument("--variant", action="append", type=_parse_variant,
+                        help="name=option1,option2 (repeatable). Defaults to 'original', each option alone, and 'all'.")
+    parser.add_argument("--examples-from", nargs="+",
+                        help="Annotated corpora to retrieve few-shot examples from (see utils/example_retrieval.py).")
+    parser.add_argument("--evaluate", action="store_true", help="Also run each variant (API calls) and score it against --gold.")
+    parser.add_argument("--gold", help="Gold annotations for --evaluate.")
+    parser.add_argument("--class-dependencies",
+                        help="class_dependencies.json: with --evaluate, also extract relations and score the relation subtasks.")
+    parser.add_argument("--output", help="Optional path to save the report as JSON.")
+    args = parser.parse_args()
+
+    variants = dict(args.variant) if args.variant else {
+        "original": [],
+        **{option: [option] for option in PROMPT_COMPRESSION_OPTIONS},
+        "all": list(PROMPT_COMPRESSION_OPTIONS),
+    }
+
+    example_index = load_example_index(args.examples_from) if args.examples_from else None
+
+    report = {}
+    for name, compression in variants.items():
+        report[name] = prompt_size_report(
+            args.dataset, args.schema, compression, responses_by_pmid_path=args.responses_by_pmid, example_index=example_index
+        )
+
+    baseline = next(iter(report.values()))["tokens_per_document"]
+    unit = "tokens" if next(iter(report.values()))["exact_tokens"] else "tokens (estimated, 4 chars/token)"
+    print(f"\n=== Input {unit} per document ===")
+    for name, size in report.items():
+        saved = 1 - size["tokens_per_document"] / baseline if baseline else 0.0
+        print(f"{name}: {size['tokens_per_document']:.0f} ({saved:+.1%} saved)")
+
+    first = next(iter(report))
+    for stage, classes in report[first]["stages"].items():
+        if classes:
+            print(f"\n=== {stage} ({first}), tokens per call ===")
+            for class_name, sizes in classes.items():
+                print(f"{class_name}: {sizes['tokens'] / sizes['calls']:.0f}")
+
+    if args.evaluate:
+        if not args.gold:
+            parser.error("--evaluate needs --gold")
+        rows = evaluate_compression(
+            variants, args.gold, args.dataset, args.schema, args.class_dependencies, example_index=example_index
+        )
+        print("\n=== NER F1 per variant ===")
+        for row in rows:
+            print(f"{row['variant']}: {row['tokens_per_document']:.0f} tokens/doc, micro F1={row['micro_f1']}, macro F1={row['macro_f1']}")
+            if row["relation_micro_f1"]:
+                print("    relations micro F1: " + ", ".join(f"{subtask}={f1:.4f}" for subtask, f1 in row["relation_micro_f1"].items()))
+        report = {"sizes": report, "evaluation": rows}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4)
+        print(f"\n📁 Report saved to {args.output}")
@@ -0,0 +1,203 @@
+import json
+
+from challenge_eval import (
+    LEGAL_RELATION_LABELS, PREDICTIONS_PATH_6_2, PREDICTIONS_PATH_6_3, PREDICTIONS_PATH_6_4, SUBTASK_FIELDS
+)
+from utils.process_named_entities import CLASS_NAME_TO_LABEL
+from utils.schema import RANGE_ALIASES, load_schema
+from utils.span_alignment import normalize_text
+
+RELATION_SUBTASKS = ["binary_tag_RE", "ternary_tag_RE", "ternary_mention_RE"]
+
+DEFAULT_SUBMISSION_PATHS = {
+    "binary_tag_RE": PREDICTIONS_PATH_6_2,
+    "ternary_tag_RE": PREDICTIONS_PATH_6_3,
+    "ternary_mention_RE": PREDICTIONS_PATH_6_4,
+}
+
+
+def range_to_label(range_name):
+    """Map a subject / object range of a relationship class to its final entity label."""
+    class_name = RANGE_ALIASES.get(range_name, range_name)
+    return CLASS_NAME_TO_LABEL.get(class_name)
+
+
+def build_relationship_ranges(schema):
+    """
+    Collect the subject and object labels of every relationship class of the schema.
+
+    Args:
+        schema (dict or Schema): The schema containing class definitions.
+
+    Returns:
+        dict: Mapping from relationship class name to (subject_label, object_label).
+    """
+    return {
+        class_name: (range_to_label(ranges["subject"]), range_to_label(ranges["object"]))
+        for class_name, ranges in load_schema(schema).relationship_ranges.items()
+    }
+
+
+def build_entity_index(entities):
+    """
+    Index the NER output of one document by normalized text.
+
+    Args:
+        entities (list): Entities in the BioNLP span format.
+
+    Returns:
+        dict: Mapping from normalized text to {label: text_span}, first occurrence first.
+    """
+    index = {}
+    for entity in entities:
+        labels = index.setdefault(normalize_text(entity["text_span"]), {})
+        labels.setdefault(entity["label"], entity["text_span"])
+    return index
+
+
+def _resolve_argument(mention, range_label, entity_index):
+    """Return the (text_span, label) of a relation argument, preferring the range label."""
+    candidates = entity_index.get(normalize_text(mention))
+    if not candidates:
+        return None
+    if range_label in candidates:
+        return candidates[range_label], range_label
+    label, text_span = next(iter(candidates.items()))
+    return text_span, label
+
+
+def _normalize_predicates(predicate):
+    """Split '|'-joined predicates and normalize them to the challenge relation labels."""
+    predicates = []
+    for value in predicate.split("|"):
+        value = value.strip().strip("^$").replace("_", " ").lower()
+        if value:
+            predicates.append(value)
+    return predicates
+
+
+def relation_submissions_for_document(relationship_responses, entities, relationship_ranges, require_entities=False):
+    """
+    Convert the relationship responses of one document into the three relation submission formats.
+
+    Subjects and objects are looked up in the NER output of the document, so
+    mention-based relations use the exact span text and label of a predicted
+    entity. Arguments missing from the NER output fall back to the mention text
+    and the label of the relationship range, unless `require_entities` is set.
+    Relations with a predicate outside LEGAL_RELATION_LABELS are dropped.
+
+    Args:
+        relationship_responses (dict): Responses keyed by class name, as saved in generated_responses.json.
+        entities (list): NER predictions of the same document.
+        relationship_ranges (dict): Output of `build_relationship_ranges`.
+        require_entities (bool): Drop relations whose arguments were not predicted as entities.
+
+    Returns:
+        dict: Mapping from submission field (e.g. "binary_tag_based_relations") to its deduplicated relations.
+    """
+    entity_index = build_entity_index(entities)
+    binary, ternary, mention_based = {}, {}, {}
+
+    for class_name, (subject_range, object_range) in relationship_ranges.items():
+        response = relationship_responses.get(class_name)
+        if not isinstance(response, dict) or not response:
+            continue
+        relations = next(iter(response.values())) or []
+
+        for relation in relations:
+            subject = relation.get("subject", "").strip()
+            object_ = relation.get("object", "").strip()
+            if not subject or not object_:
+                continue
+
+            subject_match = _resolve_argument(subject, subject_range, entity_index)
+            object_match = _resolve_argument(object_, object_range, entity_index)
+            if require_entities and (subject_match is None or object_match is None):
+                continue
+            subject_text, subject_label = subject_match or (subject, subject_range)
+            object_text, object_label = object_match or (object_, object_range)
+            if subject_label is None or object_label is None:
+                continue
+
+            for predicate in _normalize_predicates(relation.get("predicate", "")):
+                if predicate not in LEGAL_RELATION_LABELS:
+                    continue
+                binary[(subject_label, object_label)] = None
+                ternary[(subject_label, predicate, object_label)] = None
+                mention_based[(subject_text, subject_label, predicate, object_text, object_label)] = None
+
+    return {
+        SUBTASK_FIELDS["binary_tag_RE"]: [
+            {"subject_label": s, "object_label": o} for s, o in binary
+        ],
+        SUBTASK_FIELDS["ternary_tag_RE"]: [
+            {"subject_label": s, "predicate": p, "object_label": o} for s, p, o in ternary
+        ],
+        SUBTASK_FIELDS["ternary_mention_RE"]: [
+            {"subject_text_span": st, "subject_label": s, "predicate": p, "object_text_span": ot, "object_label": o}
+            for st, s, p, ot, o in mention_based
+        ],
+    }
+
+
+def build_relation_submissions(responses_by_pmid, ner_predictions, schema, require_entities=False):
+    """
+    Build the 6.2, 6.3 and 6.4 submissions of a corpus in one pass over the relationship responses.
+
+    Args:
+        responses_by_pmid (dict): {pmid: responses keyed by class name}.
+        ner_predictions (dict): NER predictions {pmid: {"entities": [...]}}.
+        schema (dict or Schema): The schema containing class definitions.
+        require_entities (bool): See `relation_submissions_for_document`.
+
+    Returns:
+        dict: Mapping from subtask ("binary_tag_RE", ...) to {pmid: {field: relations}}.
+    """
+    relationship_ranges = build_relationship_ranges(schema)
+    submissions = {subtask: {} for subtask in RELATION_SUBTASKS}
+
+    for pmid, responses in responses_by_pmid.items():
+        entities = ner_predictions.get(pmid, {}).get("entities", [])
+        document = relation_submissions_for_document(responses, entities, relationship_ranges, require_entities)
+        for subtask in RELATION_SUBTASKS:
+            field = SUBTASK_FIELDS[subtask]
+            submissions[subtask][pmid] = {field: document[field]}
+
+    return submissions
+
+
+def write_relation_submissions(
+    responses_by_pmid, ner_predictions_path="org_T61_BaselineRun_NuNerZero.json",
+    schema_path="generated/schema.json", output_paths=None, require_entities=False
+):
+    """
+    Write the 6.2, 6.3 and 6.4 submission files from one extraction run.
+
+    Args:
+        responses_by_pmid (dict or str): {pmid: responses keyed by class name}, or the path of a JSON file holding it.
+        ner_predictions_path (str): Path to the NER predictions of the same run.
+        schema_path (str or Schema): Path to the schema JSON file, or an already loaded Schema.
+        output_paths (dict): Subtask -> output path. Defaults to the paths used by `challenge_eval.py`.
+        require_entities (bool): See `relation_submissions_for_document`.
+
+    Returns:
+        dict: The submissions, as returned by `build_relation_submissions`.
+    """
+    output_paths = {**DEFAULT_SUBMISSION_PATHS, **(output_paths or {})}
+
+    if isinstance(responses_by_pmid, str):
+        with open(responses_by_pmid, "r", encoding="utf-8") as file:
+            responses_by_pmid = json.load(file)
+
+    schema = load_schema(schema_path)
+    with open(ner_predictions_path, "r", encoding="utf-8") as file:
+        ner_predictions = json.load(file)
+
+    submissions = build_relation_submissions(responses_by_pmid, ner_predictions, schema, require_entities)
+    for subtask, predictions in submissions.items():
+        with open(output_paths[subtask], "w", encoding="utf-8") as file:
+            json.dump(predictions, file, indent=4, ensure_ascii=True)
+        relation_count = sum(len(article[SUBTASK_FIELDS[subtask]]) for article in predictions.values())
+        print(f"✅ {relation_count} {subtask} relations saved to {output_paths[subtask]}")
+
+    return submissions
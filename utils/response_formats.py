@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+
+BUNDLE_VERSION = 1
+
+# Expanded response formats, keyed by absolute path, invalidated when the file changes
+_response_formats_cache = {}
+
+
+def schema_key(schema_body):
+    """Short content hash of a JSON schema body, identical for structurally identical schemas."""
+    canonical = json.dumps(schema_body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def bundle_response_formats(response_formats):
+    """
+    Turn {class_name: {format_name: response_format}} into a compact bundle.
+
+    Each distinct schema body is stored once under "schemas"; the per-class
+    formats keep their name and strict flag and refer to their body by key.
+
+    Args:
+        response_formats (dict): Response formats as built by the generators.
+
+    Returns:
+        dict: {"bundle_version", "schemas": {key: schema}, "classes": {class_name: {format_name: format}}}.
+    """
+    schemas = {}
+    classes = {}
+    for class_name, formats in response_formats.items():
+        entries = {}
+        for format_name, response_format in formats.items():
+            json_schema = response_format["json_schema"]
+            key = schema_key(json_schema["schema"])
+            schemas.setdefault(key, json_schema["schema"])
+            entries[format_name] = {**response_format, "json_schema": {**json_schema, "schema": key}}
+        classes[class_name] = entries
+    return {"bundle_version": BUNDLE_VERSION, "schemas": schemas, "classes": classes}
+
+
+def expand_response_formats(data):
+    """
+    Return {class_name: {format_name: response_format}} from a bundle or a plain response formats dict.
+
+    Structurally identical schema bodies are the same object in the result
+    (plain files are deduplicated on the way), so every request built from
+    them sends one shared schema.
+    """
+    if data.get("bundle_version") is None:
+        data = bundle_response_formats(data)
+
+    schemas = data["schemas"]
+    return {
+        class_name: {
+            format_name: {**entry, "json_schema": {**entry["json_schema"], "schema": schemas[entry["json_schema"]["schema"]]}}
+            for format_name, entry in formats.items()
+        }
+        for class_name, formats in data["classes"].items()
+    }
+
+
+def save_response_formats(response_formats, output_path):
+    """
+    Save response formats as a bundle.
+
+    Returns:
+        dict: The bundle written.
+    """
+    bundle = bundle_response_formats(response_formats)
+    with open(output_path, "w") as file:
+        json.dump(bundle, file, indent=4)
+    return bundle
+
+
+def load_response_formats(response_formats_path):
+    """
+    Load a response formats file (bundle or plain), reusing the previous result while the file is unchanged.
+
+    The returned dict is shared between callers and must not be modified.
+
+    Args:
+        response_formats_path (str): Path to the response formats JSON file.
+
+    Returns:
+        dict: {class_name: {format_name: response_format}}.
+    """
+    path = os.path.abspath(response_formats_path)
+    modified = os.path.getmtime(path)
+    cached = _response_formats_cache.get(path)
+    if cached is None or cached[0] != modified:
+        with open(path, "r") as file:
+            cached = (modified, expand_response_formats(json.load(file)))
+        _response_formats_cache[path] = cached
+    return cached[1]
@@ -0,0 +1,91 @@
+import json
+
+
+class MentionStreamParser:
+    """
+    Incremental parser for the string array of one key of a streamed JSON object.
+
+    Fed the chunks of a structured output such as {"mentions": ["a", "b"]}, it
+    returns each string of the array as soon as its closing quote arrives, so
+    mentions can be processed while the model is still generating. Escapes are
+    decoded exactly like `json.loads`. The full text received so far is kept
+    in `content` for the final validation of the response.
+    """
+
+    def __init__(self, key="mentions"):
+        self.key = key
+        self.content = ""
+        self._position = 0
+        self._depth = 0
+        self._string_start = None  # Offset of the opening quote while inside a string
+        self._escaped = False
+        self._last_string = None  # Last string read outside the array, i.e. the latest key
+        self._expect_array = False  # True between `"<key>":` and its value
+        self._array_depth = None  # Depth of the array of `key` while inside it
+
+    def feed(self, chunk):
+        """
+        Add a chunk of the response.
+
+        Returns:
+            list: Strings of the array completed by this chunk, in order.
+        """
+        self.content += chunk
+        text = self.content
+        completed = []
+
+        for position in range(self._position, len(text)):
+            char = text[position]
+            if self._string_start is not None:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    value = json.loads(text[self._string_start:position + 1])
+                    self._string_start = None
+                    if self._depth == self._array_depth:
+                        completed.append(value)
+                    else:
+                        self._last_string = value
+                continue
+
+            if char == '"':
+                self._string_start = position
+                self._expect_array = False
+            elif char == ":":
+                self._expect_array = self._depth == 1 and self._last_string == self.key
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._expect_array:
+                    self._array_depth = self._depth
+                self._expect_array = False
+            elif char in "}]":
+                if self._depth == self._array_depth:
+                    self._array_depth = None
+                self._depth -= 1
+            elif not char.isspace():
+                self._expect_array = False
+
+        self._position = len(text)
+        return completed
+
+
+def iter_streamed_mentions(stream, parser):
+    """
+    Yield the mentions of a streamed chat completion as they complete.
+
+    Args:
+        stream (iterable): Chunks of a chat completion created with `stream=True`.
+        parser (MentionStreamParser): Parser receiving the content deltas; its
+            `content` holds the whole response once the stream is exhausted.
+
+    Yields:
+        str: Each mention of the array, as soon as it is complete.
+    """
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield from parser.feed(delta)
@@ -0,0 +1,163 @@
+import json
+from typing import Any, Literal, Optional
+
+from pydantic import ConfigDict, Field, TypeAdapter, ValidationError, create_model
+
+from utils.response_formats import schema_key
+
+JSON_TYPES = {"string": str, "number": float, "integer": int, "boolean": bool}
+
+# Compiled (python type, TypeAdapter) pairs, keyed by schema_key of the JSON schema they were built from
+_compiled_types = {}
+
+
+def _build_type(schema, name):
+    if schema.get("enum"):
+        return Literal[tuple(schema["enum"])]
+
+    schema_type = schema.get("type", "string")
+    if schema_type == "array":
+        return list[compile_type(schema.get("items", {}), f"{name}Item")]
+    if schema_type == "object":
+        required = set(schema.get("required", []))
+        fields = {}
+        # Properties become aliased fields so names like "schema" or "json" never clash with BaseModel
+        for position, (property_name, property_schema) in enumerate(schema.get("properties", {}).items()):
+            field_type = compile_type(property_schema, f"{name}_{property_name}")
+            if property_name in required:
+                fields[f"field_{position}"] = (field_type, Field(alias=property_name))
+            else:
+                fields[f"field_{position}"] = (Optional[field_type], Field(None, alias=property_name))
+        config = ConfigDict(
+            extra="forbid" if schema.get("additionalProperties") is False else "ignore",
+            str_strip_whitespace=True,
+            coerce_numbers_to_str=True,
+        )
+        return create_model(name, __config__=config, **fields)
+    return JSON_TYPES.get(schema_type, Any)
+
+
+def compile_type(schema, name="Response"):
+    """
+    Return the pydantic type validating a JSON schema (objects become models), compiled once per distinct schema.
+
+    Supports the subset used by the response format generators: objects,
+    arrays, enums, strings, numbers, integers and booleans.
+    """
+    key = schema_key(schema)
+    if key not in _compiled_types:
+        python_type = _build_type(schema, name)
+        _compiled_types[key] = (python_type, TypeAdapter(python_type))
+    return _compiled_types[key][0]
+
+
+def _adapter(schema):
+    compile_type(schema)
+    return _compiled_types[schema_key(schema)][1]
+
+
+def _json_schema_of(response_format):
+    """The JSON schema body of a response format (or of its "json_schema" part)."""
+    return response_format.get("json_schema", response_format)["schema"]
+
+
+def compile_response_model(response_format):
+    """Return the pydantic model of a json_schema response format, compiled once per distinct schema."""
+    json_schema = response_format.get("json_schema", response_format)
+    return compile_type(json_schema["schema"], json_schema.get("name", "Response"))
+
+
+def _match_enum(value, values):
+    """Map a string to the enum value it differs from only by case, spacing or underscores."""
+    normalized = " ".join(value.replace("_", " ").split()).casefold()
+    for allowed in values:
+        if isinstance(allowed, str) and " ".join(allowed.replace("_", " ").split()).casefold() == normalized:
+            return allowed
+    return value
+
+
+def repair(value, schema):
+    """
+    Cheap structural repair of a parsed response against its JSON schema.
+
+    Unknown keys are dropped, missing required arrays become empty when the
+    object has at least one known property (so an unrelated object such as
+    {"foo": 1} is still rejected), enum strings are matched ignoring case and
+    underscores, and array items that still do not validate are removed
+    (e.g. a relation with an illegal predicate or a non-string mention), so
+    one bad item does not reject the whole response.
+    """
+    if "enum" in schema:
+        return _match_enum(value, schema["enum"]) if isinstance(value, str) else value
+
+    schema_type = schema.get("type")
+    if schema_type == "object" and isinstance(value, dict):
+        properties = schema.get("properties", {})
+        repaired = {key: repair(value[key], properties[key]) for key in properties if key in value}
+        if schema.get("additionalProperties") is not False:
+            repaired.update({key: item for key, item in value.items() if key not in properties})
+        if not any(key in value for key in properties):
+            return repaired
+        for key in schema.get("required", []):
+            if key not in repaired and properties.get(key, {}).get("type") == "array":
+                repaired[key] = []
+        return repaired
+    if schema_type == "array" and isinstance(value, list):
+        items_schema = schema.get("items", {})
+        adapter = _adapter(items_schema)
+        kept = []
+        for item in value:
+            item = repair(item, items_schema)
+            try:
+                adapter.validate_python(item)
+            except ValidationError:
+                continue
+            kept.append(item)
+        return kept
+    return value
+
+
+def _load_json(content):
+    """Parse a response, tolerating a markdown code fence or text around the JSON object."""
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        start, end = content.find("{"), content.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        return json.loads(content[start:end + 1])
+
+
+def parse_response(content, response_format):
+    """
+    Parse and validate a structured output against the response format it was requested with.
+
+    Args:
+        content (str or dict): The message content returned by the model, or its parsed JSON.
+        response_format (dict): The json_schema response format sent with the request.
+
+    Returns:
+        BaseModel: The validated response (see `response_to_dict`).
+
+    Raises:
+        ValueError: If the content is not JSON or cannot be repaired into a valid response.
+    """
+    model = compile_response_model(response_format)
+    name = response_format.get("json_schema", response_format).get("name", model.__name__)
+    data = _load_json(content) if isinstance(content, str) else content
+    try:
+        return model.model_validate(data)
+    except ValidationError:
+        pass
+
+    try:
+        response = model.model_validate(repair(data, _json_schema_of(response_format)))
+    except ValidationError as e:
+        raise ValueError(f"Response rejected, it does not match '{name}': {e.error_count()} errors") from e
+    print(f"🔧 Repaired response for '{name}'")
+    return response
+
+
+def response_to_dict(response):
+    """Plain dict of a validated response, with the property names of the response format."""
+    return response.model_dump(by_alias=True, exclude_none=True)
@@ -0,0 +1,217 @@
+import json
+
+from challenge_eval import SUBTASK_TITLES, index_ground_truth, live_scores, new_live_state, update_live_scores
+from utils.candidate_index import extract_token_range_entities
+from utils.dependency_graph import load_dependency_graph
+from utils.gazetteer import candidate_classes, gazetteer_prepass
+from utils.extract_named_entity_classes import extract_named_entity_classes
+from utils.process_dependent_classes import process_dependent_classes
+from utils.process_named_entities import (
+    convert_extracted_to_span_annotated, process_named_entity_classes, split_title_abstract
+)
+from utils.schema import load_schema
+from utils.span_overlap import resolve_overlaps
+
+OUTPUT_MODES = ["mentions", "token_ranges"]
+
+
+def print_live_scores(scores, processed, total):
+    """Print the running micro / macro scores of each subtask on one line."""
+    for subtask, (macro_precision, macro_recall, macro_f1, micro_precision, micro_recall, micro_f1) in scores.items():
+        print(
+            f"📊 [{processed}/{total}] {SUBTASK_TITLES[subtask]}: "
+            f"micro P={micro_precision:.4f} R={micro_recall:.4f} F1={micro_f1:.4f} | "
+            f"macro P={macro_precision:.4f} R={macro_recall:.4f} F1={macro_f1:.4f}"
+        )
+
+
+def run_named_entity_corpus(
+    dataset_path="dev.json",
+    final_predictions_path="org_T61_BaselineRun_NuNerZero.json",
+    schema_path="generated/schema.json",
+    response_formats_path="generated/response_formats/named_entity_response_formats.json",
+    sample_text_path="input/sample.txt",
+    output_responses_path="output/generated_responses.json",
+    prompts_save_path="generated/prompts/final_namedentity_without_dependencies_prompts.json",
+    gold_path=None,
+    live_eval_every=1,
+    live_scores_path=None,
+    min_micro_f1=None,
+    min_documents=20,
+    named_entity_classes=None,
+    responses_by_pmid_path=None,
+    class_dependencies_path=None,
+    gazetteer=None,
+    output_mode="mentions",
+    **extraction_options
+):
+    """
+    Run named entity extraction on every PMID of a corpus and save the predictions.
+
+    When `gold_path` is given, the per-label TP / FP / FN counters of the NER
+    subtask are updated as each PMID finishes, using the same cleaning and
+    matching as `challenge_eval.py`. Running scores cover the PMIDs processed
+    so far, and once the whole gold corpus is done they equal a full re-score
+    of the saved predictions.
+
+    Args:
+        dataset_path (str): Corpus {pmid: {"title", "abstract"}}, with or without a "metadata" level.
+        final_predictions_path (str): Where to save the merged span predictions.
+        schema_path (str or Schema): Path to the schema JSON file, or an already loaded Schema.
+        response_formats_path (str): Path to the response formats JSON file.
+        sample_text_path (str): Temporary file holding the text of the current PMID.
+        output_responses_path (str): Path where the raw responses of the current PMID are saved.
+        prompts_save_path (str): Path where the prompts are saved.
+        gold_path (str): Optional gold annotations to score against while running.
+        live_eval_every (int): Print the running scores every this many PMIDs.
+        live_scores_path (str): Optional JSONL file receiving one line of running scores per PMID.
+        min_micro_f1 (float): Abort the run if the running NER micro F1 is below this value
+            after `min_documents` gold PMIDs.
+        min_documents (int): Number of gold PMIDs processed before `min_micro_f1` is checked.
+        named_entity_classes (dict): Classes to extract. Defaults to every NamedEntity class of the schema.
+        responses_by_pmid_path (str): Optional path where the raw responses of every PMID are
+            saved as {pmid: responses}, e.g. for `utils.relation_submissions.write_relation_submissions`.
+        class_dependencies_path (str): Optional path to class_dependencies.json. When given, the
+            inherited and relationship classes of every PMID are extracted after its named entities
+            (see `utils.process_dependent_classes`), so the saved responses include them.
+        gazetteer (dict): Optional gazetteer from `utils.gazetteer.build_gazetteer`. Each PMID is
+            pre-passed with it, and the classes with a candidate are added to `known_present_classes`,
+            so triage (`triage=True`) never skips them. "mentions" mode only.
+        output_mode (str): "mentions" (the model returns mention strings, then located in the text)
+            or "token_ranges" (the model returns ranges of numbered tokens, see `utils.candidate_index`).
+        **extraction_options: Extra arguments for `process_named_entity_classes` (e.g. `triage=True`,
+            `stream=True` to locate mentions while each response is generated, or `compression=[...]`,
+            see `utils.prompt_size.PROMPT_COMPRESSION_OPTIONS`, or `example_index=...` to retrieve
+            few-shot examples, never taken from the PMID being processed). The "token_ranges" mode
+            only accepts `compression`, for the relationship stage of `class_dependencies_path`.
+
+    Returns:
+        tuple: (predictions {pmid: {"entities": [...]}}, final running scores per
+            subtask or None when no gold is given).
+
+    Raises:
+        ValueError: If `output_mode` is unknown, or if extraction options or a gazetteer are
+            given that the "token_ranges" mode does not support.
+    """
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output_mode '{output_mode}', expected one of: {', '.join(OUTPUT_MODES)}")
+    if output_mode == "token_ranges":
+        # Only the relationship stage reads `compression` in this mode
+        unsupported = [option for option in extraction_options if option != "compression" or not class_dependencies_path]
+        if gazetteer is not None:
+            unsupported.append("gazetteer")
+        if unsupported:
+            raise ValueError(f"output_mode 'token_ranges' does not support: {', '.join(unsupported)}")
+
+    # Load and index the schema once for every PMID
+    schema = load_schema(schema_path)
+    if named_entity_classes is None:
+        named_entity_classes = extract_named_entity_classes(schema)
+
+    with open(dataset_path, "r", encoding="utf-8") as file:
+        dataset = json.load(file)
+
+    class_dependencies = load_dependency_graph(class_dependencies_path) if class_dependencies_path else None
+
+    live_state = None
+    if gold_path:
+        with open(gold_path, "r", encoding="utf-8") as file:
+            live_state = new_live_state(index_ground_truth(json.load(file), ["NER"]), ["NER"])
+
+    live_scores_file = open(live_scores_path, "w", encoding="utf-8") if live_state and live_scores_path else None
+    final_predictions = {}
+    responses_by_pmid = {}
+    scores = None
+    gold_processed = 0
+
+    try:
+        for processed, (pmid, doc) in enumerate(dataset.items(), start=1):
+            metadata = doc.get("metadata", doc)
+            title = metadata.get("title", "")
+            abstract = metadata.get("abstract", "")
+
+            # Save title + abstract to temp sample.txt
+            with open(sample_text_path, "w", encoding="utf-8") as file:
+                file.write(f'title: "{title}"\nabstract: "{abstract}"')
+
+            print(f"\n📄 Processing PMID: {pmid}")
+            if output_mode == "token_ranges":
+                # Token ranges map straight to offsets, with the sections the converter would use
+                sections = split_title_abstract(f'title: "{title}"\nabstract: "{abstract}"')
+                entities, responses = extract_token_range_entities(named_entity_classes, schema, sections)
+                with open(output_responses_path, "w") as file:
+                    json.dump(responses, file, indent=4)
+                prediction = {pmid: {"entities": resolve_overlaps(entities, "longest")}}
+            else:
+                options = extraction_options
+                if gazetteer is not None:
+                    # Classes with a gazetteer candidate are present: triage must not skip them
+                    found = candidate_classes(gazetteer_prepass(gazetteer, title, abstract), named_entity_classes)
+                    known_present = list(extraction_options.get("known_present_classes") or ())
+                    options = {**extraction_options, "known_present_classes": known_present + found}
+
+                located_mentions = process_named_entity_classes(
+                    named_entity_classes,
+                    schema,
+                    sample_text_path,
+                    response_formats_path,
+                    output_responses_path,
+                    prompts_save_path,
+                    exclude_example_pmids=(pmid,),
+                    **options
+                )
+
+                # Convert to span-based format per PMID
+                temp_output_path = f"output/tmp_{pmid}_converted.json"
+                convert_extracted_to_span_annotated(
+                    output_responses_path=output_responses_path,
+                    text_sample_path=sample_text_path,
+                    final_output_path=temp_output_path,
+                    pmid=pmid,
+                    located_mentions=located_mentions
+                )
+                with open(temp_output_path, "r", encoding="utf-8") as file:
+                    prediction = json.load(file)
+            final_predictions.update(prediction)
+
+            # Inherited and relationship classes read the named entities from the responses file
+            if class_dependencies is not None:
+                process_dependent_classes(
+                    class_dependencies, schema, sample_text_path, output_responses_path,
+                    compression=extraction_options.get("compression")
+                )
+
+            if responses_by_pmid_path:
+                with open(output_responses_path, "r", encoding="utf-8") as file:
+                    responses_by_pmid[pmid] = json.load(file)
+
+            if live_state is None:
+                continue
+
+            update_live_scores(live_state, pmid, prediction.get(pmid, {"entities": []}))
+            scores = live_scores(live_state)
+
+            if live_scores_file:
+                live_scores_file.write(json.dumps({"pmid": pmid, "processed": processed, "scores": scores}) + "\n")
+                live_scores_file.flush()
+            if processed % live_eval_every == 0 or processed == len(dataset):
+                print_live_scores(scores, processed, len(dataset))
+
+            gold_processed += pmid in live_state["ground_truth_index"]["NER"]["entries"]
+            if min_micro_f1 is not None and gold_processed >= min_documents and scores["NER"][5] < min_micro_f1:
+                print(f"🛑 Aborting: running micro F1 {scores['NER'][5]:.4f} is below {min_micro_f1} after {gold_processed} gold PMIDs")
+                break
+    finally:
+        if live_scores_file:
+            live_scores_file.close()
+
+    # Save final predictions
+    with open(final_predictions_path, "w", encoding="utf-8") as file:
+        json.dump(final_predictions, file, indent=4, ensure_ascii=True)
+
+    if responses_by_pmid_path:
+        with open(responses_by_pmid_path, "w", encoding="utf-8") as file:
+            json.dump(responses_by_pmid, file, indent=4)
+
+    print(f"\n✅ All done! Saved final predictions to: {final_predictions_path}")
+    return final_predictions, scores
@@ -0,0 +1,147 @@
+import json
+import os
+
+DEFAULT_SCHEMA_PATH = "generated/schema.json"
+
+# Relationship ranges that name a class differently from the class the named entity stage extracts
+RANGE_ALIASES = {
+    "Bacterium": "Bacteria",
+    "DDF": "DiseaseDisorderOrFinding",
+}
+
+# Loaded schemas, keyed by absolute path, invalidated when the file changes
+_schema_cache = {}
+
+
+class Schema:
+    """
+    A loaded JSON schema with the lookups every pipeline stage needs precomputed.
+
+    The raw schema stays available as `data`, and the object can be read like
+    the dict it wraps (`schema["classes"]`, `schema.get("title")`), so code
+    written for the plain dict keeps working.
+
+    Indexes:
+        by_is_a: {is_a: {class_name: details}}.
+        identifiers: {class_name: (attribute name, lowercased range)} of the first identifier attribute.
+        relationship_ranges: {class_name: {"subject", "object", "predicate"} ranges} of classes
+            with subject, object and predicate attributes. Subject and object ranges are
+            class names, with RANGE_ALIASES resolved (e.g. "DDF" -> "DiseaseDisorderOrFinding").
+        predicate_patterns: {relationship class name: id pattern of its predicate class}.
+        enum_values: {enum_name: list of values}.
+    """
+
+    def __init__(self, data, path=None):
+        self.data = data
+        self.path = path
+        self.classes = data.get("classes", {})
+        self.title = data.get("title", "")
+        self.description = data.get("description", "")
+
+        self.by_is_a = {}
+        self.identifiers = {}
+        self.relationship_ranges = {}
+        self.predicate_patterns = {}
+
+        for class_name, details in self.classes.items():
+            self.by_is_a.setdefault(details.get("is_a", ""), {})[class_name] = details
+            attributes = details.get("attributes", {})
+
+            for attr_name, attr_details in attributes.items():
+                if attr_details.get("identifier", False):
+                    self.identifiers[class_name] = (attr_name, attr_details.get("range", "string").lower())
+                    break
+
+            if "subject" in attributes and "object" in attributes and "predicate" in attributes:
+                ranges = {role: attributes[role].get("range", "") for role in ("subject", "object", "predicate")}
+                for role in ("subject", "object"):
+                    ranges[role] = self.resolve_range(ranges[role])
+                self.relationship_ranges[class_name] = ranges
+
+        for class_name, ranges in self.relationship_ranges.items():
+            predicate_class = self.classes.get(ranges["predicate"], {})
+            self.predicate_patterns[class_name] = predicate_class.get("attributes", {}).get("id", {}).get("pattern", "")
+
+        self.enum_values = {}
+        for enum_name, enum_details in data.get("enums", {}).items():
+            values = enum_details.get("enum", [])
+            if not values:  # Raw LinkML enums only have permissible_values
+                values = list(enum_details.get("permissible_values", {}).keys())
+            self.enum_values[enum_name] = values
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def classes_of_type(self, is_a):
+        """Return {class_name: details} of the classes whose `is_a` is the given value."""
+        return dict(self.by_is_a.get(is_a, {}))
+
+    def named_entity_classes(self):
+        return self.classes_of_type("NamedEntity")
+
+    def resolve_range(self, range_name):
+        """Class name of a relationship range, resolving RANGE_ALIASES that are not classes themselves."""
+        if range_name in self.classes:
+            return range_name
+        return RANGE_ALIASES.get(range_name, range_name)
+
+    def identifier(self, class_name):
+        """Name of the identifier attribute of a class, or None."""
+        identifier = self.identifiers.get(class_name)
+        return identifier[0] if identifier else None
+
+    def relationship_arguments(self, class_name):
+        """
+        Return the participating classes of a relationship, {role: range}.
+
+        The subject and object come first, followed by any further attribute
+        ranging over a class that is not a predicate (n-ary relationships).
+        """
+        ranges = self.relationship_ranges.get(class_name)
+        if ranges is None:
+            return {}
+        arguments = {role: ranges[role] for role in ("subject", "object") if ranges[role]}
+        for attr_name, attr_details in self.classes[class_name].get("attributes", {}).items():
+            attr_range = attr_details.get("range", "")
+            if attr_name not in ("subject", "object", "predicate") and attr_range in self.classes \
+                    and self.classes[attr_range].get("is_a") != "RelationshipType":
+                arguments[attr_name] = attr_range
+        return arguments
+
+    def predicate_values(self, class_name):
+        """Allowed predicate values of a relationship class, from its predicate id pattern."""
+        pattern = self.predicate_patterns.get(class_name, "")
+        return [value.strip().strip("^$") for value in pattern.split("|")] if pattern else []
+
+
+def load_schema(schema=DEFAULT_SCHEMA_PATH):
+    """
+    Return a `Schema`, loading and indexing it only when needed.
+
+    Args:
+        schema (Schema, dict or str): An already loaded Schema (returned as is), a
+            raw schema dict, or the path of a schema JSON file. Files are cached
+            and reloaded only when their modification time changes.
+
+    Returns:
+        Schema: The indexed schema.
+    """
+    if isinstance(schema, Schema):
+        return schema
+    if isinstance(schema, dict):
+        return Schema(schema)
+
+    path = os.path.abspath(schema)
+    modified = os.path.getmtime(path)
+    cached = _schema_cache.get(path)
+    if cached is None or cached[0] != modified:
+        with open(path, "r") as file:
+            cached = (modified, Schema(json.load(file), schema))
+        _schema_cache[path] = cached
+    return cached[1]
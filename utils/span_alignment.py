@@ -0,0 +1,200 @@
+import unicodedata
+
+from utils.gazetteer import build_automaton, is_whole_word, iter_automaton_matches
+
+# Characters rewritten before matching. Everything not listed here is only
+# decomposed (NFKD), stripped of combining marks and lowercased.
+CHARACTER_REPLACEMENTS = {
+    "‘": "'", "’": "'", "‚": "'", "′": "'", "`": "'", "´": "'",
+    "“": '"', "”": '"', "„": '"', "″": '"',
+    "‐": " ", "‑": " ", "‒": " ", "–": " ", "—": " ", "―": " ", "−": " ", "-": " ",
+    "α": "alpha", "β": "beta", "γ": "gamma", "δ": "delta", "ε": "epsilon", "ζ": "zeta",
+    "η": "eta", "θ": "theta", "ι": "iota", "κ": "kappa", "λ": "lambda", "μ": "mu",
+    "ν": "nu", "ξ": "xi", "π": "pi", "ρ": "rho", "σ": "sigma", "ς": "sigma", "τ": "tau",
+    "υ": "upsilon", "φ": "phi", "χ": "chi", "ψ": "psi", "ω": "omega",
+}
+
+
+def normalize_with_offsets(text):
+    """
+    Build a normalized view of a text together with a reverse offset map.
+
+    Quotes are unified, hyphens and dashes become spaces, Greek letters are
+    spelled out, accents are removed, whitespace runs collapse to one space and
+    everything is lowercased.
+
+    Args:
+        text (str): The original text.
+
+    Returns:
+        tuple: (normalized_text, offsets) where offsets[i] is the index in the
+            original text of the character that produced normalized_text[i].
+    """
+    normalized = []
+    offsets = []
+
+    for index, char in enumerate(text):
+        replacement = CHARACTER_REPLACEMENTS.get(char)
+        if replacement is None:
+            decomposed = unicodedata.normalize("NFKD", char)
+            replacement = "".join(c for c in decomposed if not unicodedata.combining(c))
+            replacement = CHARACTER_REPLACEMENTS.get(replacement, replacement).lower()
+
+        for piece in replacement:
+            if piece.isspace():
+                if not normalized or normalized[-1] == " ":
+                    continue
+                piece = " "
+            normalized.append(piece)
+            offsets.append(index)
+
+    # Drop a trailing space produced by collapsing
+    if normalized and normalized[-1] == " ":
+        normalized.pop()
+        offsets.pop()
+
+    return "".join(normalized), offsets
+
+
+def normalize_text(text):
+    """
+    Normalize a string the same way as `normalize_with_offsets`, without offsets.
+
+    Args:
+        text (str): The text to normalize.
+
+    Returns:
+        str: The normalized text.
+    """
+    return normalize_with_offsets(text)[0]
+
+
+def build_alignment_index(sections):
+    """
+    Precompute the normalized view of each section of a document.
+
+    Args:
+        sections (dict): Mapping from location name (e.g. "title") to its original text.
+
+    Returns:
+        dict: Mapping from location to {"text", "normalized", "offsets"}.
+    """
+    index = {}
+    for location, text in sections.items():
+        normalized, offsets = normalize_with_offsets(text)
+        index[location] = {"text": text, "normalized": normalized, "offsets": offsets}
+    return index
+
+
+def _to_original_span(section, start, end):
+    """Map a [start, end) range of the normalized text back to the original text."""
+    offsets = section["offsets"]
+    original_start = offsets[start]
+    original_end = offsets[end - 1] + 1
+    return original_start, original_end
+
+
+def _approximate_matches(pattern, text, max_distance):
+    """
+    Find the substrings of `text` closest to `pattern` within `max_distance` edits.
+
+    Uses the Sellers dynamic program (free start in the text), keeping one
+    column in memory and tracking where each alignment starts.
+
+    Returns:
+        tuple: (best_distance, list of (start, end)) with `end` exclusive.
+            best_distance is None when nothing is within the bound.
+    """
+    m = len(pattern)
+    previous = list(range(m + 1))
+    previous_start = [0] * (m + 1)
+    best_distance = None
+    matches = []
+
+    for j, char in enumerate(text, start=1):
+        current = [0] * (m + 1)
+        current_start = [j] * (m + 1)
+        for i in range(1, m + 1):
+            substitution = previous[i - 1] + (pattern[i - 1] != char)
+            deletion = previous[i] + 1
+            insertion = current[i - 1] + 1
+            if substitution <= deletion and substitution <= insertion:
+                current[i], current_start[i] = substitution, previous_start[i - 1]
+            elif deletion <= insertion:
+                current[i], current_start[i] = deletion, previous_start[i]
+            else:
+                current[i], current_start[i] = insertion, current_start[i - 1]
+
+        distance = current[m]
+        if distance <= max_distance:
+            if best_distance is None or distance < best_distance:
+                best_distance = distance
+                matches = [(current_start[m], j)]
+            elif distance == best_distance:
+                matches.append((current_start[m], j))
+
+        previous, previous_start = current, current_start
+
+    return best_distance, matches
+
+
+def align_mentions(mentions, alignment_index, max_edit_ratio=0.15, min_fuzzy_length=5):
+    """
+    Align mentions that were not found verbatim to the original text.
+
+    Normalized mentions are first matched against the normalized sections in
+    one automaton pass. Mentions still missing fall back to a bounded
+    edit-distance search. Every recovered span is reported with exact offsets
+    in the original text.
+
+    Args:
+        mentions (iterable): Mention strings to align.
+        alignment_index (dict): Index returned by `build_alignment_index`.
+        max_edit_ratio (float): Maximum edit distance, as a share of the mention length,
+            for the fuzzy fallback. 0 disables the fallback.
+        min_fuzzy_length (int): Shorter mentions are never matched fuzzily.
+
+    Returns:
+        dict: Mapping from mention to a list of (location, start_idx, end_idx, method)
+            tuples, with `end_idx` exclusive and method "normalized" or "fuzzy".
+            Mentions that could not be aligned map to an empty list.
+    """
+    mentions = list(dict.fromkeys(mention for mention in mentions if mention))
+    aligned = {mention: [] for mention in mentions}
+    normalized_mentions = [normalize_text(mention) for mention in mentions]
+
+    # Exact match on the normalized views
+    automaton = build_automaton(normalized_mentions)
+    for location, section in alignment_index.items():
+        for start, end, mention_id in iter_automaton_matches(automaton, section["normalized"]):
+            original_start, original_end = _to_original_span(section, start, end)
+            aligned[mentions[mention_id]].append((location, original_start, original_end, "normalized"))
+
+    # Bounded edit-distance fallback for what is still missing
+    for mention, normalized_mention in zip(mentions, normalized_mentions):
+        if aligned[mention] or len(normalized_mention) < min_fuzzy_length:
+            continue
+
+        max_distance = int(len(normalized_mention) * max_edit_ratio)
+        if max_distance < 1:
+            continue
+
+        for location, section in alignment_index.items():
+            best_distance, matches = _approximate_matches(normalized_mention, section["normalized"], max_distance)
+            if best_distance is None:
+                continue
+
+            last_end = -1
+            for start, end in matches:
+                # Trim spaces picked up at the edges and keep whole-word, non-overlapping hits
+                while start < end and section["normalized"][start] == " ":
+                    start += 1
+                while end > start and section["normalized"][end - 1] == " ":
+                    end -= 1
+                if start >= end or start < last_end or not is_whole_word(section["normalized"], start, end):
+                    continue
+                original_start, original_end = _to_original_span(section, start, end)
+                aligned[mention].append((location, original_start, original_end, "fuzzy"))
+                last_end = end
+
+    return aligned
@@ -0,0 +1,62 @@
+from utils.gazetteer import build_automaton, is_whole_word, iter_automaton_matches
+
+
+def locate_mentions(mentions, sections, whole_words=True):
+    """
+    Find every occurrence of every mention in a document with one scan per section.
+
+    An Aho-Corasick automaton is built once over all distinct mentions, so the
+    cost is linear in the length of the text plus the number of matches, no
+    matter how many mentions the document has. By default only whole-word
+    occurrences are kept, so "AD" is not found inside "ADHD".
+
+    Args:
+        mentions (iterable): Mention strings to locate.
+        sections (dict): Mapping from location name (e.g. "title", "abstract") to its text.
+        whole_words (bool): If True, skip occurrences that start or end inside a word.
+
+    Returns:
+        dict: Mapping from mention to a list of (location, start_idx, end_idx)
+            tuples, with `end_idx` exclusive, in text order per location.
+    """
+    distinct_mentions = list(dict.fromkeys(mention for mention in mentions if mention))
+    positions = {mention: [] for mention in distinct_mentions}
+    if not distinct_mentions:
+        return positions
+
+    automaton = build_automaton(distinct_mentions)
+    for location, text in sections.items():
+        for start, end, mention_id in iter_automaton_matches(automaton, text, whole_words):
+            positions[distinct_mentions[mention_id]].append((location, start, end))
+
+    return positions
+
+
+def locate_mention(mention, sections, whole_words=True):
+    """
+    Find every occurrence of a single mention, e.g. one arriving from a streamed response.
+
+    Returns the same positions as `locate_mentions` would for this mention,
+    without waiting for the other mentions of the document.
+
+    Args:
+        mention (str): Mention string to locate.
+        sections (dict): Mapping from location name (e.g. "title", "abstract") to its text.
+        whole_words (bool): If True, skip occurrences that start or end inside a word.
+
+    Returns:
+        list: (location, start_idx, end_idx) tuples, with `end_idx` exclusive, in text order per location.
+    """
+    positions = []
+    if not mention:
+        return positions
+
+    for location, text in sections.items():
+        start = text.find(mention)
+        while start != -1:
+            end = start + len(mention)
+            if not whole_words or is_whole_word(text, start, end):
+                positions.append((location, start, end))
+            start = text.find(mention, start + 1)
+
+    return positions
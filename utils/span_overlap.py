@@ -0,0 +1,181 @@
+from bisect import bisect_left, bisect_right, insort
+
+from utils.schema import load_schema
+
+OVERLAP_POLICIES = ("longest", "class_priority", "nested")
+
+
+def class_priority_from_schema(schema, class_name_to_label):
+    """
+    Rank labels by the order of their NamedEntity classes in the schema.
+
+    A class can override its position with an integer `priority` annotation
+    (lower wins). When several classes map to the same label (e.g. Chemical and
+    Metabolites), the best rank is kept.
+
+    Args:
+        schema (dict or Schema): The schema containing class definitions.
+        class_name_to_label (dict): Mapping from class names to final labels.
+
+    Returns:
+        dict: Mapping from label to rank (0 is the highest priority).
+    """
+    named_entity_classes = load_schema(schema).named_entity_classes()
+
+    ranks = {}
+    for position, (class_name, details) in enumerate(named_entity_classes.items()):
+        annotations = details.get("annotations", {})
+        rank = int(annotations.get("priority", position))
+        label = class_name_to_label.get(class_name, class_name)
+        ranks[label] = min(rank, ranks.get(label, rank))
+    return ranks
+
+
+def _span_key(entity):
+    return entity["start_idx"], entity["end_idx"], entity["location"]
+
+
+def _longest_per_cluster(group):
+    """
+    Keep the longest entity of each chain of overlapping entities.
+
+    Mirrors `remove_overlapping_entities` in `challenge_eval.py`, so resolving
+    here gives the same entities the scorer would keep.
+    """
+    keepers = []
+    cluster_best = None
+    current_end = None
+
+    for entity in sorted(group, key=lambda e: e["start_idx"]):
+        if cluster_best is not None and entity["start_idx"] < current_end:
+            if entity["end_idx"] - entity["start_idx"] > cluster_best["end_idx"] - cluster_best["start_idx"]:
+                cluster_best = entity
+            current_end = max(current_end, entity["end_idx"])
+        else:
+            if cluster_best is not None:
+                keepers.append(cluster_best)
+            cluster_best = entity
+            current_end = entity["end_idx"]
+
+    if cluster_best is not None:
+        keepers.append(cluster_best)
+    return keepers
+
+
+def _greedy_select(group, order_key, allow_nested):
+    """
+    Accept entities in `order_key` order, rejecting those that conflict with an accepted one.
+
+    Two spans overlap as they do for the scorer: when the one starting later
+    (or either, for equal starts) starts before the `end_idx` of the other, so
+    spans that only touch at an edge do not overlap. Accepted spans are kept in
+    sorted start and end lists, so each conflict check is a couple of binary searches.
+    """
+    starts = []
+    ends = []
+    keepers = []
+
+    for entity in sorted(group, key=order_key):
+        start, end = entity["start_idx"], entity["end_idx"]
+
+        if allow_nested:
+            # Accepted spans are at least as long, so a conflict (a crossing span)
+            # is one starting or ending strictly inside this one
+            conflict = (
+                bisect_left(starts, end) > bisect_right(starts, start)
+                or bisect_left(ends, end) > bisect_right(ends, start)
+            )
+        else:
+            conflict = bisect_left(starts, end) > bisect_left(starts, start)
+            if not conflict:
+                # A disjoint accepted set is sorted the same way by start and end,
+                # so only the closest span starting at or before this one can reach it
+                previous = bisect_right(starts, start) - 1
+                conflict = previous >= 0 and ends[previous] > start
+
+        if not conflict:
+            insort(starts, start)
+            insort(ends, end)
+            keepers.append(entity)
+
+    return keepers
+
+
+def resolve_overlaps(entities, policy="longest", class_priority=None):
+    """
+    Remove duplicated and overlapping entities of one document.
+
+    Policies:
+    - "longest": keep the longest entity of each chain of overlapping entities,
+      exactly as `challenge_eval.py` does at scoring time.
+    - "class_priority": keep entities of higher-priority labels first, then longer
+      ones; an entity is dropped if it overlaps one already kept.
+    - "nested": keep spans nested inside each other, drop only partially
+      overlapping (crossing) spans, preferring the longer one.
+
+    Every policy uses the scorer's overlap test, where `end_idx` bounds the
+    span exclusively: spans that only touch at an edge (one starts at the
+    other's `end_idx`) do not overlap and are all kept. Entities are grouped by
+    location and each group is sorted once, so the cost is O(n log n) per document.
+
+    Args:
+        entities (list): Entities in the BioNLP span format.
+        policy (str): One of OVERLAP_POLICIES.
+        class_priority (dict): Mapping from label to rank (lower wins), required by
+            "class_priority" and used to break ties between duplicates otherwise.
+
+    Returns:
+        list: The kept entities, in their original order.
+    """
+    if policy not in OVERLAP_POLICIES:
+        raise ValueError(f"Unknown overlap policy '{policy}'. Expected one of {OVERLAP_POLICIES}.")
+    if policy == "class_priority" and not class_priority:
+        raise ValueError("The 'class_priority' policy needs a class_priority mapping.")
+
+    class_priority = class_priority or {}
+    lowest_rank = len(class_priority)
+
+    def rank(entity):
+        return class_priority.get(entity["label"], lowest_rank)
+
+    # Keep one entity per (start, end, location), preferring the best-ranked label
+    unique = {}
+    for position, entity in enumerate(entities):
+        key = _span_key(entity)
+        if key not in unique or rank(entity) < rank(entities[unique[key]]):
+            unique[key] = position
+
+    groups = {}
+    for position in sorted(unique.values()):
+        entity = entities[position]
+        groups.setdefault(entity["location"], []).append(entity)
+
+    kept_ids = set()
+    for group in groups.values():
+        if policy == "longest":
+            keepers = _longest_per_cluster(group)
+        elif policy == "class_priority":
+            keepers = _greedy_select(
+                group, lambda e: (rank(e), e["start_idx"] - e["end_idx"], e["start_idx"]), allow_nested=False
+            )
+        else:
+            keepers = _greedy_select(
+                group, lambda e: (e["start_idx"] - e["end_idx"], rank(e), e["start_idx"]), allow_nested=True
+            )
+        kept_ids.update(id(entity) for entity in keepers)
+
+    return [entity for entity in entities if id(entity) in kept_ids]
+
+
+def load_class_priority(schema_path, class_name_to_label):
+    """
+    Load the schema and compute the label ranks used by the "class_priority" policy.
+
+    Args:
+        schema_path (str or Schema): Path to the schema JSON file, or an already loaded Schema.
+        class_name_to_label (dict): Mapping from class names to final labels.
+
+    Returns:
+        dict: Mapping from label to rank.
+    """
+    return class_priority_from_schema(load_schema(schema_path), class_name_to_label)
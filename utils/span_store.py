@@ -0,0 +1,252 @@
+import json
+
+import numpy as np
+
+LOCATIONS = ["title", "abstract"]
+COLUMNS = ["pmid", "start_idx", "end_idx", "location", "label", "text_span"]
+
+
+def _intern(values, pool, index):
+    """Return integer codes for values, growing the string pool as needed."""
+    codes = []
+    for value in values:
+        code = index.get(value)
+        if code is None:
+            code = len(pool)
+            index[value] = code
+            pool.append(value)
+        codes.append(code)
+    return codes
+
+
+def build_span_store(predictions):
+    """
+    Convert predictions in the BioNLP dict format into a columnar span store.
+
+    Offsets are stored as int32 arrays, location and label as small integer
+    codes, and PMIDs and span texts as codes into interned string pools.
+
+    Args:
+        predictions (dict): {pmid: {"entities": [{"start_idx", "end_idx", "location", "text_span", "label"}]}}
+
+    Returns:
+        dict: Span store with the columns listed in COLUMNS plus the string pools
+            `pmids`, `labels` and `texts`.
+    """
+    pmids, labels, texts = [], [], []
+    pmid_index, label_index, text_index = {}, {}, {}
+    location_index = {location: code for code, location in enumerate(LOCATIONS)}
+
+    # Every PMID gets a code, so documents without entities survive a round trip
+    _intern(predictions, pmids, pmid_index)
+
+    pmid_column, starts, ends, locations, label_values, text_values = [], [], [], [], [], []
+    for pmid, article in predictions.items():
+        entities = article.get("entities", [])
+        pmid_column.extend([pmid] * len(entities))
+        for entity in entities:
+            starts.append(int(entity["start_idx"]))
+            ends.append(int(entity["end_idx"]))
+            locations.append(location_index[entity["location"]])
+            label_values.append(entity["label"])
+            text_values.append(entity["text_span"])
+
+    return {
+        "pmid": np.array(_intern(pmid_column, pmids, pmid_index), dtype=np.int32),
+        "start_idx": np.array(starts, dtype=np.int32),
+        "end_idx": np.array(ends, dtype=np.int32),
+        "location": np.array(locations, dtype=np.int8),
+        "label": np.array(_intern(label_values, labels, label_index), dtype=np.int16),
+        "text_span": np.array(_intern(text_values, texts, text_index), dtype=np.int32),
+        "pmids": pmids,
+        "labels": labels,
+        "texts": texts,
+    }
+
+
+def load_span_store(path):
+    """
+    Load a span store from a predictions JSON file or a `.npz` file written by `save_span_store`.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        dict: The span store.
+    """
+    if path.endswith(".npz"):
+        with np.load(path, allow_pickle=False) as data:
+            store = {column: data[column] for column in COLUMNS}
+            for pool in ("pmids", "labels", "texts"):
+                store[pool] = data[pool].tolist()
+        return store
+
+    with open(path, "r", encoding="utf-8") as file:
+        return build_span_store(json.load(file))
+
+
+def save_span_store(store, path):
+    """
+    Save a span store as a compressed `.npz` file.
+
+    Args:
+        store (dict): The span store.
+        path (str): Output path (should end in `.npz`).
+    """
+    np.savez_compressed(
+        path,
+        **{column: store[column] for column in COLUMNS},
+        pmids=np.array(store["pmids"], dtype=str),
+        labels=np.array(store["labels"], dtype=str),
+        texts=np.array(store["texts"], dtype=str),
+    )
+    print(f"✅ Span store with {len(store['start_idx'])} spans saved to {path}")
+
+
+def span_store_to_predictions(store):
+    """
+    Convert a span store back to the BioNLP dict format.
+
+    Args:
+        store (dict): The span store.
+
+    Returns:
+        dict: {pmid: {"entities": [...]}} with entities in store order.
+    """
+    predictions = {pmid: {"entities": []} for pmid in store["pmids"]}
+    columns = zip(
+        store["pmid"].tolist(), store["start_idx"].tolist(), store["end_idx"].tolist(),
+        store["location"].tolist(), store["label"].tolist(), store["text_span"].tolist()
+    )
+    for pmid, start_idx, end_idx, location, label, text_span in columns:
+        predictions[store["pmids"][pmid]]["entities"].append({
+            "start_idx": start_idx,
+            "end_idx": end_idx,
+            "location": LOCATIONS[location],
+            "text_span": store["texts"][text_span],
+            "label": store["labels"][label],
+        })
+    return predictions
+
+
+def select_spans(store, mask_or_indices):
+    """
+    Return a new store holding only the selected rows. String pools are shared.
+
+    Args:
+        store (dict): The span store.
+        mask_or_indices (np.ndarray): Boolean mask or integer row indices.
+
+    Returns:
+        dict: The filtered span store.
+    """
+    selected = {column: store[column][mask_or_indices] for column in COLUMNS}
+    selected.update({pool: store[pool] for pool in ("pmids", "labels", "texts")})
+    return selected
+
+
+def filter_spans(store, labels=None, locations=None, pmids=None):
+    """
+    Keep only spans with the given labels, locations and/or PMIDs.
+
+    Args:
+        store (dict): The span store.
+        labels (iterable): Labels to keep.
+        locations (iterable): Locations to keep ("title", "abstract").
+        pmids (iterable): PMIDs to keep.
+
+    Returns:
+        dict: The filtered span store.
+    """
+    mask = np.ones(len(store["start_idx"]), dtype=bool)
+    for column, pool, values in (
+        ("label", store["labels"], labels),
+        ("location", LOCATIONS, locations),
+        ("pmid", store["pmids"], pmids),
+    ):
+        if values is not None:
+            values = set(values)
+            codes = [code for code, value in enumerate(pool) if value in values]
+            mask &= np.isin(store[column], codes)
+    return select_spans(store, mask)
+
+
+def _group_order(store):
+    """Row order sorted by (pmid, location, start_idx), stable on the original order."""
+    return np.lexsort((store["start_idx"], store["location"], store["pmid"]))
+
+
+def deduplicate_spans(store):
+    """
+    Keep the first span of each (pmid, start_idx, end_idx, location), like `remove_duplicated_entities`.
+
+    Args:
+        store (dict): The span store.
+
+    Returns:
+        tuple: (deduplicated store, number of removed spans).
+    """
+    keys = np.stack([store["pmid"], store["start_idx"], store["end_idx"], store["location"].astype(np.int32)], axis=1)
+    _, first_rows = np.unique(keys, axis=0, return_index=True)
+    keep = np.sort(first_rows)
+    return select_spans(store, keep), len(store["start_idx"]) - len(keep)
+
+
+def remove_overlapping_spans(store):
+    """
+    Keep the longest span of each chain of overlapping spans, like `remove_overlapping_entities`.
+
+    The store must already be deduplicated. Clusters are found with a
+    vectorized running maximum of the end offsets within each (pmid, location)
+    group, then the first longest span of each cluster is kept.
+
+    Args:
+        store (dict): The span store.
+
+    Returns:
+        tuple: (filtered store in original row order, number of removed spans).
+    """
+    count = len(store["start_idx"])
+    if count == 0:
+        return store, 0
+
+    order = _group_order(store)
+    group = store["pmid"][order].astype(np.int64) * len(LOCATIONS) + store["location"][order]
+    starts = store["start_idx"][order].astype(np.int64)
+    ends = store["end_idx"][order].astype(np.int64)
+
+    # Shift each group past the previous one so one running maximum serves all groups
+    new_group = np.empty(count, dtype=bool)
+    new_group[0] = True
+    new_group[1:] = group[1:] != group[:-1]
+    shift = np.cumsum(new_group) * (int(max(ends.max(), starts.max())) + 2)
+    running_end = np.maximum.accumulate(ends + shift)
+
+    new_cluster = new_group.copy()
+    new_cluster[1:] |= (starts[1:] + shift[1:]) >= running_end[:-1]
+    cluster = np.cumsum(new_cluster)
+
+    # First longest span of each cluster (ties keep the earliest start, as the scorer does)
+    lengths = ends - starts
+    position = np.arange(count)
+    ranking = np.lexsort((position, -lengths, cluster))
+    first_of_cluster = np.ones(count, dtype=bool)
+    first_of_cluster[1:] = cluster[ranking][1:] != cluster[ranking][:-1]
+    keep = np.sort(order[ranking[first_of_cluster]])
+
+    return select_spans(store, keep), count - len(keep)
+
+
+def span_store_nbytes(store):
+    """
+    Approximate memory used by the columns and string pools of a store.
+
+    Args:
+        store (dict): The span store.
+
+    Returns:
+        int: Number of bytes.
+    """
+    column_bytes = sum(store[column].nbytes for column in COLUMNS)
+    pool_bytes = sum(len(value.encode("utf-8")) for pool in ("pmids", "labels", "texts") for value in store[pool])
+    return column_bytes + pool_bytes
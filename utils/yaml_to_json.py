@@ -1,4 +1,3 @@
-import yaml
 import json
 import os
 
@@ -29,7 +28,8 @@ def yaml_to_json(yaml_file="input/schema.yaml", json_file="generated/schema.json
         # Ensure the output directory exists
         os.makedirs(os.path.dirname(json_file), exist_ok=True)
 
-        # Load YAML data
+        # Load YAML data (PyYAML is only needed for this conversion step)
+        import yaml
         with open(yaml_file, 'r') as file:
             yaml_data = yaml.safe_load(file)
 